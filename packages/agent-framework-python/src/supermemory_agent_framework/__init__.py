@@ -4,6 +4,14 @@ from .connection import (
     AgentSupermemory,
 )
 
+from .batching import (
+    BatchWriter,
+)
+from .client_pool import (
+    SupermemoryClientPool,
+    get_client_pool,
+)
+
 from .tools import (
     SupermemoryTools,
     MemorySearchResult,
@@ -25,7 +33,11 @@ from .utils import (
     create_logger,
     deduplicate_memories,
     DeduplicatedMemories,
+    MemoryTokenUsage,
     convert_profile_to_markdown,
+    estimate_tokens,
+    limit_memories_to_token_budget,
+    rank_search_results,
 )
 
 from .exceptions import (
@@ -39,6 +51,9 @@ from .exceptions import (
 
 __all__ = [
     "AgentSupermemory",
+    "BatchWriter",
+    "SupermemoryClientPool",
+    "get_client_pool",
     "SupermemoryTools",
     "MemorySearchResult",
     "MemoryAddResult",
@@ -51,6 +66,10 @@ __all__ = [
     "deduplicate_memories",
     "DeduplicatedMemories",
     "convert_profile_to_markdown",
+    "MemoryTokenUsage",
+    "estimate_tokens",
+    "limit_memories_to_token_budget",
+    "rank_search_results",
     "SupermemoryError",
     "SupermemoryConfigurationError",
     "SupermemoryAPIError",
@@ -0,0 +1,220 @@
+"""Write-coalescing batch uploader for Supermemory memory adds."""
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+
+from .exceptions import SupermemoryMemoryOperationError
+
+if TYPE_CHECKING:
+    import supermemory
+
+
+class BatchWriter:
+    """Buffers memory adds and uploads them with one ``documents.batch_add`` call.
+
+    Documents are flushed when ``max_batch_size`` is reached or ``flush_interval``
+    seconds after the first buffered add, whichever comes first. Batches are sent
+    one at a time, and a batch never holds two documents with the same custom ID,
+    so writes to one conversation reach the API in order.
+
+    The writer is bound to the event loop it is first used on.
+
+    Example:
+        ```python
+        writer = BatchWriter.for_client(supermemory.AsyncSupermemory(api_key="..."))
+        await writer.submit({"content": "...", "container_tag": "user-123"})
+        await writer.aclose()
+        ```
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[list[dict[str, Any]]], Awaitable[Any]],
+        max_batch_size: int = 50,
+        flush_interval: float = 0.25,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            send_batch: Coroutine function uploading a list of documents.
+            max_batch_size: Maximum number of documents per batch request.
+            flush_interval: Seconds to wait for more documents before flushing.
+            max_retries: Retries per batch after a failed upload.
+            retry_backoff: Initial delay between retries, doubled on each attempt.
+        """
+        self._send_batch = send_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.batches_sent = 0
+        self.documents_sent = 0
+
+        self._buffer: list[tuple[dict[str, Any], asyncio.Future[Any]]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set[asyncio.Task[None]] = set()
+        self._send_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+    @classmethod
+    def for_client(
+        cls, client: "supermemory.AsyncSupermemory", **kwargs: Any
+    ) -> "BatchWriter":
+        """Create a writer that uploads through an async Supermemory client."""
+
+        async def send_batch(documents: list[dict[str, Any]]) -> Any:
+            return await client.documents.batch_add(documents=documents)
+
+        return cls(send_batch, **kwargs)
+
+    @property
+    def pending_count(self) -> int:
+        """Number of buffered documents not yet handed to a batch."""
+        return len(self._buffer)
+
+    async def submit(self, document: dict[str, Any]) -> Any:
+        """Queue a document and wait until the batch containing it is uploaded.
+
+        Returns:
+            The batch result for this document.
+
+        Raises:
+            SupermemoryMemoryOperationError: If the upload fails after all retries.
+            RuntimeError: If the writer has been closed.
+        """
+        return await self.add(document)
+
+    def add(self, document: dict[str, Any]) -> "asyncio.Future[Any]":
+        """Queue a document without waiting for it to be uploaded."""
+        if self._closed:
+            raise RuntimeError("BatchWriter is closed")
+
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+            self._send_lock = asyncio.Lock()
+        elif self._loop is not loop:
+            raise RuntimeError("BatchWriter is bound to a different event loop")
+
+        future: asyncio.Future[Any] = loop.create_future()
+        self._buffer.append((document, future))
+
+        if len(self._buffer) >= self.max_batch_size:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self._schedule_flush)
+        return future
+
+    async def flush(self) -> None:
+        """Upload everything buffered so far and wait for in-flight batches."""
+        if self._buffer:
+            self._schedule_flush()
+        while self._flush_tasks:
+            await asyncio.gather(*list(self._flush_tasks), return_exceptions=True)
+
+    async def aclose(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting documents and drain the buffer.
+
+        Documents still pending when the timeout expires fail with
+        ``asyncio.CancelledError``.
+        """
+        self._closed = True
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            for task in list(self._flush_tasks):
+                task.cancel()
+            for _, future in self._take(len(self._buffer)):
+                future.cancel()
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+
+        task = asyncio.ensure_future(self._flush_buffer())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush_buffer(self) -> None:
+        assert self._send_lock is not None
+        async with self._send_lock:
+            while self._buffer:
+                await self._send(self._next_batch())
+
+    def _next_batch(self) -> list[tuple[dict[str, Any], "asyncio.Future[Any]"]]:
+        seen_custom_ids: set[str] = set()
+        size = 0
+        for document, _ in self._buffer[: self.max_batch_size]:
+            custom_id = document.get("custom_id")
+            if custom_id is not None:
+                if custom_id in seen_custom_ids:
+                    break
+                seen_custom_ids.add(custom_id)
+            size += 1
+        return self._take(size)
+
+    def _take(self, size: int) -> list[tuple[dict[str, Any], "asyncio.Future[Any]"]]:
+        batch, self._buffer = self._buffer[:size], self._buffer[size:]
+        return batch
+
+    async def _send(
+        self, batch: list[tuple[dict[str, Any], "asyncio.Future[Any]"]]
+    ) -> None:
+        documents = [document for document, _ in batch]
+        attempt = 0
+        while True:
+            try:
+                response = await self._send_batch(documents)
+                break
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as error:
+                if attempt >= self.max_retries or not _is_retryable(error):
+                    failure = SupermemoryMemoryOperationError(
+                        "Failed to upload memory batch", error
+                    )
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(failure)
+                    return
+                await asyncio.sleep(self.retry_backoff * 2**attempt)
+                attempt += 1
+
+        self.batches_sent += 1
+        self.documents_sent += len(batch)
+
+        results = _field(response, "results") or []
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            result = results[index] if index < len(results) else response
+            if _field(result, "status") == "error":
+                future.set_exception(
+                    SupermemoryMemoryOperationError(
+                        f"Failed to add memory: {_field(result, 'error') or 'unknown error'}"
+                    )
+                )
+            else:
+                future.set_result(result)
+
+
+def _field(value: Any, name: str) -> Any:
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Client errors other than timeouts and rate limits are not retried."""
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int) and 400 <= status_code < 500:
+        return status_code in (408, 429)
+    return True
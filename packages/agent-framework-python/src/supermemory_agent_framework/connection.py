@@ -1,16 +1,19 @@
 """Shared connection class for Supermemory Agent Framework integrations.
 
 Provides a single connection object that holds the SDK client, container tag,
-conversation ID, and entity context — shared across middleware, tools, and
-context providers.
+conversation ID, entity context, and optional batch writer — shared across
+middleware, tools, and context providers.
 """
 
+import asyncio
 import os
 import uuid
 from typing import Optional
 
 import supermemory
 
+from .batching import BatchWriter
+from .client_pool import SupermemoryClientPool, get_client_pool
 from .exceptions import SupermemoryConfigurationError
 
 
@@ -38,6 +41,9 @@ class AgentSupermemory:
         container_tag: str = "msft_agent_chat",
         entity_context: Optional[str] = None,
         conversation_id: Optional[str] = None,
+        batch_writes: bool = False,
+        batch_writer: Optional[BatchWriter] = None,
+        client_pool: Optional[SupermemoryClientPool] = None,
     ) -> None:
         """Initialize the shared Supermemory connection.
 
@@ -46,6 +52,13 @@ class AgentSupermemory:
             container_tag: Unique identifier for memory scope (e.g., user ID).
             entity_context: Custom context about the user/entity to prepend to memories.
             conversation_id: Conversation ID for grouping messages. Auto-generated if None.
+            batch_writes: Buffer conversation saves and upload them in batches
+                with ``documents.batch_add`` instead of one request per save.
+            batch_writer: Existing batch writer to share between connections,
+                so saves from many conversations go out in the same batches.
+            client_pool: Pool the API client is taken from. Defaults to the
+                process-wide pool, so connections with the same API key share
+                one HTTP connection pool. ``aclose`` releases the client.
         """
         resolved_api_key = api_key or os.getenv("SUPERMEMORY_API_KEY")
         if not resolved_api_key:
@@ -54,10 +67,31 @@ class AgentSupermemory:
                 "Pass api_key parameter or set the environment variable."
             )
 
-        self.client: supermemory.AsyncSupermemory = supermemory.AsyncSupermemory(
-            api_key=resolved_api_key
-        )
+        self._client_pool: SupermemoryClientPool = client_pool if client_pool is not None else get_client_pool()
+        self.client: supermemory.AsyncSupermemory = self._client_pool.acquire(resolved_api_key)
+        self._client_released: bool = False
         self.container_tag: str = container_tag
         self.conversation_id: str = conversation_id or str(uuid.uuid4())
         self.custom_id: str = f"conversation_{self.conversation_id}"
         self.entity_context: Optional[str] = entity_context
+        self._owns_batch_writer: bool = batch_writer is None and batch_writes
+        self.batch_writer: Optional[BatchWriter] = batch_writer or (
+            BatchWriter.for_client(self.client) if batch_writes else None
+        )
+
+    async def aclose(self, timeout: Optional[float] = None) -> None:
+        """Upload buffered saves and release the shared API client.
+
+        The batch writer is closed if this connection created it.
+        """
+        try:
+            if self.batch_writer is None:
+                return
+            if self._owns_batch_writer:
+                await self.batch_writer.aclose(timeout)
+            else:
+                await asyncio.wait_for(self.batch_writer.flush(), timeout)
+        finally:
+            if not self._client_released:
+                self._client_released = True
+                await self._client_pool.release(self.client)
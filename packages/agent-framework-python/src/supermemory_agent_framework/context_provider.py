@@ -19,9 +19,14 @@ except ImportError:
 
 from .connection import AgentSupermemory
 from .utils import (
+    DeduplicatedMemories,
+    MemoryTokenUsage,
     convert_profile_to_markdown,
     create_logger,
     deduplicate_memories,
+    estimate_tokens,
+    limit_memories_to_token_budget,
+    rank_search_results,
     wrap_memory_injection,
 )
 
@@ -75,6 +80,7 @@ class SupermemoryContextProvider(BaseContextProvider):
         context_prompt: str = "",
         verbose: bool = False,
         source_id: str = "supermemory",
+        max_memory_tokens: Optional[int] = None,
     ) -> None:
         """Initialize the Supermemory context provider.
 
@@ -85,6 +91,10 @@ class SupermemoryContextProvider(BaseContextProvider):
             context_prompt: Header text prepended to memory content.
             verbose: Enable detailed logging.
             source_id: Unique identifier for this provider instance.
+            max_memory_tokens: Estimated token cap for the injected memory
+                text, wrapper and entity context included. Static facts are
+                kept first, then dynamic facts, then search results by
+                descending similarity.
         """
         super().__init__(source_id=source_id)
 
@@ -95,6 +105,8 @@ class SupermemoryContextProvider(BaseContextProvider):
         self._context_prompt = context_prompt
         self._logger = create_logger(verbose)
         self._client = connection.client
+        self._max_memory_tokens = max_memory_tokens
+        self.memory_token_usage = MemoryTokenUsage()
 
     async def before_run(
         self,
@@ -135,10 +147,6 @@ class SupermemoryContextProvider(BaseContextProvider):
             self._logger.debug("No memories found")
             return
 
-        # Prepend entity context if available
-        if self._connection.entity_context:
-            memories_text = f"{self._connection.entity_context}\n\n{memories_text}"
-
         # Inject memories into the session context
         full_text = wrap_memory_injection(memories_text, self._context_prompt)
 
@@ -189,7 +197,10 @@ class SupermemoryContextProvider(BaseContextProvider):
                 "custom_id": self._connection.custom_id,
             }
 
-            await self._client.add(**add_params)
+            if self._connection.batch_writer is not None:
+                await self._connection.batch_writer.submit(add_params)
+            else:
+                await self._client.add(**add_params)
 
             self._logger.info("Conversation stored successfully")
 
@@ -200,7 +211,11 @@ class SupermemoryContextProvider(BaseContextProvider):
             )
 
     async def _fetch_memories(self, query_text: str = "") -> str:
-        """Fetch and format memories from Supermemory."""
+        """Fetch and format memories from Supermemory.
+
+        With ``max_memory_tokens``, lower-priority memories are dropped until
+        the injected text, wrapper included, fits the estimated token budget.
+        """
         kwargs: dict[str, Any] = {"container_tag": self._container_tag}
         if query_text:
             kwargs["q"] = query_text
@@ -219,29 +234,62 @@ class SupermemoryContextProvider(BaseContextProvider):
         deduplicated = deduplicate_memories(
             static=static,
             dynamic=dynamic,
-            search_results=search_results_raw,
+            search_results=(
+                rank_search_results(search_results_raw)
+                if self._max_memory_tokens is not None
+                else search_results_raw
+            ),
+        )
+
+        dropped_tokens = 0
+        if self._max_memory_tokens is not None:
+            deduplicated, _, dropped_tokens = limit_memories_to_token_budget(
+                DeduplicatedMemories(
+                    static=deduplicated.static if self._mode != "query" else [],
+                    dynamic=deduplicated.dynamic if self._mode != "query" else [],
+                    search_results=(
+                        deduplicated.search_results if self._mode != "profile" else []
+                    ),
+                ),
+                self._max_memory_tokens,
+                render=lambda kept: wrap_memory_injection(
+                    self._format_memories(kept), self._context_prompt
+                ),
+            )
+
+        memories_text = self._format_memories(deduplicated)
+        injected = (
+            estimate_tokens(wrap_memory_injection(memories_text, self._context_prompt))
+            if memories_text
+            else 0
         )
+        self.memory_token_usage.record(injected, dropped_tokens)
+        return memories_text
 
-        # Build formatted text based on mode
+    def _format_memories(self, memories: DeduplicatedMemories) -> str:
+        """Format memories for the configured mode, after any entity context."""
         profile_text = ""
         if self._mode != "query":
             profile_text = convert_profile_to_markdown(
                 {
                     "profile": {
-                        "static": deduplicated.static,
-                        "dynamic": deduplicated.dynamic,
+                        "static": memories.static,
+                        "dynamic": memories.dynamic,
                     },
                     "searchResults": {"results": []},
                 }
             )
 
         search_text = ""
-        if self._mode != "profile" and deduplicated.search_results:
+        if self._mode != "profile" and memories.search_results:
             search_text = "Search results for user's recent message:\n" + "\n".join(
-                f"- {memory}" for memory in deduplicated.search_results
+                f"- {memory}" for memory in memories.search_results
             )
 
-        return f"{profile_text}\n{search_text}".strip()
+        text = f"{profile_text}\n{search_text}".strip()
+        if text and self._connection.entity_context:
+            text = f"{self._connection.entity_context}\n\n{text}"
+        return text
 
     def _extract_query_from_context(self, context: Any) -> str:
         """Extract the last user message from the session context."""
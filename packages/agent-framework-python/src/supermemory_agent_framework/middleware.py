@@ -11,16 +11,22 @@ from typing import Any, Awaitable, Callable, Literal, Optional
 import supermemory
 from agent_framework import ChatMiddleware, Message
 
+from .batching import BatchWriter
 from .connection import AgentSupermemory
 from .exceptions import (
     SupermemoryMemoryOperationError,
     SupermemoryNetworkError,
 )
 from .utils import (
+    DeduplicatedMemories,
     Logger,
+    MemoryTokenUsage,
     convert_profile_to_markdown,
     create_logger,
     deduplicate_memories,
+    estimate_tokens,
+    limit_memories_to_token_budget,
+    rank_search_results,
     wrap_memory_injection,
 )
 
@@ -32,6 +38,7 @@ class SupermemoryMiddlewareOptions:
     verbose: bool = False
     mode: Literal["profile", "query", "full"] = "profile"
     add_memory: Literal["always", "never"] = "never"
+    max_memory_tokens: Optional[int] = None
 
 
 def _get_last_user_message(messages: Any) -> str:
@@ -115,14 +122,53 @@ def _get_conversation_content(messages: Any) -> str:
     return "\n\n".join(conversation_parts)
 
 
+def _format_memories(
+    memories: DeduplicatedMemories,
+    mode: Literal["profile", "query", "full"],
+    entity_context: Optional[str] = None,
+) -> str:
+    """Format deduplicated memories as the text wrapped for injection."""
+    profile_data = ""
+    if mode != "query":
+        profile_data = convert_profile_to_markdown(
+            {
+                "profile": {
+                    "static": memories.static,
+                    "dynamic": memories.dynamic,
+                },
+                "searchResults": {"results": []},
+            }
+        )
+
+    search_results_memories = ""
+    if mode != "profile" and memories.search_results:
+        search_results_memories = (
+            "Search results for user's recent message: \n"
+            + "\n".join(f"- {memory}" for memory in memories.search_results)
+        )
+
+    text = f"{profile_data}\n{search_results_memories}".strip()
+    if text and entity_context:
+        text = f"{entity_context}\n\n{text}"
+    return text
+
+
 async def _build_memories_text(
     container_tag: str,
     logger: Logger,
     mode: Literal["profile", "query", "full"],
     client: supermemory.AsyncSupermemory,
     query_text: str = "",
+    max_memory_tokens: Optional[int] = None,
+    token_usage: Optional[MemoryTokenUsage] = None,
+    entity_context: Optional[str] = None,
 ) -> str:
-    """Build formatted memories text from Supermemory API."""
+    """Build formatted memories text from Supermemory API.
+
+    ``entity_context`` is prepended when there are memories. With
+    ``max_memory_tokens``, lower-priority memories are dropped until the
+    injected text, wrapper included, fits the estimated token budget.
+    """
     kwargs: dict[str, Any] = {"container_tag": container_tag}
     if query_text:
         kwargs["q"] = query_text
@@ -154,29 +200,37 @@ async def _build_memories_text(
     deduplicated = deduplicate_memories(
         static=static,
         dynamic=dynamic,
-        search_results=search_results_raw,
+        search_results=(
+            rank_search_results(search_results_raw)
+            if max_memory_tokens is not None
+            else search_results_raw
+        ),
     )
 
-    profile_data = ""
-    if mode != "query":
-        profile_data = convert_profile_to_markdown(
-            {
-                "profile": {
-                    "static": deduplicated.static,
-                    "dynamic": deduplicated.dynamic,
-                },
-                "searchResults": {"results": []},
-            }
+    dropped_tokens = 0
+    if max_memory_tokens is not None:
+        deduplicated, _, dropped_tokens = limit_memories_to_token_budget(
+            DeduplicatedMemories(
+                static=deduplicated.static if mode != "query" else [],
+                dynamic=deduplicated.dynamic if mode != "query" else [],
+                search_results=deduplicated.search_results if mode != "profile" else [],
+            ),
+            max_memory_tokens,
+            render=lambda kept: wrap_memory_injection(
+                _format_memories(kept, mode, entity_context)
+            ),
         )
 
-    search_results_memories = ""
-    if mode != "profile" and deduplicated.search_results:
-        search_results_memories = (
-            "Search results for user's recent message: \n"
-            + "\n".join(f"- {memory}" for memory in deduplicated.search_results)
+    memories = _format_memories(deduplicated, mode, entity_context)
+    if token_usage is not None:
+        injected = estimate_tokens(wrap_memory_injection(memories)) if memories else 0
+        token_usage.record(injected, dropped_tokens)
+    if dropped_tokens:
+        logger.debug(
+            "Memory token budget applied",
+            {"max_memory_tokens": max_memory_tokens, "dropped_tokens": dropped_tokens},
         )
-
-    return f"{profile_data}\n{search_results_memories}".strip()
+    return memories
 
 
 async def _save_memory(
@@ -185,8 +239,9 @@ async def _save_memory(
     content: str,
     custom_id: str,
     logger: Logger,
+    batch_writer: Optional[BatchWriter] = None,
 ) -> None:
-    """Save a memory to Supermemory."""
+    """Save a memory to Supermemory, through the batch writer when given."""
     try:
         add_params: dict[str, Any] = {
             "content": content,
@@ -194,7 +249,10 @@ async def _save_memory(
             "custom_id": custom_id,
         }
 
-        response = await client.add(**add_params)
+        if batch_writer is not None:
+            response = await batch_writer.submit(add_params)
+        else:
+            response = await client.add(**add_params)
 
         logger.info(
             "Memory saved successfully",
@@ -265,6 +323,7 @@ class SupermemoryChatMiddleware(ChatMiddleware):
         self._logger = create_logger(self._options.verbose)
         self._supermemory_client = connection.client
         self._background_tasks: set[asyncio.Task[None]] = set()
+        self.memory_token_usage = MemoryTokenUsage()
 
     async def process(
         self,
@@ -287,6 +346,7 @@ class SupermemoryChatMiddleware(ChatMiddleware):
                         content,
                         self._connection.custom_id,
                         self._logger,
+                        batch_writer=self._connection.batch_writer,
                     )
                 )
                 self._background_tasks.add(task)
@@ -332,6 +392,9 @@ class SupermemoryChatMiddleware(ChatMiddleware):
                 self._options.mode,
                 self._supermemory_client,
                 query_text,
+                max_memory_tokens=self._options.max_memory_tokens,
+                token_usage=self.memory_token_usage,
+                entity_context=self._connection.entity_context,
             )
         except Exception as e:
             self._logger.error(
@@ -342,10 +405,6 @@ class SupermemoryChatMiddleware(ChatMiddleware):
             return
 
         if memories:
-            # Prepend entity context if available
-            if self._connection.entity_context:
-                memories = f"{self._connection.entity_context}\n\n{memories}"
-
             self._logger.debug(
                 "Memory content preview",
                 {"content": memories[:200], "full_length": len(memories)},
@@ -0,0 +1,91 @@
+"""Tests for the write-coalescing batch writer."""
+
+import asyncio
+
+import pytest
+
+from supermemory_agent_framework import BatchWriter, SupermemoryMemoryOperationError
+
+
+class _Recorder:
+    def __init__(self, failures: list[Exception] | None = None) -> None:
+        self.batches: list[list[dict]] = []
+        self._failures = list(failures or [])
+
+    async def __call__(self, documents: list[dict]) -> dict:
+        if self._failures:
+            raise self._failures.pop(0)
+        self.batches.append(documents)
+        return {
+            "results": [{"id": f"doc-{i}", "status": "queued"} for i in range(len(documents))]
+        }
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class TestBatchWriter:
+    @pytest.mark.asyncio
+    async def test_coalesces_adds_into_one_batch(self) -> None:
+        send = _Recorder()
+        writer = BatchWriter(send, flush_interval=0.01)
+
+        results = await asyncio.gather(
+            *[
+                writer.submit({"content": f"m{i}", "container_tag": "user", "custom_id": f"c{i}"})
+                for i in range(3)
+            ]
+        )
+
+        assert len(send.batches) == 1
+        assert [doc["content"] for doc in send.batches[0]] == ["m0", "m1", "m2"]
+        assert [result["id"] for result in results] == ["doc-0", "doc-1", "doc-2"]
+        assert (writer.batches_sent, writer.documents_sent) == (1, 3)
+
+    @pytest.mark.asyncio
+    async def test_flushes_at_max_batch_size(self) -> None:
+        send = _Recorder()
+        writer = BatchWriter(send, max_batch_size=2, flush_interval=60)
+
+        await asyncio.gather(*[writer.submit({"content": str(i)}) for i in range(4)])
+
+        assert [len(batch) for batch in send.batches] == [2, 2]
+
+    @pytest.mark.asyncio
+    async def test_same_custom_id_keeps_order_across_batches(self) -> None:
+        send = _Recorder()
+        writer = BatchWriter(send, flush_interval=0.01)
+
+        for content in ["a", "b"]:
+            writer.add({"content": content, "custom_id": "conv"})
+        writer.add({"content": "c", "custom_id": "other"})
+        await writer.flush()
+
+        assert [[doc["content"] for doc in batch] for batch in send.batches] == [["a"], ["b", "c"]]
+
+    @pytest.mark.asyncio
+    async def test_retries_server_errors_but_not_client_errors(self) -> None:
+        send = _Recorder(failures=[_StatusError(503)])
+        writer = BatchWriter(send, flush_interval=0.01, retry_backoff=0.01)
+        assert (await writer.submit({"content": "x"}))["status"] == "queued"
+
+        send = _Recorder(failures=[_StatusError(400)])
+        writer = BatchWriter(send, flush_interval=0.01, retry_backoff=0.01)
+        with pytest.raises(SupermemoryMemoryOperationError):
+            await writer.submit({"content": "x"})
+        assert send.batches == []
+
+    @pytest.mark.asyncio
+    async def test_aclose_drains_buffer(self) -> None:
+        send = _Recorder()
+        writer = BatchWriter(send, flush_interval=60)
+        future = writer.add({"content": "late"})
+
+        await writer.aclose()
+
+        assert future.done() and future.result()["id"] == "doc-0"
+        with pytest.raises(RuntimeError):
+            writer.add({"content": "after close"})
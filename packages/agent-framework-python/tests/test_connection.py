@@ -1,11 +1,16 @@
 """Tests for AgentSupermemory connection class."""
 
+import asyncio
 import os
 from unittest.mock import patch
 
 import pytest
 
-from supermemory_agent_framework import AgentSupermemory, SupermemoryConfigurationError
+from supermemory_agent_framework import (
+    AgentSupermemory,
+    SupermemoryClientPool,
+    SupermemoryConfigurationError,
+)
 
 
 class TestAgentSupermemory:
@@ -58,3 +63,42 @@ class TestAgentSupermemory:
         conn = AgentSupermemory(api_key="test-key")
         # Client should be the same object
         assert conn.client is conn.client
+
+    def test_connections_share_pooled_client(self) -> None:
+        conn = AgentSupermemory(api_key="pooled-key")
+        other = AgentSupermemory(api_key="pooled-key", container_tag="user-123")
+        assert other.client is conn.client
+
+
+class TestSupermemoryClientPool:
+    @pytest.mark.asyncio
+    async def test_client_closed_after_last_release(self) -> None:
+        pool = SupermemoryClientPool(max_connections=10, http2=False)
+        conn = AgentSupermemory(api_key="test-key", client_pool=pool)
+        other = AgentSupermemory(api_key="test-key", client_pool=pool)
+        third = AgentSupermemory(api_key="other-key", client_pool=pool)
+
+        assert conn.client is other.client
+        assert third.client is not conn.client
+        assert len(pool) == 2
+
+        await conn.aclose()
+        await conn.aclose()
+        http_client = pool._clients[("test-key", None, asyncio.get_running_loop())][1]
+        assert not http_client.is_closed
+        await other.aclose()
+        assert http_client.is_closed
+        assert len(pool) == 1
+
+    def test_clients_are_per_event_loop(self) -> None:
+        pool = SupermemoryClientPool(http2=False)
+
+        async def connect() -> AgentSupermemory:
+            return AgentSupermemory(api_key="test-key", client_pool=pool)
+
+        first = asyncio.run(connect())
+        second = asyncio.run(connect())
+
+        assert first.client is not second.client
+        # The first loop is closed, so its client was dropped instead of reused
+        assert len(pool) == 1
@@ -3,6 +3,8 @@
 import pytest
 
 from supermemory_agent_framework import AgentSupermemory, SupermemoryContextProvider
+from supermemory_agent_framework.utils import estimate_tokens, wrap_memory_injection
+from tests.test_middleware import _ProfileClient
 
 
 def _make_conn(**kwargs):
@@ -123,3 +125,23 @@ class TestExtractConversation:
         result = provider._extract_conversation_from_context(MockContext())
         assert "User: Hello!" in result
         assert "Assistant: Hi there!" in result
+
+
+class TestMemoryTokenBudget:
+    async def test_budget_covers_injected_text(self) -> None:
+        budget = 100
+        provider = SupermemoryContextProvider(
+            _make_conn(entity_context="The user travels often."),
+            max_memory_tokens=budget,
+        )
+        provider._client = _ProfileClient()
+
+        memories = await provider._fetch_memories("Which seat should I book?")
+
+        injected = wrap_memory_injection(memories, provider._context_prompt)
+        assert memories.startswith("The user travels often.")
+        assert "Likes tea" in memories
+        assert "Prefers window seats" not in memories
+        assert estimate_tokens(injected) <= budget
+        assert provider.memory_token_usage.injected == estimate_tokens(injected)
+        assert provider.memory_token_usage.dropped > 0
@@ -1,5 +1,7 @@
 """Tests for Supermemory middleware."""
 
+from types import SimpleNamespace
+
 import pytest
 
 from supermemory_agent_framework import (
@@ -8,9 +10,16 @@ from supermemory_agent_framework import (
     SupermemoryMiddlewareOptions,
 )
 from supermemory_agent_framework.middleware import (
+    _build_memories_text,
     _get_last_user_message,
     _get_conversation_content,
 )
+from supermemory_agent_framework.utils import (
+    MemoryTokenUsage,
+    SimpleLogger,
+    estimate_tokens,
+    wrap_memory_injection,
+)
 
 
 def _make_conn(**kwargs):
@@ -111,3 +120,44 @@ class TestMiddlewareConfiguration:
         conn = _make_conn(entity_context="User is a Python developer")
         middleware = SupermemoryChatMiddleware(conn)
         assert middleware._connection.entity_context == "User is a Python developer"
+
+
+class _ProfileClient:
+    async def profile(self, **kwargs):
+        return SimpleNamespace(
+            profile=SimpleNamespace(
+                static=["Likes tea", "Lives in Oslo", "Works as a nurse"],
+                dynamic=["Planning a trip to Rome"],
+            ),
+            search_results=SimpleNamespace(
+                results=[
+                    {"memory": "Asked about train tickets", "similarity": 0.9},
+                    {"memory": "Prefers window seats", "similarity": 0.5},
+                ]
+            ),
+        )
+
+
+class TestMemoryTokenBudget:
+    async def test_budget_covers_injected_text(self) -> None:
+        usage = MemoryTokenUsage()
+        budget = 100
+
+        memories = await _build_memories_text(
+            "user-123",
+            SimpleLogger(),
+            "full",
+            _ProfileClient(),
+            "Which seat should I book?",
+            max_memory_tokens=budget,
+            token_usage=usage,
+            entity_context="The user travels often.",
+        )
+
+        injected = wrap_memory_injection(memories)
+        assert memories.startswith("The user travels often.")
+        assert "Likes tea" in memories
+        assert "Prefers window seats" not in memories
+        assert estimate_tokens(injected) <= budget
+        assert usage.injected == estimate_tokens(injected)
+        assert usage.dropped > 0
@@ -8,6 +8,10 @@ from supermemory_agent_framework.utils import (
     convert_profile_to_markdown,
     create_logger,
     deduplicate_memories,
+    estimate_tokens,
+    limit_memories_to_token_budget,
+    rank_search_results,
+    wrap_memory_injection,
 )
 
 
@@ -83,6 +87,73 @@ class TestConvertProfileToMarkdown:
         assert "## Dynamic Profile" in result
 
 
+class TestMemoryTokenBudget:
+    def test_keeps_priority_prefix(self) -> None:
+        memories = DeduplicatedMemories(
+            static=["Prefers Python"],
+            dynamic=["Planning a trip"],
+            search_results=["Booked a flight"],
+        )
+        budget = estimate_tokens("- Prefers Python\n") + estimate_tokens("- Planning a trip\n")
+
+        kept, kept_tokens, dropped_tokens = limit_memories_to_token_budget(memories, budget)
+
+        assert kept.static == ["Prefers Python"]
+        assert kept.dynamic == ["Planning a trip"]
+        assert kept.search_results == []
+        assert kept_tokens == budget
+        assert dropped_tokens == estimate_tokens("- Booked a flight\n")
+
+    def test_stops_at_first_memory_that_does_not_fit(self) -> None:
+        memories = DeduplicatedMemories(
+            static=["A very long static fact " * 10, "Short"],
+            dynamic=[],
+            search_results=[],
+        )
+
+        kept, kept_tokens, _ = limit_memories_to_token_budget(memories, 10)
+
+        assert kept.static == []
+        assert kept_tokens == 0
+
+    def test_render_budget_renders_once_per_section(self) -> None:
+        memories = DeduplicatedMemories(
+            static=[f"Static fact {i}" for i in range(500)],
+            dynamic=[f"Dynamic fact {i}" for i in range(500)],
+            search_results=[f"Search result {i}" for i in range(500)],
+        )
+        calls = []
+
+        def render(kept: DeduplicatedMemories) -> str:
+            calls.append(kept)
+            return wrap_memory_injection(
+                "\n\n".join(
+                    f"## {name}\n" + "\n".join(f"- {m}" for m in items)
+                    for name, items in (
+                        ("Static", kept.static),
+                        ("Dynamic", kept.dynamic),
+                        ("Search", kept.search_results),
+                    )
+                    if items
+                )
+            )
+
+        kept, kept_tokens, _ = limit_memories_to_token_budget(memories, 6000, render)
+
+        assert len(calls) == 3
+        assert 0 < len(kept.search_results) < 500
+        assert kept_tokens == estimate_tokens(render(kept))
+        assert kept_tokens <= 6000
+
+    def test_rank_search_results(self) -> None:
+        results = [
+            {"memory": "a", "similarity": 0.2},
+            {"memory": "b", "similarity": 0.9},
+            {"memory": "c"},
+        ]
+        assert [r["memory"] for r in rank_search_results(results)] == ["b", "a", "c"]
+
+
 class TestLogger:
     def test_verbose_logger(self, capsys: pytest.CaptureFixture[str]) -> None:
         logger = SimpleLogger(verbose=True)
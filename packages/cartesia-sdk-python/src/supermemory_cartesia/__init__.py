@@ -31,6 +31,9 @@ from .agent import SupermemoryCartesiaAgent
 # Export MemoryConfig as a top-level class for convenience
 MemoryConfig = SupermemoryCartesiaAgent.MemoryConfig
 
+from .batching import BatchWriter
+from .cache import QueryResultCache, normalize_query
+from .client_pool import SupermemoryClientPool, get_client_pool
 from .exceptions import (
     APIError,
     ConfigurationError,
@@ -40,10 +43,13 @@ from .exceptions import (
     SupermemoryCartesiaError,
 )
 from .utils import (
+    MemoryRenderer,
     deduplicate_memories,
+    estimate_tokens,
     format_memories_to_text,
     format_relative_time,
     get_last_user_message,
+    limit_memories_to_token_budget,
 )
 
 __version__ = "0.1.0"
@@ -52,6 +58,13 @@ __all__ = [
     # Main agent
     "SupermemoryCartesiaAgent",
     "MemoryConfig",
+    # Caching
+    "QueryResultCache",
+    # Batching
+    "BatchWriter",
+    # Connections
+    "SupermemoryClientPool",
+    "get_client_pool",
     # Exceptions
     "SupermemoryCartesiaError",
     "ConfigurationError",
@@ -61,7 +74,11 @@ __all__ = [
     "NetworkError",
     # Utilities
     "get_last_user_message",
+    "MemoryRenderer",
     "deduplicate_memories",
+    "estimate_tokens",
+    "limit_memories_to_token_budget",
     "format_memories_to_text",
     "format_relative_time",
+    "normalize_query",
 ]
@@ -5,15 +5,26 @@ Cartesia Line voice agents, adding persistent memory and context enrichment.
 """
 
 import asyncio
+import inspect
 import os
 import re
-from typing import Any, AsyncGenerator, Dict, List, Literal, Optional
+import time
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Callable, Dict, List, Literal, Optional
 
 from loguru import logger
 from pydantic import BaseModel, Field
 
+from .batching import BatchWriter
+from .cache import QueryResultCache, normalize_query
+from .client_pool import SupermemoryClientPool, get_client_pool
 from .exceptions import ConfigurationError, MemoryRetrievalError
-from .utils import deduplicate_memories, format_memories_to_text
+from .utils import (
+    MemoryRenderer,
+    deduplicate_memories,
+    estimate_tokens,
+    limit_memories_to_token_budget,
+)
 
 try:
     import supermemory
@@ -28,6 +39,169 @@ except ImportError:
 # XML tags for memory injection
 MEMORY_TAG_START = "<user_memories>"
 MEMORY_TAG_END = "</user_memories>"
+PROFILE_TAG_START = "<user_profile>"
+PROFILE_TAG_END = "</user_profile>"
+# Events that can start a memory prefetch before the user's turn ends
+PREFETCH_EVENT_TYPES = (
+    "UserTurnStarted",
+    "user_turn_started",
+    "UserTranscriptionReceived",
+    "user_transcription_received",
+)
+
+INJECTED_CONTEXT_PATTERN = re.compile(
+    rf"(?:\n\n)?(?:{PROFILE_TAG_START}.*?{PROFILE_TAG_END}|{MEMORY_TAG_START}.*?{MEMORY_TAG_END})\s*",
+    re.DOTALL,
+)
+
+_USER_TURN_TYPES = ("user_turn_ended", "UserTurnEnded")
+_AGENT_TURN_TYPES = ("agent_turn_ended", "AgentTurnEnded")
+_USER_TEXT_TYPES = ("user_text_sent", "UserTextSent")
+_AGENT_TEXT_TYPES = ("agent_text_sent", "AgentTextSent")
+
+
+def _event_key(item: Any) -> Any:
+    """Key identifying a history item across reads of a rebuilt history."""
+    if isinstance(item, dict):
+        return ("message", item.get("role"), item.get("content"))
+    event_type = getattr(item, 'type', None) or type(item).__name__
+    if event_type in _AGENT_TEXT_TYPES:
+        # Line rebuilds agent text events, with new event ids, on every event
+        return (event_type, getattr(item, 'content', None))
+    event_id = getattr(item, 'event_id', None)
+    return (event_type, event_id if event_id is not None else id(item))
+
+
+def _same_event(item: Any, other: Any) -> bool:
+    return item is other or _event_key(item) == _event_key(other)
+
+
+class _HistoryCursor:
+    """Incremental reader of a call's event history.
+
+    Remembers how far the history was read and the last item read,
+    so each turn only extracts the events appended since. Line rebuilds the
+    history list, and some of its events, on every event, so items are matched
+    by ``event_id`` or content rather than by identity. A text event listed both
+    on its own and inside a turn event is stored once, while a user repeating
+    themselves is stored every time. If the history no longer continues the
+    one read before, it is re-read from the start, skipping the messages
+    already emitted.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.scanned = 0
+        self.tail: Any = None
+        # event ids already stored, and items without one claimed in this read
+        self.seen: set = set()
+        self._claimed: set = set()
+        self.emitted = 0
+
+    def read(self, history: list) -> List[Dict[str, str]]:
+        """Return the messages in the events appended since the last read."""
+        if self.scanned and (
+            len(history) < self.scanned
+            or not _same_event(history[self.scanned - 1], self.tail)
+        ):
+            self.scanned = 0
+            self.seen = set()
+
+        skip = self.emitted if self.scanned == 0 else 0
+        messages: List[Dict[str, str]] = []
+        self._claimed = set()
+        for item in history[self.scanned:]:
+            self._extract(item, messages)
+        self._claimed = set()
+
+        self.scanned = len(history)
+        self.tail = history[-1] if history else None
+        new = messages[skip:]
+        self.emitted += len(new)
+        return new
+
+    def _claim(self, item: Any) -> bool:
+        event_id = getattr(item, 'event_id', None)
+        if event_id is None:
+            # Without an id, only repeats within this read can be recognized
+            seen, key = self._claimed, id(item)
+        else:
+            seen, key = self.seen, event_id
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+
+    def _extract(self, item: Any, messages: List[Dict[str, str]]) -> None:
+        if isinstance(item, dict):
+            if item.get("role") in ("user", "assistant") and item.get("content") and self._claim(item):
+                messages.append(item)
+            return
+
+        event_type = getattr(item, 'type', None) or type(item).__name__
+
+        if event_type in _USER_TURN_TYPES:
+            nested = getattr(item, 'content', [])
+            if isinstance(nested, list):
+                for n in nested:
+                    if isinstance(getattr(n, 'content', None), str) and self._claim(n):
+                        messages.append({"role": "user", "content": n.content})
+
+        elif event_type in _AGENT_TURN_TYPES:
+            nested = getattr(item, 'content', [])
+            if isinstance(nested, list):
+                texts = []
+                for n in nested:
+                    if isinstance(getattr(n, 'content', None), str) and self._claim(n):
+                        texts.append(n.content)
+                if texts:
+                    messages.append({"role": "assistant", "content": " ".join(texts)})
+
+        elif event_type in _USER_TEXT_TYPES or event_type in _AGENT_TEXT_TYPES:
+            content = getattr(item, 'content', '')
+            if content and isinstance(content, str) and self._claim(item):
+                role = "user" if event_type in _USER_TEXT_TYPES else "assistant"
+                messages.append({"role": role, "content": content})
+
+
+def _accepts_keyword(func: Any, name: str) -> bool:
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(
+        (p.name == name and p.kind in (p.KEYWORD_ONLY, p.POSITIONAL_OR_KEYWORD))
+        or p.kind == p.VAR_KEYWORD
+        for p in parameters
+    )
+
+
+class _CallSession:
+    """Memory state of one call, so concurrent calls can share a wrapper."""
+
+    def __init__(self, owner: Any = None, custom_id: Optional[str] = None) -> None:
+        self.owner = owner
+        # Document the call's messages are stored in
+        self.custom_id = custom_id
+        self.history_cursor = _HistoryCursor()
+        self.last_query: Optional[str] = None
+        self.last_memories_data: Optional[Dict[str, Any]] = None
+        self.prefetch_task: Optional[asyncio.Task] = None
+        self.prefetch_query: Optional[str] = None
+        # Pending prefetch, started once the partial transcript stops changing
+        self.prefetch_timer: Optional[asyncio.TimerHandle] = None
+        self.last_seen = time.monotonic()
+
+    def cancel_prefetch(self) -> None:
+        if self.prefetch_timer is not None:
+            self.prefetch_timer.cancel()
+            self.prefetch_timer = None
+        if self.prefetch_task is not None and not self.prefetch_task.done():
+            self.prefetch_task.cancel()
+        self.prefetch_task = None
+        self.prefetch_query = None
 
 
 class SupermemoryCartesiaAgent:
@@ -67,12 +241,36 @@ class SupermemoryCartesiaAgent:
             search_threshold: Minimum similarity threshold (0.0-1.0).
             system_prompt: Prefix text for memory context.
             mode: "profile", "query", or "full".
+            max_memory_tokens: Estimated token cap for the injected memory text,
+                including the system prompt, section headers and memory tags.
+                Static facts are kept first, then dynamic facts, then search
+                results by descending similarity. None injects everything.
+            placement: "prepend" puts memories before the system prompt.
+                "cache_friendly" keeps the system prompt first and unchanged,
+                followed by the sorted static profile and then the per-turn
+                memories, so LLM prompt caching keeps hitting the prefix.
+                Only applies when the wrapped agent's system prompt is
+                rewritten; memories passed through ``context`` are added to
+                the turn by the agent, after its system prompt.
+            retrieval_timeout_ms: Maximum time a UserTurnEnded event waits for
+                memory retrieval. Past it, the last retrieved memories are
+                injected and the retrieval finishes in the background for the
+                next turn. None waits for the retrieval however long it takes.
+            prefetch: Start memory retrieval on partial transcript events, so
+                it overlaps with the user speaking.
+            prefetch_stable_ms: How long a partial transcript must stay
+                unchanged before it is used for a prefetch.
         """
 
         search_limit: int = Field(default=10, ge=1)
         search_threshold: float = Field(default=0.1, ge=0.0, le=1.0)
         system_prompt: str = Field(default="Based on previous conversations:\n\n")
         mode: Literal["profile", "query", "full"] = Field(default="full")
+        max_memory_tokens: Optional[int] = Field(default=None, ge=1)
+        placement: Literal["prepend", "cache_friendly"] = Field(default="prepend")
+        retrieval_timeout_ms: Optional[int] = Field(default=2000, ge=1)
+        prefetch: bool = Field(default=False)
+        prefetch_stable_ms: int = Field(default=300, ge=0)
 
     def __init__(
         self,
@@ -85,6 +283,12 @@ class SupermemoryCartesiaAgent:
         container_tags: Optional[List[str]] = None,
         config: Optional[MemoryConfig] = None,
         base_url: Optional[str] = None,
+        query_cache: Optional[QueryResultCache] = None,
+        batch_writer: Optional[BatchWriter] = None,
+        max_sessions: int = 1000,
+        session_ttl: float = 3600.0,
+        client_pool: Optional[SupermemoryClientPool] = None,
+        call_id: Optional[Callable[[Any], Optional[str]]] = None,
     ):
         """Initialize the Supermemory Cartesia agent wrapper.
 
@@ -99,6 +303,21 @@ class SupermemoryCartesiaAgent:
                            organization/categorization (e.g., ["org-acme", "prod"]).
             config: Memory retrieval configuration.
             base_url: Optional custom Supermemory API URL.
+            query_cache: Optional local cache of search results, so repeated or
+                rephrased questions skip the API round-trip.
+            batch_writer: Optional batch writer; stored messages are buffered and
+                uploaded together with other writes instead of one request each.
+            max_sessions: Maximum number of calls whose memory state is kept.
+                The least recently active call is evicted first.
+            session_ttl: Seconds a call's memory state is kept without activity.
+            client_pool: Pool the API client is taken from. Defaults to the
+                process-wide pool, so wrappers with the same API key and base
+                URL share connections. Call ``aclose`` to release it.
+            call_id: Optional function returning the ID of the call a turn's
+                ``env`` belongs to. When it returns an ID, the call's messages
+                are stored in their own document, ``"{custom_id}:{call_id}"``.
+                It must return the same ID for every turn of a call, so a
+                reconnect appends to the same document.
 
         Raises:
             ConfigurationError: If API key, container_tag, or custom_id is missing.
@@ -106,6 +325,7 @@ class SupermemoryCartesiaAgent:
         self.agent = agent
         self.container_tag = container_tag
         self.custom_id = custom_id
+        self.call_id = call_id
         self.add_memory = add_memory
 
         # Build container tags list: primary tag first, then additional tags
@@ -114,6 +334,8 @@ class SupermemoryCartesiaAgent:
             self.container_tags.extend(container_tags)
 
         self.config = config or SupermemoryCartesiaAgent.MemoryConfig()
+        self.query_cache = query_cache
+        self.batch_writer = batch_writer
 
         self.api_key = api_key or os.getenv("SUPERMEMORY_API_KEY")
         if not self.api_key:
@@ -130,26 +352,50 @@ class SupermemoryCartesiaAgent:
                 "This ensures messages are grouped into the same document for a conversation."
             )
 
+        self._client_pool = client_pool if client_pool is not None else get_client_pool()
         self._supermemory_client = None
         if supermemory is not None:
             try:
-                self._supermemory_client = supermemory.AsyncSupermemory(
-                    api_key=self.api_key,
-                    base_url=base_url,
-                )
+                self._supermemory_client = self._client_pool.acquire(self.api_key, base_url)
                 logger.info(f"[Supermemory] Initialized client for container_tag={container_tag}, all_tags={self.container_tags}")
             except Exception as e:
                 logger.error(f"[Supermemory] Failed to initialize client: {e}")
 
-        self._messages_sent_count: int = 0
-        self._last_query: Optional[str] = None
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        # Per-call memory state, keyed by the call's AgentEnv (or custom_id)
+        self._sessions: "OrderedDict[Any, _CallSession]" = OrderedDict()
+        # Wrapped agents that take per-turn context (Line's LlmAgent) get memory
+        # context passed to process(); others have their system prompt rewritten
+        self._accepts_context = _accepts_keyword(getattr(agent, "process", None), "context")
         self._background_tasks: set = set()  # Track background tasks to prevent GC
+        self._renderer = MemoryRenderer()
+        # Renders candidate memory sets while applying max_memory_tokens, so the
+        # trial renders do not evict the cached sections of the injected text
+        self._budget_renderer = MemoryRenderer()
+        # Estimated tokens of injected memories, and of memories cut by the budget
+        self.memory_tokens_injected: int = 0
+        self.memory_tokens_dropped: int = 0
+        # Retrievals that outlived retrieval_timeout_ms, and the last result
+        self.retrieval_timeouts: int = 0
+        # The wrapped agent's own system prompt, and the prompt last written
+        # over it, so each turn composes from the base instead of rewriting
+        self._base_prompt: Optional[str] = None
+        self._composed_prompt: Optional[str] = None
 
     async def _retrieve_memories(self, query: str) -> Dict[str, Any]:
         """Retrieve memories from Supermemory."""
         if self._supermemory_client is None:
             raise MemoryRetrievalError("Supermemory client not initialized")
 
+        use_cache = self.query_cache is not None and self.config.mode != "profile" and query
+        settings = (self.config.search_limit, self.config.search_threshold)
+        if use_cache:
+            cached = self.query_cache.get(self.container_tags[0], query, settings)
+            if cached is not None:
+                logger.info(f"[Supermemory] Using cached memories for query: {query[:50]}...")
+                return cached
+
         try:
             # Use primary container tag for profile retrieval
             kwargs: Dict[str, Any] = {"container_tag": self.container_tags[0]}
@@ -161,10 +407,7 @@ class SupermemoryCartesiaAgent:
 
             logger.info(f"[Supermemory] Retrieving memories for query: {query[:50]}...")
 
-            response = await asyncio.wait_for(
-                self._supermemory_client.profile(**kwargs),
-                timeout=10.0
-            )
+            response = await self._supermemory_client.profile(**kwargs)
 
             # A user with no stored memories yet gets a null profile back, which
             # is a normal case, not an error. Guard against it so we return an
@@ -182,23 +425,177 @@ class SupermemoryCartesiaAgent:
                 f"dynamic: {len(profile_dynamic)}, search: {len(search_results)}"
             )
 
-            return {
+            memories_data = {
                 "profile": {
                     "static": profile_static,
                     "dynamic": profile_dynamic,
                 },
                 "search_results": search_results,
             }
+            if use_cache:
+                self.query_cache.set(self.container_tags[0], query, memories_data, settings)
+            return memories_data
 
-        except asyncio.TimeoutError:
-            logger.warning("[Supermemory] Profile API timed out after 10s")
-            raise MemoryRetrievalError("Profile API timed out")
         except Exception as e:
             logger.error(f"[Supermemory] Error retrieving memories: {e}")
             raise MemoryRetrievalError("Failed to retrieve memories", e)
 
-    async def _store_messages(self, messages: List[Dict[str, Any]]) -> None:
-        """Store messages in Supermemory."""
+    def _session(self, env: Any) -> _CallSession:
+        """Return the memory state of the call ``env`` belongs to.
+
+        Calls are told apart by their Line ``AgentEnv``, which lives for one
+        call; without one, all turns share the session of ``custom_id``.
+        Messages are stored under ``custom_id``, or under
+        ``"{custom_id}:{call_id}"`` when ``call_id`` gives the call an ID. Idle
+        sessions expire after ``session_ttl``, and at most ``max_sessions`` are
+        kept.
+
+        Raises:
+            ConfigurationError: If a second call starts while another is
+                active and the wrapped agent's ``process`` takes no
+                ``context``, since both calls would rewrite its system prompt.
+        """
+        owner = getattr(env, "agent_env", None)
+        key = id(owner) if owner is not None else self.custom_id
+        now = time.monotonic()
+
+        session = self._sessions.get(key)
+        if session is None or session.owner is not owner:
+            self._expire_sessions(now)
+            if (
+                not self._accepts_context
+                and hasattr(self.agent, "config")
+                and any(other != key for other in self._sessions)
+            ):
+                raise ConfigurationError(
+                    "The wrapped agent's process() does not accept `context`, so memories "
+                    "are written into its shared system prompt; use one wrapper and agent "
+                    "per call instead of serving concurrent calls."
+                )
+            custom_id = self.custom_id
+            call_id = self.call_id(env) if self.call_id is not None else None
+            if call_id:
+                custom_id = f"{self.custom_id}:{call_id}"
+            session = _CallSession(owner, custom_id)
+            self._sessions[key] = session
+        session.last_seen = now
+        self._sessions.move_to_end(key)
+        self._expire_sessions(now)
+
+        return session
+
+    def _expire_sessions(self, now: float) -> None:
+        """Drop sessions idle for over ``session_ttl``, and the oldest beyond ``max_sessions``."""
+        while self._sessions:
+            oldest_key, oldest = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and now - oldest.last_seen <= self.session_ttl:
+                break
+            del self._sessions[oldest_key]
+            oldest.cancel_prefetch()
+
+    def _end_session(self, env: Any) -> None:
+        owner = getattr(env, "agent_env", None)
+        key = id(owner) if owner is not None else self.custom_id
+        session = self._sessions.pop(key, None)
+        if session is not None:
+            session.cancel_prefetch()
+
+    def _schedule_prefetch(self, session: _CallSession, query: str) -> None:
+        """Prefetch for ``query`` once no newer partial transcript replaces it.
+
+        Partial transcripts arrive in bursts, so the prefetch starts only after
+        ``prefetch_stable_ms`` without a newer one.
+        """
+        if session.prefetch_timer is not None:
+            session.prefetch_timer.cancel()
+            session.prefetch_timer = None
+
+        delay = self.config.prefetch_stable_ms / 1000
+        if delay <= 0:
+            self._start_prefetch(session, query)
+            return
+        session.prefetch_timer = asyncio.get_running_loop().call_later(
+            delay, self._start_prefetch, session, query
+        )
+
+    def _start_prefetch(self, session: _CallSession, query: str) -> None:
+        """Start retrieving memories for ``query`` ahead of UserTurnEnded."""
+        session.prefetch_timer = None
+        # In "profile" mode the query is not sent, so any prefetch answers it
+        if session.prefetch_task is not None and (
+            self.config.mode == "profile"
+            or normalize_query(session.prefetch_query or "") == normalize_query(query)
+        ):
+            return
+
+        session.cancel_prefetch()
+        session.prefetch_query = query
+        session.prefetch_task = asyncio.ensure_future(self._retrieve_memories(query))
+        session.prefetch_task.add_done_callback(self._on_prefetch_done)
+
+    def _on_prefetch_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"[Supermemory] Memory prefetch failed: {task.exception()}")
+
+    async def _retrieve_prefetched_or_fresh(self, session: _CallSession, query: str) -> Dict[str, Any]:
+        """Use the prefetch if it answers ``query``, otherwise retrieve afresh.
+
+        In "profile" mode the query is not sent, so any prefetch answers it.
+        """
+        if session.prefetch_timer is not None:
+            session.prefetch_timer.cancel()
+            session.prefetch_timer = None
+        task, prefetch_query = session.prefetch_task, session.prefetch_query
+        session.prefetch_task = None
+        session.prefetch_query = None
+
+        if task is not None:
+            if self.config.mode == "profile" or normalize_query(
+                prefetch_query or ""
+            ) == normalize_query(query):
+                try:
+                    return await task
+                except (MemoryRetrievalError, asyncio.CancelledError):
+                    pass
+            else:
+                task.cancel()
+
+        return await self._retrieve_memories(query)
+
+    async def _retrieve_within_deadline(self, session: _CallSession, query: str) -> Optional[Dict[str, Any]]:
+        """Retrieve memories, waiting no longer than ``retrieval_timeout_ms`` if set.
+
+        On timeout the retrieval keeps running in the background so the next
+        turn sees its result, and the last memories retrieved for this call
+        are returned instead (None if nothing was retrieved yet).
+
+        Raises:
+            MemoryRetrievalError: If retrieval fails before the deadline.
+        """
+        task = asyncio.ensure_future(self._retrieve_prefetched_or_fresh(session, query))
+
+        def remember(done: asyncio.Task) -> None:
+            if not done.cancelled() and done.exception() is None:
+                session.last_memories_data = done.result()
+
+        task.add_done_callback(remember)
+        timeout_ms = self.config.retrieval_timeout_ms
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(task), None if timeout_ms is None else timeout_ms / 1000
+            )
+        except asyncio.TimeoutError:
+            self.retrieval_timeouts += 1
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            logger.warning(
+                f"[Supermemory] Memory retrieval exceeded {timeout_ms}ms, "
+                "using last known memories"
+            )
+            return session.last_memories_data
+
+    async def _store_messages(self, session: _CallSession, messages: List[Dict[str, Any]]) -> None:
+        """Store messages in the call's Supermemory document."""
         if self._supermemory_client is None or not messages or self.add_memory == "never":
             return
 
@@ -222,11 +619,17 @@ class SupermemoryCartesiaAgent:
                 "metadata": {"platform": "cartesia"},
             }
 
-            # Use custom_id for document grouping (required field)
-            add_kwargs["custom_id"] = self.custom_id
-            logger.info(f"[Supermemory] Using custom_id={self.custom_id} for document grouping")
+            # Use the call's custom_id for document grouping (required field)
+            add_kwargs["custom_id"] = session.custom_id or self.custom_id
+            logger.info(f"[Supermemory] Using custom_id={add_kwargs['custom_id']} for document grouping")
 
-            await self._supermemory_client.add(**add_kwargs)
+            if self.batch_writer is not None:
+                await self.batch_writer.submit(add_kwargs)
+            else:
+                await self._supermemory_client.add(**add_kwargs)
+            if self.query_cache is not None:
+                for tag in self.container_tags:
+                    self.query_cache.invalidate(tag)
 
             logger.info(f"[Supermemory] Successfully stored {len(messages)} messages")
 
@@ -254,18 +657,72 @@ class SupermemoryCartesiaAgent:
         include_profile = self.config.mode in ("profile", "full")
         include_search = self.config.mode in ("query", "full")
 
-        memory_text = format_memories_to_text(
-            deduplicated,
+        if self.config.max_memory_tokens is not None:
+            deduplicated, _, dropped_tokens = limit_memories_to_token_budget(
+                deduplicated,
+                self.config.max_memory_tokens,
+                include_profile=include_profile,
+                include_search=include_search,
+                render=lambda kept: self._render_memory_message(
+                    kept, include_profile, include_search, self._budget_renderer
+                ),
+                search_line=self._budget_renderer.search_line,
+            )
+            self.memory_tokens_dropped += dropped_tokens
+
+        memory_message = self._render_memory_message(
+            deduplicated, include_profile, include_search
+        )
+        if not memory_message:
+            return None
+
+        self.memory_tokens_injected += estimate_tokens(memory_message)
+        return memory_message
+
+    def _render_memory_message(
+        self,
+        memories: Dict[str, Any],
+        include_profile: bool,
+        include_search: bool,
+        renderer: Optional[MemoryRenderer] = None,
+    ) -> str:
+        """Render the tagged memory context for the configured placement."""
+        renderer = renderer or self._renderer
+
+        if self.config.placement != "cache_friendly":
+            memory_text = renderer.render(
+                memories,
+                system_prompt=self.config.system_prompt,
+                include_static=include_profile,
+                include_dynamic=include_profile,
+                include_search=include_search,
+            )
+            return f"{MEMORY_TAG_START}\n{memory_text}\n{MEMORY_TAG_END}" if memory_text else ""
+
+        # A stable profile block followed by per-turn memories
+        stable_text = renderer.render(
+            {"static": sorted(memories["static"]), "dynamic": [], "search_results": []},
             system_prompt=self.config.system_prompt,
             include_static=include_profile,
+        )
+        volatile_text = renderer.render(
+            {
+                "static": [],
+                "dynamic": sorted(memories["dynamic"]),
+                "search_results": memories["search_results"],
+            },
+            # The prompt prefix leads the stable block; repeat it only without one
+            system_prompt="" if stable_text else self.config.system_prompt,
             include_dynamic=include_profile,
             include_search=include_search,
         )
 
-        if not memory_text:
-            return None
-
-        return f"{MEMORY_TAG_START}\n{memory_text}\n{MEMORY_TAG_END}"
+        blocks = []
+        if stable_text:
+            blocks.append(f"{PROFILE_TAG_START}\n{stable_text}\n{PROFILE_TAG_END}")
+        if volatile_text:
+            blocks.append(f"{MEMORY_TAG_START}\n{volatile_text}\n{MEMORY_TAG_END}")
+        return "\n\n".join(blocks)
 
     def _extract_user_message(self, event: Any) -> Optional[str]:
         """Extract user text from a UserTurnEnded event."""
@@ -293,56 +750,13 @@ class SupermemoryCartesiaAgent:
 
     def _extract_conversation_from_history(self, history: list) -> List[Dict[str, str]]:
         """Extract messages from Cartesia event history."""
-        messages = []
-        seen = set()
-
-        for item in history:
-            if isinstance(item, dict):
-                if item.get("role") in ("user", "assistant"):
-                    content = item.get("content", "")
-                    if content and content not in seen:
-                        messages.append(item)
-                        seen.add(content)
-                continue
-
-            event_type = getattr(item, 'type', None) or type(item).__name__
-
-            if event_type in ('user_turn_ended', 'UserTurnEnded'):
-                nested = getattr(item, 'content', [])
-                if isinstance(nested, list):
-                    for n in nested:
-                        if hasattr(n, 'content') and isinstance(n.content, str):
-                            if n.content not in seen:
-                                messages.append({"role": "user", "content": n.content})
-                                seen.add(n.content)
-
-            elif event_type in ('agent_turn_ended', 'AgentTurnEnded'):
-                nested = getattr(item, 'content', [])
-                if isinstance(nested, list):
-                    texts = [n.content for n in nested if hasattr(n, 'content') and isinstance(n.content, str)]
-                    if texts:
-                        content = " ".join(texts)
-                        if content not in seen:
-                            messages.append({"role": "assistant", "content": content})
-                            seen.add(content)
-
-            elif event_type in ('user_text_sent', 'UserTextSent'):
-                content = getattr(item, 'content', '')
-                if content and isinstance(content, str) and content not in seen:
-                    messages.append({"role": "user", "content": content})
-                    seen.add(content)
-
-            elif event_type in ('agent_text_sent', 'AgentTextSent'):
-                content = getattr(item, 'content', '')
-                if content and isinstance(content, str) and content not in seen:
-                    messages.append({"role": "assistant", "content": content})
-                    seen.add(content)
-
-        return messages
-
-    async def _enrich_event_with_memories(self, event: Any) -> tuple[Any, Optional[str]]:
+        return _HistoryCursor().read(history)
+
+    async def _enrich_event_with_memories(
+        self, session: _CallSession, event: Any
+    ) -> tuple[Any, Optional[str]]:
         """Enrich event by retrieving memories.
-        
+
         Returns:
             Tuple of (event, memory_context) - memory_context is None if no memories found.
             The event is returned unchanged; memory injection happens at the agent level.
@@ -353,14 +767,18 @@ class SupermemoryCartesiaAgent:
             logger.warning("[Supermemory] Could not extract user message from event")
             return event, None
 
-        if user_message == self._last_query:
+        if user_message == session.last_query:
             return event, None
 
-        self._last_query = user_message
+        session.last_query = user_message
         logger.info(f"[Supermemory] Processing user message: {user_message[:50]}...")
 
         try:
-            memories_data = await self._retrieve_memories(user_message)
+            memories_data = await self._retrieve_within_deadline(session, user_message)
+            if memories_data is None:
+                logger.info("[Supermemory] No memories retrieved yet for context injection")
+                return event, None
+
             memory_context = self._build_memory_message(memories_data)
 
             if not memory_context:
@@ -380,73 +798,119 @@ class SupermemoryCartesiaAgent:
     async def process(self, env: Any, event: Event) -> AsyncGenerator[Event, None]:
         """Process events with memory enrichment.
 
+        Memory state is kept per call. When the wrapped agent's ``process``
+        takes a ``context`` argument, as Line's ``LlmAgent`` does, memories
+        are passed with the turn and shared agent configuration is left alone,
+        so one wrapper can serve concurrent calls. Otherwise the agent's
+        system prompt is rewritten each turn, and only one call at a time is
+        accepted.
+
         Args:
             env: Turn environment from Cartesia Line.
             event: Input event to process.
 
         Yields:
             Output events from the wrapped agent.
+
+        Raises:
+            ConfigurationError: If a concurrent call would share the system
+                prompt of an agent that takes no ``context``.
         """
+        event_type = type(event).__name__
+        session = self._session(env)
+        kwargs: Dict[str, Any] = {}
         try:
-            if type(event).__name__ == "UserTurnEnded":
+
+            if event_type == "UserTurnEnded":
                 logger.info("[Supermemory] Processing UserTurnEnded event")
-                event, memory_context = await self._enrich_event_with_memories(event)
-
-                # Clean up old memory context and inject new one if available
-                if hasattr(self.agent, 'config'):
-                    original_prompt = getattr(self.agent.config, 'system_prompt', '')
-                    # Always remove old memory context if present to prevent stale data
-                    if MEMORY_TAG_START in original_prompt:
-                        original_prompt = re.sub(
-                            rf'{re.escape(MEMORY_TAG_START)}.*?{re.escape(MEMORY_TAG_END)}\s*',
-                            '',
-                            original_prompt,
-                            flags=re.DOTALL
-                        )
-                        logger.debug("[Supermemory] Removed old memory context from system prompt")
-
-                    # Inject new memory context if available
+                event, memory_context = await self._enrich_event_with_memories(session, event)
+
+                if self._accepts_context:
                     if memory_context:
-                        self.agent.config.system_prompt = f"{memory_context}\n\n{original_prompt}"
-                        logger.info("[Supermemory] Injected new memory context into system prompt")
-                    else:
-                        # No new memories, but we cleaned up old ones
-                        self.agent.config.system_prompt = original_prompt
-                        logger.debug("[Supermemory] No new memories to inject, using clean prompt")
+                        kwargs["context"] = memory_context
+                        logger.info("[Supermemory] Passing memory context with this turn")
+                elif hasattr(self.agent, 'config'):
+                    # Replace old memory context with the new one, if any
+                    self.agent.config.system_prompt = self._compose_system_prompt(memory_context)
 
                 # Store conversation in background
                 if hasattr(event, 'history') and event.history:
-                    messages = self._extract_conversation_from_history(event.history)
-                    unsent = messages[self._messages_sent_count:]
+                    unsent = session.history_cursor.read(event.history)
                     if unsent:
                         logger.info(f"[Supermemory] Queuing {len(unsent)} messages for storage")
-                        task = asyncio.create_task(self._store_messages(unsent))
+                        task = asyncio.create_task(self._store_messages(session, unsent))
                         self._background_tasks.add(task)
                         task.add_done_callback(self._background_tasks.discard)
-                        self._messages_sent_count = len(messages)
                 else:
                     # No history yet, store just the current user message
                     user_content = self._extract_user_message(event)
                     if user_content:
                         logger.info(f"[Supermemory] No history, storing current user message: {user_content[:50]}...")
-                        task = asyncio.create_task(self._store_messages([{"role": "user", "content": user_content}]))
+                        task = asyncio.create_task(self._store_messages(session, [{"role": "user", "content": user_content}]))
                         self._background_tasks.add(task)
                         task.add_done_callback(self._background_tasks.discard)
-                        self._messages_sent_count = 1  # CRITICAL: Increment counter to prevent duplicate storage
+                        session.history_cursor.emitted = 1  # CRITICAL: Increment counter to prevent duplicate storage
 
-                async for output in self.agent.process(env, event):
-                    yield output
-            else:
-                async for output in self.agent.process(env, event):
-                    yield output
+            elif self.config.prefetch and event_type in PREFETCH_EVENT_TYPES:
+                partial = self._extract_user_message(event)
+                if partial and partial.strip():
+                    self._schedule_prefetch(session, partial)
+                elif self.config.mode == "profile":
+                    # No text yet; "profile" mode does not send the query, so
+                    # the turn's memories can be fetched right away
+                    self._start_prefetch(session, session.last_query or "")
+
+            elif event_type == "CallEnded":
+                self._end_session(env)
 
         except Exception as e:
             logger.error(f"[Supermemory] Error in process: {e}")
-            async for output in self.agent.process(env, event):
-                yield output
+            kwargs = {}
+
+        async for output in self.agent.process(env, event, **kwargs):
+            yield output
+
+    def _compose_system_prompt(self, memory_context: Optional[str]) -> str:
+        """Compose the wrapped agent's base system prompt with memory context.
+
+        The base prompt is captured once, and again only if something other
+        than this wrapper changed the prompt, so it is never rescanned and its
+        bytes stay the same from turn to turn.
+        """
+        current = getattr(self.agent.config, 'system_prompt', '') or ''
+        if self._base_prompt is None or current != self._composed_prompt:
+            base = current
+            # A prompt that already carries memory context, e.g. from an
+            # earlier wrapper around the same agent, is cleaned up once
+            if MEMORY_TAG_START in base or PROFILE_TAG_START in base:
+                base = INJECTED_CONTEXT_PATTERN.sub('', base)
+            self._base_prompt = base
+
+        if memory_context and self.config.placement == "cache_friendly":
+            prompt = f"{self._base_prompt}\n\n{memory_context}"
+            logger.info("[Supermemory] Appended new memory context to system prompt")
+        elif memory_context:
+            prompt = f"{memory_context}\n\n{self._base_prompt}"
+            logger.info("[Supermemory] Injected new memory context into system prompt")
+        else:
+            prompt = self._base_prompt
+            logger.debug("[Supermemory] No new memories to inject, using base prompt")
+
+        self._composed_prompt = prompt
+        return prompt
+
+    async def aclose(self) -> None:
+        """Wait for background memory writes, then release the shared API client."""
+        self.reset_memory_tracking()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        if self._supermemory_client is not None:
+            client, self._supermemory_client = self._supermemory_client, None
+            await self._client_pool.release(client)
 
     def reset_memory_tracking(self) -> None:
         """Reset memory tracking for a new conversation."""
-        self._messages_sent_count = 0
-        self._last_query = None
+        for session in self._sessions.values():
+            session.cancel_prefetch()
+        self._sessions.clear()
         logger.info("[Supermemory] Reset memory tracking state")
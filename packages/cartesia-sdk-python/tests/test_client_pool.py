@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import types
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from tests.test_empty_profile import _install_test_stubs
+
+_install_test_stubs()
+
+from supermemory_cartesia.agent import SupermemoryCartesiaAgent
+from supermemory_cartesia.client_pool import SupermemoryClientPool
+
+
+class _FakeHttpClient:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.is_closed = False
+
+    async def aclose(self) -> None:
+        self.is_closed = True
+
+
+class _FakeClient:
+    def __init__(self, *, api_key, base_url, http_client):
+        self.http_client = http_client
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class TestClientPool(unittest.IsolatedAsyncioTestCase):
+    async def test_wrappers_share_a_client_until_closed(self) -> None:
+        fake = types.ModuleType("supermemory")
+        fake.AsyncSupermemory = _FakeClient
+        fake.DefaultAsyncHttpxClient = _FakeHttpClient
+        pool = SupermemoryClientPool(http2=False)
+
+        with (
+            patch.dict(sys.modules, {"supermemory": fake}),
+            patch("supermemory_cartesia.agent.supermemory", fake),
+        ):
+            agents = [
+                SupermemoryCartesiaAgent(
+                    agent=SimpleNamespace(),
+                    api_key="mock_key",
+                    container_tag=f"user-{i}",
+                    custom_id=f"call-{i}",
+                    client_pool=pool,
+                )
+                for i in range(3)
+            ]
+        client = agents[0]._supermemory_client
+
+        self.assertTrue(all(a._supermemory_client is client for a in agents))
+        await agents[0].aclose()
+        self.assertFalse(client.closed)
+        for agent in agents[1:]:
+            await agent.aclose()
+        self.assertTrue(client.closed)
+        self.assertEqual(len(pool), 0)
+
+
+class TestClientPoolLoops(unittest.TestCase):
+    def test_each_loop_gets_its_own_client(self) -> None:
+        fake = types.ModuleType("supermemory")
+        fake.AsyncSupermemory = _FakeClient
+        fake.DefaultAsyncHttpxClient = _FakeHttpClient
+        pool = SupermemoryClientPool(http2=False)
+
+        async def acquire():
+            return pool.acquire("key-1")
+
+        with patch.dict(sys.modules, {"supermemory": fake}):
+            first = asyncio.run(acquire())
+            second = asyncio.run(acquire())
+
+        self.assertIsNot(first, second)
+        # The first loop is closed, so its client was dropped instead of reused
+        self.assertEqual(len(pool), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,9 @@ def _install_test_stubs() -> None:
         loguru_module = types.ModuleType("loguru")
 
         class _Logger:
+            def debug(self, *_args, **_kwargs):
+                return None
+
             def info(self, *_args, **_kwargs):
                 return None
 
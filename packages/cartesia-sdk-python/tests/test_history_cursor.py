@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import unittest
+import uuid
+from types import SimpleNamespace
+
+from tests.test_empty_profile import _install_test_stubs
+
+_install_test_stubs()
+
+from supermemory_cartesia.agent import _HistoryCursor
+
+
+def _text(kind: str, content: str) -> SimpleNamespace:
+    return SimpleNamespace(type=kind, content=content)
+
+
+def _event(kind: str, content: str) -> SimpleNamespace:
+    return SimpleNamespace(type=kind, content=content, event_id=str(uuid.uuid4()))
+
+
+class TestHistoryCursor(unittest.TestCase):
+    def test_reads_only_new_events_and_keeps_repeats(self) -> None:
+        cursor = _HistoryCursor()
+        said = _text("user_text_sent", "yes")
+        history = [
+            said,
+            SimpleNamespace(type="user_turn_ended", content=[said]),
+            _text("agent_text_sent", "Shall I book it?"),
+        ]
+
+        self.assertEqual(
+            cursor.read(history),
+            [
+                {"role": "user", "content": "yes"},
+                {"role": "assistant", "content": "Shall I book it?"},
+            ],
+        )
+
+        history.append(_text("user_text_sent", "yes"))
+        self.assertEqual(cursor.read(history), [{"role": "user", "content": "yes"}])
+        self.assertEqual(cursor.read(history), [])
+
+    def test_replaced_history_skips_emitted_messages(self) -> None:
+        cursor = _HistoryCursor()
+        cursor.read([_text("user_text_sent", "hi")])
+
+        replaced = [_text("user_text_sent", "hi"), _text("agent_text_sent", "hello")]
+        self.assertEqual(cursor.read(replaced), [{"role": "assistant", "content": "hello"}])
+
+    def test_recreated_agent_events_are_read_once(self) -> None:
+        # Line rebuilds agent text events, with new event ids, on every read,
+        # while user events keep their identity
+        cursor = _HistoryCursor()
+        user_events = []
+        agent_texts = []
+        read = []
+
+        for turn in range(100):
+            agent_texts.append(f"reply {turn}")
+            user_events.append(_event("user_text_sent", f"message {turn}"))
+            history = []
+            for text, user in zip(agent_texts, user_events):
+                history.append(_event("agent_text_sent", text))
+                history.append(user)
+            read.extend(cursor.read(history))
+            del history
+
+        expected = []
+        for turn in range(100):
+            expected.append({"role": "assistant", "content": f"reply {turn}"})
+            expected.append({"role": "user", "content": f"message {turn}"})
+        self.assertEqual(read, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
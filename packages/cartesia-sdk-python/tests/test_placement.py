@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import unittest
+from types import SimpleNamespace
+
+from tests.test_empty_profile import _install_test_stubs
+
+_install_test_stubs()
+
+from supermemory_cartesia.agent import INJECTED_CONTEXT_PATTERN, SupermemoryCartesiaAgent
+from supermemory_cartesia.utils import estimate_tokens
+
+
+class TestCacheFriendlyPlacement(unittest.TestCase):
+    def test_profile_block_is_stable_and_strippable(self) -> None:
+        agent = SupermemoryCartesiaAgent(
+            agent=SimpleNamespace(),
+            api_key="mock_key",
+            container_tag="user-123",
+            custom_id="conversation-456",
+            config=SupermemoryCartesiaAgent.MemoryConfig(
+                search_limit=10,
+                search_threshold=0.1,
+                system_prompt="Based on previous conversations:\n\n",
+                mode="full",
+                max_memory_tokens=None,
+                placement="cache_friendly",
+            ),
+        )
+
+        first = agent._build_memory_message(
+            {
+                "profile": {"static": ["Likes tea", "Lives in Oslo"], "dynamic": ["Planning a trip"]},
+                "search_results": [],
+            }
+        )
+        second = agent._build_memory_message(
+            {
+                "profile": {"static": ["Lives in Oslo", "Likes tea"], "dynamic": ["Packing bags"]},
+                "search_results": [],
+            }
+        )
+
+        self.assertTrue(first.startswith("<user_profile>"))
+        profile_block = first.split("\n\n<user_memories>")[0]
+        self.assertTrue(second.startswith(profile_block))
+        self.assertIn("Packing bags", second.split("<user_memories>")[1])
+        self.assertEqual(first.count("Based on previous conversations"), 1)
+        self.assertNotIn("Based on previous conversations", first.split("<user_memories>")[1])
+
+        without_profile = agent._build_memory_message(
+            {"profile": {"static": [], "dynamic": ["Packing bags"]}, "search_results": []}
+        )
+        self.assertTrue(without_profile.startswith("<user_memories>\nBased on previous conversations"))
+
+        prompt = "You are a helpful assistant."
+        self.assertEqual(INJECTED_CONTEXT_PATTERN.sub("", f"{prompt}\n\n{first}"), prompt)
+        self.assertEqual(INJECTED_CONTEXT_PATTERN.sub("", f"{first}\n\n{prompt}"), prompt)
+
+
+class TestMemoryTokenBudget(unittest.TestCase):
+    def test_budget_covers_injected_context(self) -> None:
+        memories = {
+            "profile": {
+                "static": ["Likes tea", "Lives in Oslo", "Works as a nurse"],
+                "dynamic": ["Planning a trip to Rome"],
+            },
+            "search_results": [
+                {"memory": "Asked about train tickets", "similarity": 0.9},
+                {"memory": "Prefers window seats", "similarity": 0.5},
+            ],
+        }
+        budget = 60
+
+        for placement in ("prepend", "cache_friendly"):
+            agent = SupermemoryCartesiaAgent(
+                agent=SimpleNamespace(),
+                api_key="mock_key",
+                container_tag="user-123",
+                custom_id="conversation-456",
+                config=SupermemoryCartesiaAgent.MemoryConfig(
+                    max_memory_tokens=budget, placement=placement
+                ),
+            )
+
+            context = agent._build_memory_message(memories)
+
+            self.assertIn("Likes tea", context)
+            self.assertNotIn("Prefers window seats", context)
+            self.assertLessEqual(estimate_tokens(context), budget)
+            self.assertEqual(agent.memory_tokens_injected, estimate_tokens(context))
+            self.assertGreater(agent.memory_tokens_dropped, 0)
+
+
+class TestBasePrompt(unittest.TestCase):
+    def test_prompt_is_composed_from_pristine_base(self) -> None:
+        inner = SimpleNamespace(config=SimpleNamespace(system_prompt="You are helpful."))
+        agent = SupermemoryCartesiaAgent(
+            agent=inner,
+            api_key="mock_key",
+            container_tag="user-123",
+            custom_id="conversation-456",
+        )
+
+        inner.config.system_prompt = agent._compose_system_prompt("<user_memories>\nA\n</user_memories>")
+        inner.config.system_prompt = agent._compose_system_prompt("<user_memories>\nB\n</user_memories>")
+        self.assertEqual(inner.config.system_prompt, "<user_memories>\nB\n</user_memories>\n\nYou are helpful.")
+
+        inner.config.system_prompt = agent._compose_system_prompt(None)
+        self.assertEqual(inner.config.system_prompt, "You are helpful.")
+
+        inner.config.system_prompt = "Be brief."
+        self.assertEqual(agent._compose_system_prompt("<user_memories>\nC\n</user_memories>").split("\n\n")[-1], "Be brief.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import unittest
+from unittest.mock import patch
+
+from supermemory_cartesia.cache import QueryResultCache, normalize_query
+
+
+def _embed(text: str) -> list[float]:
+    # Bag-of-keywords embedding, good enough to tell related queries apart
+    vocabulary = ["favorite", "favourite", "language", "like", "best", "weather"]
+    words = text.split()
+    return [float(word in words) for word in vocabulary] + [1.0]
+
+
+class TestQueryResultCache(unittest.TestCase):
+    def test_normalized_query_hit(self) -> None:
+        cache = QueryResultCache()
+        cache.set("user-1", "What's my favorite language?", {"search_results": ["Python"]})
+
+        self.assertEqual(
+            normalize_query("  what's MY favorite language "), "what s my favorite language"
+        )
+        self.assertEqual(
+            cache.get("user-1", "what's my favorite   language"),
+            {"search_results": ["Python"]},
+        )
+        self.assertIsNone(cache.get("user-2", "What's my favorite language?"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_entries_expire_and_evict(self) -> None:
+        cache = QueryResultCache(ttl=60, max_entries=2)
+        cache.set("user-1", "a", 1)
+        cache.set("user-1", "b", 2)
+        cache.set("user-1", "c", 3)
+        self.assertIsNone(cache.get("user-1", "a"))
+        self.assertEqual(cache.get("user-1", "c"), 3)
+
+        with patch("supermemory_cartesia.cache.time.monotonic", return_value=1e12):
+            self.assertIsNone(cache.get("user-1", "c"))
+
+    def test_semantic_hit_with_embedder(self) -> None:
+        cache = QueryResultCache(embedder=_embed, similarity_threshold=0.7)
+        cache.set("user-1", "what is my favorite language", "Python")
+
+        self.assertEqual(
+            cache.get("user-1", "which language do I like best, my favorite"), "Python"
+        )
+        self.assertIsNone(cache.get("user-1", "what is the weather"))
+        self.assertEqual(cache.semantic_hits, 1)
+
+        cache.invalidate("user-1")
+        self.assertEqual(len(cache), 0)
+
+    def test_settings_are_part_of_the_key(self) -> None:
+        cache = QueryResultCache(embedder=_embed, similarity_threshold=0.7)
+        cache.set("user-1", "what is my favorite language", ["Python"], (1, 0.5))
+
+        self.assertIsNone(cache.get("user-1", "what is my favorite language", (10, 0.1)))
+        self.assertIsNone(
+            cache.get("user-1", "which language do I like best, my favorite", (10, 0.1))
+        )
+        self.assertEqual(cache.get("user-1", "what is my favorite language", (1, 0.5)), ["Python"])
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from tests.test_empty_profile import _install_test_stubs
+
+_install_test_stubs()
+
+from supermemory_cartesia.agent import SupermemoryCartesiaAgent
+
+
+def _response(fact: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        profile=SimpleNamespace(static=[fact], dynamic=[]),
+        search_results=None,
+    )
+
+
+class _SlowClient:
+    def __init__(self) -> None:
+        self.delays = []
+        self.calls = []
+
+    async def profile(self, **kwargs):
+        self.calls.append(kwargs.get("q"))
+        await asyncio.sleep(self.delays.pop(0) if self.delays else 0)
+        return _response(f"fact for {kwargs.get('q')}")
+
+
+def _agent(**config) -> SupermemoryCartesiaAgent:
+    settings = dict(
+        search_limit=10,
+        search_threshold=0.1,
+        system_prompt="Based on previous conversations:\n\n",
+        mode="full",
+        max_memory_tokens=None,
+        placement="prepend",
+        retrieval_timeout_ms=50,
+        prefetch=False,
+    )
+    settings.update(config)
+    agent = SupermemoryCartesiaAgent(
+        agent=SimpleNamespace(),
+        api_key="mock_key",
+        container_tag="user-123",
+        custom_id="conversation-456",
+        config=SupermemoryCartesiaAgent.MemoryConfig(**settings),
+    )
+    agent._supermemory_client = _SlowClient()
+    return agent
+
+
+class UserTurnStarted(SimpleNamespace):
+    pass
+
+
+class UserTranscriptionReceived(SimpleNamespace):
+    pass
+
+
+class _InnerAgent:
+    async def process(self, env, event, **kwargs):
+        yield "ok"
+
+
+class TestRetrievalDeadline(unittest.IsolatedAsyncioTestCase):
+    async def test_slow_retrieval_reuses_last_memories(self) -> None:
+        agent = _agent()
+        client = agent._supermemory_client
+        session = agent._session(None)
+
+        first = await agent._retrieve_within_deadline(session, "first")
+        self.assertEqual(first["profile"]["static"], ["fact for first"])
+
+        client.delays = [0.2]
+        second = await agent._retrieve_within_deadline(session, "second")
+        self.assertIs(second, first)
+        self.assertEqual(agent.retrieval_timeouts, 1)
+
+        await asyncio.gather(*agent._background_tasks)
+        self.assertEqual(session.last_memories_data["profile"]["static"], ["fact for second"])
+
+    async def test_no_deadline_waits_for_retrieval(self) -> None:
+        agent = _agent(retrieval_timeout_ms=None)
+        agent._supermemory_client.delays = [0.1]
+
+        result = await agent._retrieve_within_deadline(agent._session(None), "first")
+
+        self.assertEqual(result["profile"]["static"], ["fact for first"])
+        self.assertEqual(agent.retrieval_timeouts, 0)
+
+    async def test_prefetch_is_used_for_matching_query(self) -> None:
+        agent = _agent(prefetch=True)
+        client = agent._supermemory_client
+        session = agent._session(None)
+
+        agent._start_prefetch(session, "What's my name?")
+        memories = await agent._retrieve_within_deadline(session, "what's my  name")
+
+        self.assertEqual(client.calls, ["What's my name?"])
+        self.assertEqual(memories["profile"]["static"], ["fact for What's my name?"])
+
+        agent._start_prefetch(session, "something else")
+        await agent._retrieve_within_deadline(session, "a different question")
+        self.assertEqual(client.calls[-1], "a different question")
+
+    async def test_partial_transcript_burst_prefetches_once(self) -> None:
+        agent = _agent(prefetch=True, prefetch_stable_ms=30)
+        agent.agent = _InnerAgent()
+        client = agent._supermemory_client
+
+        [out async for out in agent.process(None, UserTurnStarted())]
+        for partial in ("What", "What is", "What is my", "What is my name?"):
+            event = UserTranscriptionReceived(content=partial)
+            [out async for out in agent.process(None, event)]
+            await asyncio.sleep(0.005)
+
+        # No request yet: UserTurnStarted carries no text, partials are still settling
+        self.assertEqual(client.calls, [])
+        await asyncio.sleep(0.08)
+        self.assertEqual(client.calls, ["What is my name?"])
+
+
+if __name__ == "__main__":
+    unittest.main()
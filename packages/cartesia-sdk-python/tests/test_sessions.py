@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from tests.test_empty_profile import _install_test_stubs
+
+_install_test_stubs()
+
+from supermemory_cartesia.agent import SupermemoryCartesiaAgent
+from supermemory_cartesia.exceptions import ConfigurationError
+
+
+class UserTurnEnded(SimpleNamespace):
+    pass
+
+
+class CallEnded(SimpleNamespace):
+    pass
+
+
+class _InnerAgent:
+    def __init__(self) -> None:
+        self.contexts = []
+
+    async def process(self, env, event, *, context=None):
+        self.contexts.append(context)
+        yield "ok"
+
+
+class _Client:
+    def __init__(self) -> None:
+        self.added = []
+
+    async def profile(self, **kwargs):
+        return SimpleNamespace(
+            profile=SimpleNamespace(static=[f"likes {kwargs['q']}"], dynamic=[]),
+            search_results=None,
+        )
+
+    async def add(self, **kwargs):
+        self.added.append(kwargs)
+        return None
+
+
+def _env(call_id: str = "") -> SimpleNamespace:
+    return SimpleNamespace(agent_env=SimpleNamespace(), call_id=call_id)
+
+
+async def _drain(outputs) -> list:
+    return [out async for out in outputs]
+
+
+class TestCallSessions(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_keep_separate_state(self) -> None:
+        inner = _InnerAgent()
+        agent = SupermemoryCartesiaAgent(
+            agent=inner,
+            api_key="mock_key",
+            container_tag="user-123",
+            custom_id="conversation-456",
+            add_memory="never",
+        )
+        agent._supermemory_client = _Client()
+        call_a, call_b = _env(), _env()
+
+        for env, text in ((call_a, "tea"), (call_b, "tea"), (call_a, "coffee")):
+            outputs = [out async for out in agent.process(env, UserTurnEnded(content=text))]
+            self.assertEqual(outputs, ["ok"])
+
+        self.assertIn("likes tea", inner.contexts[0])
+        # Same text on another call is not mistaken for a repeated query
+        self.assertIn("likes tea", inner.contexts[1])
+        self.assertIn("likes coffee", inner.contexts[2])
+        self.assertEqual(len(agent._sessions), 2)
+
+        [out async for out in agent.process(call_a, CallEnded())]
+        self.assertEqual(len(agent._sessions), 1)
+
+    async def test_calls_store_under_custom_id_by_default(self) -> None:
+        agent = SupermemoryCartesiaAgent(
+            agent=_InnerAgent(),
+            api_key="mock_key",
+            container_tag="user-123",
+            custom_id="conversation-456",
+        )
+        client = agent._supermemory_client = _Client()
+
+        await _drain(agent.process(_env(), UserTurnEnded(content="a1")))
+        await _drain(agent.process(_env(), UserTurnEnded(content="b1")))
+        await asyncio.gather(*agent._background_tasks)
+
+        self.assertEqual(
+            [kwargs["custom_id"] for kwargs in client.added],
+            ["conversation-456", "conversation-456"],
+        )
+
+    async def test_concurrent_calls_store_separate_documents(self) -> None:
+        agent = SupermemoryCartesiaAgent(
+            agent=_InnerAgent(),
+            api_key="mock_key",
+            container_tag="user-123",
+            custom_id="conversation-456",
+            call_id=lambda env: env.call_id,
+        )
+        client = agent._supermemory_client = _Client()
+        call_a, call_b = _env("call-a"), _env("call-b")
+
+        turns = ((call_a, "a1"), (call_b, "b1"), (call_a, "a2"), (call_b, "b2"))
+        await asyncio.gather(
+            *[
+                _drain(agent.process(env, UserTurnEnded(content=text)))
+                for env, text in turns
+            ]
+        )
+        await asyncio.gather(*agent._background_tasks)
+
+        documents = {}
+        for kwargs in client.added:
+            documents.setdefault(kwargs["custom_id"], []).append(kwargs["content"])
+
+        self.assertEqual(
+            {key: sorted(contents) for key, contents in documents.items()},
+            {
+                "conversation-456:call-a": ["User: a1", "User: a2"],
+                "conversation-456:call-b": ["User: b1", "User: b2"],
+            },
+        )
+
+    async def test_prompt_rewriting_agent_refuses_concurrent_calls(self) -> None:
+        class _ConfigAgent:
+            config = SimpleNamespace(system_prompt="You are helpful.")
+
+            async def process(self, env, event):
+                yield "ok"
+
+        agent = SupermemoryCartesiaAgent(
+            agent=_ConfigAgent(),
+            api_key="mock_key",
+            container_tag="user-123",
+            custom_id="conversation-456",
+            add_memory="never",
+        )
+        agent._supermemory_client = _Client()
+        call_a, call_b = _env(), _env()
+
+        await _drain(agent.process(call_a, UserTurnEnded(content="tea")))
+        with self.assertRaises(ConfigurationError):
+            await _drain(agent.process(call_b, UserTurnEnded(content="tea")))
+
+        await _drain(agent.process(call_a, CallEnded()))
+        self.assertEqual(await _drain(agent.process(call_b, UserTurnEnded(content="tea"))), ["ok"])
+
+    def test_session_table_is_bounded(self) -> None:
+        agent = SupermemoryCartesiaAgent(
+            agent=_InnerAgent(),
+            api_key="mock_key",
+            container_tag="user-123",
+            custom_id="conversation-456",
+            max_sessions=2,
+            session_ttl=60,
+        )
+        calls = [_env() for _ in range(3)]
+        first = agent._session(calls[0])
+        agent._session(calls[1])
+        agent._session(calls[2])
+
+        self.assertEqual(len(agent._sessions), 2)
+        self.assertIsNot(agent._session(calls[0]), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
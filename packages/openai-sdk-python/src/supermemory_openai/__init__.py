@@ -12,6 +12,8 @@ from .tools import (
     create_supermemory_tools,
     get_memory_tool_definitions,
     execute_memory_tool_calls,
+    MemoryToolExecutor,
+    get_tool_executor,
     create_search_memories_tool,
     create_add_memory_tool,
 )
@@ -19,9 +21,19 @@ from .tools import (
 from .middleware import (
     with_supermemory,
     OpenAIMiddlewareOptions,
+    CompletionTimings,
+    MemoryBlocks,
     SupermemoryOpenAIWrapper,
 )
 
+from .cache import ProfileCache, QueryResultCache, normalize_query
+
+from .batching import BatchWriter
+
+from .transport import SupermemoryHTTPTransport
+
+from .client_pool import SupermemoryClientPool, get_client_pool
+
 from .utils import (
     Logger,
     create_logger,
@@ -30,6 +42,9 @@ from .utils import (
     convert_profile_to_markdown,
     deduplicate_memories,
     DeduplicatedMemories,
+    estimate_tokens,
+    limit_memories_to_token_budget,
+    rank_search_results,
 )
 
 from .exceptions import (
@@ -54,12 +69,25 @@ __all__ = [
     "create_supermemory_tools",
     "get_memory_tool_definitions",
     "execute_memory_tool_calls",
+    "MemoryToolExecutor",
+    "get_tool_executor",
     "create_search_memories_tool",
     "create_add_memory_tool",
     # Middleware
     "with_supermemory",
     "OpenAIMiddlewareOptions",
+    "CompletionTimings",
+    "MemoryBlocks",
     "SupermemoryOpenAIWrapper",
+    # Caching
+    "ProfileCache",
+    "QueryResultCache",
+    "normalize_query",
+    # Batching
+    "BatchWriter",
+    "SupermemoryHTTPTransport",
+    "SupermemoryClientPool",
+    "get_client_pool",
     # Utils
     "Logger",
     "create_logger",
@@ -68,6 +96,9 @@ __all__ = [
     "convert_profile_to_markdown",
     "deduplicate_memories",
     "DeduplicatedMemories",
+    "estimate_tokens",
+    "limit_memories_to_token_budget",
+    "rank_search_results",
     # Exceptions
     "SupermemoryError",
     "SupermemoryConfigurationError",
@@ -0,0 +1,174 @@
+"""Background execution helpers for the sync OpenAI client path."""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Literal, Optional
+
+
+class BackgroundEventLoop:
+    """A long-lived event loop running on a dedicated daemon thread.
+
+    Sync callers submit coroutines with ``run_coroutine_threadsafe``, so pooled
+    HTTP sessions and other loop-bound state survive across calls instead of
+    being rebuilt by ``asyncio.run()`` every time.
+    """
+
+    def __init__(self, name: str = "supermemory-loop"):
+        self._name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The background loop, started on first access."""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run_loop() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(
+                    target=run_loop, name=self._name, daemon=True
+                )
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the background loop has been started and not stopped."""
+        return self._loop is not None and not self._loop.is_closed()
+
+    def submit(
+        self, coro: Coroutine[Any, Any, Any]
+    ) -> "concurrent.futures.Future[Any]":
+        """Schedule a coroutine on the background loop without waiting for it."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(
+        self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None
+    ) -> Any:
+        """Run a coroutine on the background loop and block until it finishes.
+
+        Raises:
+            RuntimeError: If called from the background loop's own thread
+            concurrent.futures.TimeoutError: If the coroutine exceeds the timeout
+        """
+        if self._thread is not None and threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(
+                "Cannot block on the background loop from its own thread"
+            )
+        return self.submit(coro).result(timeout)
+
+    def stop(
+        self,
+        cleanup: Optional[Coroutine[Any, Any, Any]] = None,
+        timeout: Optional[float] = 5.0,
+    ) -> None:
+        """Stop the loop and join its thread, running an optional cleanup first."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+
+        if loop is None or loop.is_closed():
+            if cleanup is not None:
+                cleanup.close()
+            return
+
+        if cleanup is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(cleanup, loop).result(timeout)
+            except Exception:
+                # Shutdown must not fail because a session could not be closed
+                pass
+
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+
+class BackgroundWriteQueue:
+    """Bounded queue of fire-and-forget writes executed on a background loop.
+
+    At most ``max_pending`` writes are in flight. When the queue is full, new
+    writes either wait for a free slot (``on_full="block"``, backpressure) or
+    are discarded (``on_full="drop"``).
+    """
+
+    def __init__(
+        self,
+        loop: BackgroundEventLoop,
+        max_pending: int = 100,
+        on_full: Literal["block", "drop"] = "block",
+    ):
+        self._loop = loop
+        self._on_full = on_full
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._pending: set["concurrent.futures.Future[Any]"] = set()
+        self._lock = threading.Lock()
+        self.dropped_count: int = 0
+
+    @property
+    def pending_count(self) -> int:
+        """Number of writes that have been submitted but not finished."""
+        with self._lock:
+            return len(self._pending)
+
+    def submit(
+        self, coro: Coroutine[Any, Any, Any]
+    ) -> Optional["concurrent.futures.Future[Any]"]:
+        """Queue a write without waiting for it to finish.
+
+        Returns:
+            The write's future, or None if it was dropped because the queue is full
+        """
+        if not self._slots.acquire(blocking=self._on_full == "block"):
+            coro.close()
+            with self._lock:
+                self.dropped_count += 1
+            return None
+
+        try:
+            future = self._loop.submit(coro)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for all queued writes to finish.
+
+        Returns:
+            True if every write finished within the timeout
+        """
+        with self._lock:
+            pending = list(self._pending)
+        if not pending:
+            return True
+        _, not_done = concurrent.futures.wait(pending, timeout=timeout)
+        return not not_done
+
+    def cancel_pending(self) -> int:
+        """Cancel writes that are still in flight and return how many were cancelled."""
+        with self._lock:
+            pending = list(self._pending)
+        return sum(1 for future in pending if future.cancel())
+
+    def _on_done(self, future: "concurrent.futures.Future[Any]") -> None:
+        with self._lock:
+            self._pending.discard(future)
+        self._slots.release()
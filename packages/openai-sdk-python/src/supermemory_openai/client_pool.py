@@ -0,0 +1,193 @@
+"""Process-wide pool of Supermemory API clients shared across wrapper instances."""
+
+import asyncio
+import importlib.util
+import threading
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+from .transport import SupermemoryHTTPTransport
+
+
+class SupermemoryClientPool:
+    """Reference-counted registry of ``AsyncSupermemory`` clients and transports.
+
+    Clients are keyed by ``(api_key, base_url, running event loop)``, so
+    wrappers created per call or per session share one client and one httpx
+    connection pool instead of each opening its own connections and TLS
+    sessions. httpx connections are bound to the loop that opened them, so each
+    loop gets its own client, and clients of loops that have since closed are
+    dropped. HTTP/2 is used when the ``h2`` package is installed. The client is
+    closed when its last user releases it.
+
+    The middleware's ``SupermemoryHTTPTransport`` is pooled the same way, keyed
+    by its endpoint and limits; it already keeps one session per event loop.
+
+    The pool is shared by the wrappers of this package only; every Supermemory
+    integration package keeps its own pool.
+
+    Example:
+        ```python
+        pool = get_client_pool()
+        client = pool.acquire(api_key="...")
+        try:
+            await client.profile(container_tag="user-123")
+        finally:
+            await pool.release(client)
+        ```
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        http2: Optional[bool] = None,
+    ):
+        """Initialize the pool.
+
+        Args:
+            max_connections: Maximum open connections per shared client.
+            max_keepalive_connections: Maximum idle connections kept per shared client.
+            http2: Use HTTP/2. Defaults to whether the ``h2`` package is installed.
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.http2 = (
+            importlib.util.find_spec("h2") is not None if http2 is None else http2
+        )
+
+        # (api_key, base_url, loop) -> [client, httpx client, reference count]
+        self._clients: Dict[
+            Tuple[str, Optional[str], Optional[asyncio.AbstractEventLoop]], List[Any]
+        ] = {}
+        # transport settings -> [transport, reference count]
+        self._transports: Dict[Tuple[Any, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def acquire(self, api_key: str, base_url: Optional[str] = None) -> Any:
+        """Return the shared client for this API key and endpoint.
+
+        The client belongs to the running event loop. Called outside a loop, it
+        is shared with other callers outside a loop and binds to the first loop
+        that uses it. Every call must be paired with a ``release`` of the
+        returned client.
+
+        Raises:
+            ImportError: If the supermemory package is not installed.
+        """
+        import httpx
+        import supermemory
+
+        try:
+            loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        key = (api_key, base_url, loop)
+        with self._lock:
+            # A closed loop can no longer close its clients; drop them instead
+            for stale in [
+                k for k in self._clients if k[2] is not None and k[2].is_closed()
+            ]:
+                del self._clients[stale]
+
+            entry = self._clients.get(key)
+            if entry is None:
+                http_client = supermemory.DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_keepalive_connections,
+                    ),
+                    http2=self.http2,
+                )
+                client = supermemory.AsyncSupermemory(
+                    api_key=api_key,
+                    base_url=base_url,
+                    http_client=http_client,
+                )
+                entry = self._clients[key] = [client, http_client, 0]
+            entry[2] += 1
+            return entry[0]
+
+    async def release(self, client: Any) -> None:
+        """Drop one reference to ``client``, closing it after the last one."""
+        with self._lock:
+            for key, entry in self._clients.items():
+                if entry[0] is client:
+                    entry[2] -= 1
+                    if entry[2] > 0:
+                        return
+                    del self._clients[key]
+                    break
+            else:
+                return
+        if key[2] is not None and key[2].is_closed():
+            return
+        await client.close()
+        # Not every SDK version closes an HTTP client it was given
+        await entry[1].aclose()
+
+    def acquire_transport(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        timeout: float = 30.0,
+        max_connections: int = 100,
+        max_connections_per_host: int = 10,
+    ) -> SupermemoryHTTPTransport:
+        """Return the shared HTTP transport for these settings.
+
+        Every call must be paired with ``release_transport`` or
+        ``arelease_transport``.
+        """
+        key = (api_key, base_url, timeout, max_connections, max_connections_per_host)
+        with self._lock:
+            entry = self._transports.get(key)
+            if entry is None:
+                transport = SupermemoryHTTPTransport(
+                    api_key=api_key,
+                    base_url=base_url,
+                    timeout=timeout,
+                    max_connections=max_connections,
+                    max_connections_per_host=max_connections_per_host,
+                )
+                entry = self._transports[key] = [transport, 0]
+            entry[1] += 1
+            return cast(SupermemoryHTTPTransport, entry[0])
+
+    def release_transport(self, transport: SupermemoryHTTPTransport) -> None:
+        """Drop one reference to ``transport``, closing it after the last one."""
+        if self._drop_transport(transport):
+            transport.close()
+
+    async def arelease_transport(self, transport: SupermemoryHTTPTransport) -> None:
+        """Async ``release_transport`` that also closes the running loop's session."""
+        if self._drop_transport(transport):
+            await transport.aclose()
+
+    def _drop_transport(self, transport: SupermemoryHTTPTransport) -> bool:
+        with self._lock:
+            for key, entry in self._transports.items():
+                if entry[0] is transport:
+                    entry[1] -= 1
+                    if entry[1] > 0:
+                        return False
+                    del self._transports[key]
+                    return True
+        return False
+
+
+_default_pool: Optional[SupermemoryClientPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> SupermemoryClientPool:
+    """Return the process-wide client pool used by default."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SupermemoryClientPool()
+        return _default_pool
@@ -1,18 +1,24 @@
 """Supermemory middleware for OpenAI clients."""
 
 import asyncio
+import functools
 import inspect
 import os
+import threading
+import time
 from dataclasses import dataclass
-from typing import Any, Literal, Optional, Union, cast
+from typing import Any, Callable, Coroutine, Literal, NamedTuple, Optional, Union, cast
 
-import supermemory
 from openai import AsyncOpenAI, OpenAI
 from openai.types.chat import (
     ChatCompletionMessageParam,
     ChatCompletionSystemMessageParam,
 )
 
+from .background import BackgroundEventLoop, BackgroundWriteQueue
+from .batching import BatchWriter
+from .cache import ProfileCache, QueryResultCache
+from .client_pool import SupermemoryClientPool, get_client_pool
 from .exceptions import (
     SupermemoryAPIError,
     SupermemoryConfigurationError,
@@ -20,13 +26,18 @@ from .exceptions import (
     SupermemoryNetworkError,
 )
 from .utils import (
+    DeduplicatedMemories,
     Logger,
     convert_profile_to_markdown,
     create_logger,
     deduplicate_memories,
+    estimate_tokens,
     get_conversation_content,
     get_last_user_message,
+    limit_memories_to_token_budget,
+    rank_search_results,
 )
+from .transport import SupermemoryHTTPTransport
 
 
 @dataclass
@@ -38,6 +49,43 @@ class OpenAIMiddlewareOptions:
     verbose: bool = False
     mode: Literal["profile", "query", "full"] = "profile"
     add_memory: Literal["always", "never"] = "always"
+    api_key: Optional[str] = None  # Defaults to the SUPERMEMORY_API_KEY env var
+    base_url: Optional[str] = None  # Defaults to https://api.supermemory.ai
+    timeout: float = 30.0  # Per-request timeout for Supermemory calls, in seconds
+    max_connections: int = 100  # Keep-alive pool size for Supermemory API calls
+    max_connections_per_host: int = 10
+    # Sync clients: bounded queue for fire-and-forget memory writes
+    sync_write_queue_size: int = 100
+    sync_write_on_full: Literal["block", "drop"] = "block"
+    sync_write_flush_timeout: float = 5.0
+    # Latency budget for memory retrieval; None waits for the search to finish
+    retrieval_timeout_ms: Optional[int] = None
+    on_timings: Optional[Callable[["CompletionTimings"], None]] = None
+    # Cache for query-less profile lookups; can be shared between wrappers
+    profile_cache: Optional[ProfileCache] = None
+    # Cache for query searches (mode="query"/"full"), optionally semantic
+    query_cache: Optional[QueryResultCache] = None
+    # Shared writer that uploads memory writes in batches instead of one by one
+    batch_writer: Optional[BatchWriter] = None
+    # Estimated token cap for injected memories; None injects everything
+    max_memory_tokens: Optional[int] = None
+    # "system" appends memories to the system prompt; "cache_friendly" leaves it
+    # untouched so the provider's prompt prefix cache survives memory changes
+    memory_placement: Literal["system", "cache_friendly"] = "system"
+    # Pool the HTTP transport is shared from; defaults to the process-wide pool
+    client_pool: Optional[SupermemoryClientPool] = None
+
+
+@dataclass
+class CompletionTimings:
+    """Per-call timing of the memory retrieval and LLM stages, in milliseconds."""
+
+    retrieval_ms: Optional[float] = None  # None when retrieval was skipped
+    llm_ms: Optional[float] = None
+    retrieval_timed_out: bool = False
+    # Estimated tokens of injected memories, and of memories cut by max_memory_tokens
+    memory_tokens: Optional[int] = None
+    memory_tokens_dropped: int = 0
 
 
 class SupermemoryProfileSearch:
@@ -48,79 +96,193 @@ class SupermemoryProfileSearch:
         self.search_results: dict[str, Any] = data.get("searchResults", {})
 
 
+class SupermemoryAddResponse:
+    """Type for Supermemory memory add response."""
+
+    def __init__(self, data: dict[str, Any]):
+        self.id: Optional[str] = data.get("id")
+        self.status: Optional[str] = data.get("status")
+
+
 async def supermemory_profile_search(
     container_tag: str,
     query_text: str,
     api_key: str,
+    transport: Optional[SupermemoryHTTPTransport] = None,
 ) -> SupermemoryProfileSearch:
-    """Search for memories using the SuperMemory profile API."""
+    """Search for memories using the SuperMemory profile API.
+
+    When a transport is given, its pooled keep-alive sessions are reused instead
+    of opening a new connection for every search.
+    """
     payload = {
         "containerTag": container_tag,
     }
     if query_text:
         payload["q"] = query_text
 
+    owns_transport = transport is None
+    if transport is None:
+        transport = SupermemoryHTTPTransport(api_key=api_key)
+
     try:
-        import aiohttp
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "https://api.supermemory.ai/v4/profile",
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {api_key}",
-                },
-                json=payload,
-            ) as response:
-                if not response.ok:
-                    error_text = await response.text()
-                    raise SupermemoryAPIError(
-                        "Supermemory profile search failed",
-                        status_code=response.status,
-                        response_text=error_text,
-                    )
+        data = await transport.post(
+            "/v4/profile",
+            payload,
+            api_key=api_key,
+            error_message="Supermemory profile search failed",
+        )
+    finally:
+        if owns_transport:
+            await transport.aclose()
 
-                data = await response.json()
-                return SupermemoryProfileSearch(data)
+    return SupermemoryProfileSearch(data)
 
-    except ImportError:
-        # Fallback to requests if aiohttp not available
-        import requests
 
-        response = requests.post(
-            "https://api.supermemory.ai/v4/profile",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}",
-            },
-            json=payload,
-        )
+class MemoryBlocks(NamedTuple):
+    """Formatted memories, split by how often they change."""
 
-        if not response.ok:
-            raise SupermemoryAPIError(
-                "Supermemory profile search failed",
-                status_code=response.status_code,
-                response_text=response.text,
-            )
+    static: str = ""  # Static profile, stable across turns
+    dynamic: str = ""  # Dynamic profile
+    search: str = ""  # Search results for the latest message
 
-        return SupermemoryProfileSearch(response.json())
+    @property
+    def stable(self) -> str:
+        """Memories that rarely change between turns."""
+        return self.static
 
+    @property
+    def volatile(self) -> str:
+        """Memories that may change on every turn."""
+        return "\n\n".join(part for part in (self.dynamic, self.search) if part)
 
-async def add_system_prompt(
+    @property
+    def text(self) -> str:
+        """All memories as one block."""
+        profile_data = "\n\n".join(part for part in (self.static, self.dynamic) if part)
+        return f"{profile_data}\n{self.search}".strip()
+
+
+def render_memory_blocks(
+    memories: DeduplicatedMemories,
+    mode: Literal["profile", "query", "full"],
+    sort_profile: bool = False,
+) -> MemoryBlocks:
+    """Format deduplicated memories into the blocks injected for ``mode``."""
+    static_data = ""
+    dynamic_data = ""
+    if mode != "query":
+        static = memories.static
+        dynamic = memories.dynamic
+        if sort_profile:
+            static, dynamic = sorted(static), sorted(dynamic)
+        static_data = convert_profile_to_markdown({"profile": {"static": static}})
+        dynamic_data = convert_profile_to_markdown({"profile": {"dynamic": dynamic}})
+
+    search_results_memories = ""
+    if mode != "profile" and memories.search_results:
+        search_results_memories = (
+            "Search results for user's recent message: \n"
+            + "\n".join(f"- {memory}" for memory in memories.search_results)
+        )
+
+    return MemoryBlocks(static_data, dynamic_data, search_results_memories)
+
+
+async def build_memories_text(
     messages: list[ChatCompletionMessageParam],
     container_tag: str,
     logger: Logger,
     mode: Literal["profile", "query", "full"],
     api_key: str,
-) -> list[ChatCompletionMessageParam]:
-    """Add memory-enhanced system prompts to chat completion messages."""
-    system_prompt_exists = any(msg.get("role") == "system" for msg in messages)
+    transport: Optional[SupermemoryHTTPTransport] = None,
+    profile_cache: Optional[ProfileCache] = None,
+    query_cache: Optional[QueryResultCache] = None,
+    max_memory_tokens: Optional[int] = None,
+    timings: Optional[CompletionTimings] = None,
+) -> str:
+    """Search Supermemory and format the memories to inject for these messages.
+
+    See ``build_memory_blocks`` for the parameters.
+    """
+    blocks = await build_memory_blocks(
+        messages,
+        container_tag,
+        logger,
+        mode,
+        api_key,
+        transport=transport,
+        profile_cache=profile_cache,
+        query_cache=query_cache,
+        max_memory_tokens=max_memory_tokens,
+        timings=timings,
+    )
+    return blocks.text
 
+
+async def build_memory_blocks(
+    messages: list[ChatCompletionMessageParam],
+    container_tag: str,
+    logger: Logger,
+    mode: Literal["profile", "query", "full"],
+    api_key: str,
+    transport: Optional[SupermemoryHTTPTransport] = None,
+    profile_cache: Optional[ProfileCache] = None,
+    query_cache: Optional[QueryResultCache] = None,
+    max_memory_tokens: Optional[int] = None,
+    timings: Optional[CompletionTimings] = None,
+    sort_profile: bool = False,
+) -> MemoryBlocks:
+    """Search Supermemory and format the memories to inject, split into blocks.
+
+    Profile lookups without a query are served from ``profile_cache`` and
+    searches with a query from ``query_cache``, when given. With
+    ``max_memory_tokens``, lower-priority memories beyond the estimated token
+    budget are dropped; token counts are recorded on ``timings`` when given.
+    With ``sort_profile``, profile facts are sorted so an unchanged profile
+    always renders to the same bytes.
+    """
     query_text = get_last_user_message(messages) if mode != "profile" else ""
 
-    memories_response = await supermemory_profile_search(
-        container_tag, query_text, api_key
-    )
+    memories_response: Optional[SupermemoryProfileSearch] = None
+    # Read before searching, so results that raced with a write are not cached
+    cache_version: Optional[int] = None
+    if profile_cache is not None and not query_text:
+        cache_version = profile_cache.version(container_tag)
+        memories_response = profile_cache.get(container_tag)
+        logger.debug(
+            "Profile cache lookup",
+            {
+                "container_tag": container_tag,
+                "hit": memories_response is not None,
+                "hits": profile_cache.hits,
+                "misses": profile_cache.misses,
+            },
+        )
+    elif query_cache is not None and query_text:
+        cache_version = query_cache.version(container_tag)
+        memories_response = query_cache.get(container_tag, query_text)
+        logger.debug(
+            "Query cache lookup",
+            {
+                "container_tag": container_tag,
+                "hit": memories_response is not None,
+                "hits": query_cache.hits,
+                "semantic_hits": query_cache.semantic_hits,
+                "misses": query_cache.misses,
+            },
+        )
+
+    if memories_response is None:
+        memories_response = await supermemory_profile_search(
+            container_tag, query_text, api_key, transport=transport
+        )
+        if profile_cache is not None and not query_text:
+            profile_cache.set(container_tag, memories_response, version=cache_version)
+        elif query_cache is not None and query_text:
+            query_cache.set(
+                container_tag, query_text, memories_response, version=cache_version
+            )
 
     profile = memories_response.profile or {}
     search_results_data = memories_response.search_results or {}
@@ -139,10 +301,15 @@ async def add_system_prompt(
         },
     )
 
+    search_results = search_results_data.get("results", [])
     deduplicated = deduplicate_memories(
         static=profile.get("static", []),
         dynamic=profile.get("dynamic", []),
-        search_results=search_results_data.get("results", []),
+        search_results=(
+            rank_search_results(search_results)
+            if max_memory_tokens is not None
+            else search_results
+        ),
     )
 
     logger.debug(
@@ -163,26 +330,35 @@ async def add_system_prompt(
         },
     )
 
-    profile_data = ""
-    if mode != "query":
-        profile_data = convert_profile_to_markdown(
+    def render(memories: DeduplicatedMemories) -> str:
+        return render_memory_blocks(memories, mode, sort_profile).text
+
+    dropped_tokens = 0
+    if max_memory_tokens is not None:
+        deduplicated, kept_tokens, dropped_tokens = limit_memories_to_token_budget(
+            DeduplicatedMemories(
+                static=deduplicated.static if mode != "query" else [],
+                dynamic=deduplicated.dynamic if mode != "query" else [],
+                search_results=deduplicated.search_results if mode != "profile" else [],
+            ),
+            max_memory_tokens,
+            render=render,
+        )
+        logger.debug(
+            "Memory token budget applied",
             {
-                "profile": {
-                    "static": deduplicated.static,
-                    "dynamic": deduplicated.dynamic,
-                },
-                "searchResults": {"results": []},
-            }
+                "max_memory_tokens": max_memory_tokens,
+                "kept_tokens": kept_tokens,
+                "dropped_tokens": dropped_tokens,
+            },
         )
 
-    search_results_memories = ""
-    if mode != "profile" and deduplicated.search_results:
-        search_results_memories = (
-            "Search results for user's recent message: \n"
-            + "\n".join(f"- {memory}" for memory in deduplicated.search_results)
-        )
+    blocks = render_memory_blocks(deduplicated, mode, sort_profile)
+    memories = blocks.text
 
-    memories = f"{profile_data}\n{search_results_memories}".strip()
+    if timings is not None:
+        timings.memory_tokens = estimate_tokens(memories)
+        timings.memory_tokens_dropped = dropped_tokens
 
     if memories:
         logger.debug(
@@ -193,9 +369,20 @@ async def add_system_prompt(
             },
         )
 
+    return blocks
+
+
+def add_memories_to_messages(
+    messages: list[ChatCompletionMessageParam],
+    memories: str,
+    logger: Logger,
+) -> list[ChatCompletionMessageParam]:
+    """Append memories to the system prompt, creating one if needed."""
     if not memories:
         return messages
 
+    system_prompt_exists = any(msg.get("role") == "system" for msg in messages)
+
     if system_prompt_exists:
         logger.debug("Added memories to existing system prompt")
         return [
@@ -213,14 +400,101 @@ async def add_system_prompt(
     return [system_message] + messages
 
 
+def add_memories_for_prompt_cache(
+    messages: list[ChatCompletionMessageParam],
+    memories: MemoryBlocks,
+    logger: Logger,
+) -> list[ChatCompletionMessageParam]:
+    """Insert memories without modifying the existing messages.
+
+    The static profile goes in a system message right after the leading system
+    messages, so the prompt prefix only changes when the profile does. The
+    dynamic profile and search results go in a system message just before the
+    last user message.
+    """
+    stable, volatile = memories.stable, memories.volatile
+    if not stable and not volatile:
+        return messages
+
+    leading_system = 0
+    while (
+        leading_system < len(messages)
+        and messages[leading_system].get("role") == "system"
+    ):
+        leading_system += 1
+
+    result = list(messages)
+    if volatile:
+        last_user = next(
+            (
+                i
+                for i in range(len(result) - 1, -1, -1)
+                if result[i].get("role") == "user"
+            ),
+            len(result),
+        )
+        volatile_message: ChatCompletionSystemMessageParam = {
+            "role": "system",
+            "content": volatile,
+        }
+        result.insert(max(last_user, leading_system), volatile_message)
+    if stable:
+        stable_message: ChatCompletionSystemMessageParam = {
+            "role": "system",
+            "content": stable,
+        }
+        result.insert(leading_system, stable_message)
+
+    logger.debug(
+        "Added memories in prompt-cache-friendly positions",
+        {"stable_length": len(stable), "volatile_length": len(volatile)},
+    )
+    return result
+
+
+async def add_system_prompt(
+    messages: list[ChatCompletionMessageParam],
+    container_tag: str,
+    logger: Logger,
+    mode: Literal["profile", "query", "full"],
+    api_key: str,
+    transport: Optional[SupermemoryHTTPTransport] = None,
+    profile_cache: Optional[ProfileCache] = None,
+    query_cache: Optional[QueryResultCache] = None,
+    max_memory_tokens: Optional[int] = None,
+) -> list[ChatCompletionMessageParam]:
+    """Add memory-enhanced system prompts to chat completion messages."""
+    memories = await build_memories_text(
+        messages,
+        container_tag,
+        logger,
+        mode,
+        api_key,
+        transport=transport,
+        profile_cache=profile_cache,
+        query_cache=query_cache,
+        max_memory_tokens=max_memory_tokens,
+    )
+    return add_memories_to_messages(messages, memories, logger)
+
+
 async def add_memory_tool(
-    client: supermemory.Supermemory,
+    client: Union[SupermemoryHTTPTransport, Any],
     container_tag: str,
     content: str,
     custom_id: Optional[str],
     logger: Logger,
+    profile_cache: Optional[ProfileCache] = None,
+    batch_writer: Optional[BatchWriter] = None,
+    query_cache: Optional[QueryResultCache] = None,
 ) -> None:
-    """Add a new memory to the SuperMemory system."""
+    """Add a new memory to the SuperMemory system.
+
+    ``client`` is the middleware's transport or a supermemory SDK client; with a
+    ``batch_writer`` the write is uploaded in a batch instead.
+    A successful write invalidates the cached profile and cached searches for
+    the container tag.
+    """
     try:
         add_params = {
             "content": content,
@@ -229,12 +503,29 @@ async def add_memory_tool(
         if custom_id is not None:
             add_params["custom_id"] = custom_id
 
-        # Handle both sync and async supermemory clients
-        result = client.memories.add(**add_params)
-        if inspect.isawaitable(result):
-            response = await result
+        # Handle the transport and both sync and async supermemory clients. Sync
+        # clients block, so they run on a worker thread to keep the loop responsive.
+        if batch_writer is not None:
+            response = SupermemoryAddResponse(await batch_writer.submit(add_params))
+        elif isinstance(client, SupermemoryHTTPTransport):
+            response = SupermemoryAddResponse(
+                await client.add_memory(
+                    content=content, container_tags=[container_tag], custom_id=custom_id
+                )
+            )
+        elif inspect.iscoroutinefunction(client.memories.add):
+            response = await client.memories.add(**add_params)
         else:
-            response = result
+            add = client.memories.add
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(add, **add_params)
+            )
+            response = await result if inspect.isawaitable(result) else result
+
+        if profile_cache is not None:
+            profile_cache.invalidate(container_tag)
+        if query_cache is not None:
+            query_cache.invalidate(container_tag)
 
         logger.info(
             "Memory saved successfully",
@@ -261,6 +552,10 @@ async def add_memory_tool(
         raise SupermemoryMemoryOperationError("Failed to save memory", error)
 
 
+def _message_fingerprint(message: ChatCompletionMessageParam) -> str:
+    return f"{message.get('role', '')}:{message.get('content', '')!r}"
+
+
 class SupermemoryOpenAIWrapper:
     """Wrapper for OpenAI client with Supermemory middleware."""
 
@@ -274,33 +569,46 @@ class SupermemoryOpenAIWrapper:
         self._options: OpenAIMiddlewareOptions = options
         self._logger: Logger = create_logger(self._options.verbose)
 
+        # Resolve credentials once; every Supermemory call goes through the
+        # transport, which wrappers with the same settings share from the pool
+        self._api_key: str = self._resolve_api_key()
+        self._client_pool: SupermemoryClientPool = (
+            options.client_pool
+            if options.client_pool is not None
+            else get_client_pool()
+        )
+        self._transport: SupermemoryHTTPTransport = self._client_pool.acquire_transport(
+            self._api_key,
+            base_url=options.base_url,
+            timeout=options.timeout,
+            max_connections=options.max_connections,
+            max_connections_per_host=options.max_connections_per_host,
+        )
+        self._transport_released = False
+
         # Track background tasks to ensure they complete
         self._background_tasks: set[asyncio.Task] = set()
 
-        if not hasattr(supermemory, "Supermemory"):
-            raise SupermemoryConfigurationError(
-                "supermemory package is required but not found",
-                ImportError("supermemory package not installed"),
-            )
+        # Long-lived loop and write queue used by sync clients, started on first use
+        self._background_loop: Optional[BackgroundEventLoop] = None
+        self._write_queue: Optional[BackgroundWriteQueue] = None
 
-        api_key = self._get_api_key()
-        try:
-            self._supermemory_client: supermemory.Supermemory = supermemory.Supermemory(
-                api_key=api_key
-            )
-        except Exception as e:
-            raise SupermemoryConfigurationError(
-                f"Failed to initialize Supermemory client: {e}", e
-            )
+        # Per custom_id: number of messages already persisted and the last one.
+        # Advanced only once a write succeeds; writes on one loop run in order.
+        self._persisted_messages: dict[str, tuple[int, Optional[str]]] = {}
+        self._persisted_lock = threading.Lock()
+        self._write_locks: dict[asyncio.AbstractEventLoop, asyncio.Lock] = {}
+
+        # Most recent memories, reused when retrieval misses its budget
+        self._last_memories = MemoryBlocks()
+        self.last_timings: Optional[CompletionTimings] = None
 
         # Wrap the chat completions create method
         self._wrap_chat_completions()
 
-    def _get_api_key(self) -> str:
-        """Get Supermemory API key from environment."""
-        import os
-
-        api_key = os.getenv("SUPERMEMORY_API_KEY")
+    def _resolve_api_key(self) -> str:
+        """Get the Supermemory API key from the options or the environment."""
+        api_key = self._options.api_key or os.getenv("SUPERMEMORY_API_KEY")
         if not api_key:
             raise SupermemoryConfigurationError(
                 "SUPERMEMORY_API_KEY environment variable is required but not set"
@@ -336,152 +644,186 @@ class SupermemoryOpenAIWrapper:
         messages = kwargs.get("messages", [])
 
         if self._options.add_memory == "always":
-            user_message = get_last_user_message(messages)
-            if user_message and user_message.strip():
-                content = (
-                    get_conversation_content(messages)
-                    if self._options.custom_id
-                    else user_message
-                )
-                custom_id = (
-                    f"conversation:{self._options.custom_id}"
-                    if self._options.custom_id
-                    else None
-                )
-
+            memory_write = self._prepare_memory_write(messages)
+            if memory_write is not None:
                 # Create background task for memory storage
-                task = asyncio.create_task(
-                    add_memory_tool(
-                        self._supermemory_client,
-                        self._container_tag,
-                        content,
-                        custom_id,
-                        self._logger,
-                    )
-                )
+                task = asyncio.create_task(memory_write)
 
                 # Track the task and set up cleanup
                 self._background_tasks.add(task)
                 task.add_done_callback(self._background_tasks.discard)
 
-                # Log any exceptions but don't fail the main request
+                # Log any exceptions but don't fail the main request; the
+                # messages of a failed write are sent again with the next call
                 def handle_task_exception(task_obj):
-                    try:
-                        if task_obj.exception() is not None:
-                            exception = task_obj.exception()
-                            if isinstance(
-                                exception,
-                                (SupermemoryNetworkError, SupermemoryAPIError),
-                            ):
-                                self._logger.warn(
-                                    "Background memory storage failed",
-                                    {
-                                        "error": str(exception),
-                                        "type": type(exception).__name__,
-                                    },
-                                )
-                            else:
-                                self._logger.error(
-                                    "Unexpected error in background memory storage",
-                                    {
-                                        "error": str(exception),
-                                        "type": type(exception).__name__,
-                                    },
-                                )
-                    except asyncio.CancelledError:
+                    if task_obj.cancelled():
                         self._logger.debug("Memory storage task was cancelled")
+                    elif task_obj.exception() is not None:
+                        self._log_background_failure(task_obj.exception())
 
                 task.add_done_callback(handle_task_exception)
 
-        if self._options.mode != "profile":
-            user_message = get_last_user_message(messages)
-            if not user_message:
-                self._logger.debug("No user message found, skipping memory search")
-                return await original_create(**kwargs)
-
-        self._logger.info(
-            "Starting memory search",
-            {
-                "container_tag": self._container_tag,
-                "conversation_id": self._options.custom_id,
-                "mode": self._options.mode,
-            },
-        )
+        timings = CompletionTimings()
 
-        enhanced_messages = await add_system_prompt(
-            messages,
-            self._container_tag,
-            self._logger,
-            self._options.mode,
-            self._get_api_key(),
-        )
+        if self._should_search(messages):
+            retrieval_start = time.perf_counter()
+            memories = await self._retrieve_memories(messages, timings)
+            timings.retrieval_ms = (time.perf_counter() - retrieval_start) * 1000
+            kwargs["messages"] = self._inject_memories(messages, memories)
 
-        kwargs["messages"] = enhanced_messages
-        return await original_create(**kwargs)
+        llm_start = time.perf_counter()
+        try:
+            return await original_create(**kwargs)
+        finally:
+            timings.llm_ms = (time.perf_counter() - llm_start) * 1000
+            self._record_timings(timings)
 
     def _create_with_memory_sync(
         self,
         original_create: Any,
         **kwargs: Any,
     ) -> Any:
-        """Sync version of create with memory injection."""
-        # For sync clients, we implement a simplified version without background tasks
+        """Sync version of create with memory injection.
+
+        Memory operations run on the wrapper's persistent background event loop,
+        so connections and loop state are reused across calls. This also works
+        when the sync client is called from inside a running event loop.
+        """
         messages = kwargs.get("messages", [])
 
         # Handle memory addition synchronously if needed
         if self._options.add_memory == "always":
-            user_message = get_last_user_message(messages)
-            if user_message and user_message.strip():
-                content = (
-                    get_conversation_content(messages)
-                    if self._options.custom_id
-                    else user_message
-                )
-                custom_id = (
-                    f"conversation:{self._options.custom_id}"
-                    if self._options.custom_id
-                    else None
-                )
-
-                # Use asyncio.run() for the memory addition
+            memory_write = self._prepare_memory_write(messages)
+            if memory_write is not None:
+                # Hand the write to the background queue so the completion
+                # does not wait for it
                 try:
-                    asyncio.run(
-                        add_memory_tool(
-                            self._supermemory_client,
-                            self._container_tag,
-                            content,
-                            custom_id,
-                            self._logger,
-                        )
-                    )
-                except RuntimeError as e:
-                    if "cannot be called from a running event loop" in str(e):
-                        # We're in an async context, log warning and skip memory saving
-                        self._logger.warn(
-                            "Cannot save memory in sync client from async context",
-                            {"error": str(e)},
-                        )
-                    else:
-                        raise
-                except SupermemoryNetworkError as e:
-                    # Network errors are expected, log as warning
-                    self._logger.warn("Network error saving memory", {"error": str(e)})
-                except (SupermemoryAPIError, SupermemoryMemoryOperationError) as e:
-                    # API/memory errors are concerning, log as error
-                    self._logger.error("Failed to save memory", {"error": str(e)})
+                    future = self._get_write_queue().submit(memory_write)
                 except Exception as e:
                     # Unexpected errors should be investigated
                     self._logger.error(
                         "Unexpected error saving memory",
                         {"error": str(e), "type": type(e).__name__},
                     )
+                else:
+                    if future is None:
+                        self._logger.warn(
+                            "Memory write queue is full, dropped memory write",
+                            {"queue_size": self._options.sync_write_queue_size},
+                        )
+                    else:
+                        future.add_done_callback(self._handle_write_future)
 
         # Handle memory search and injection
-        if self._options.mode != "profile":
-            user_message = get_last_user_message(messages)
-            if not user_message:
-                self._logger.debug("No user message found, skipping memory search")
-                return original_create(**kwargs)
+        timings = CompletionTimings()
+
+        if self._should_search(messages):
+            retrieval_start = time.perf_counter()
+            memories = self._run_sync(
+                self._retrieve_memories(messages, timings, track_late=False)
+            )
+            timings.retrieval_ms = (time.perf_counter() - retrieval_start) * 1000
+            kwargs["messages"] = self._inject_memories(messages, memories)
+
+        llm_start = time.perf_counter()
+        try:
+            return original_create(**kwargs)
+        finally:
+            timings.llm_ms = (time.perf_counter() - llm_start) * 1000
+            self._record_timings(timings)
+
+    def _prepare_memory_write(
+        self, messages: list[ChatCompletionMessageParam]
+    ) -> Optional[Coroutine[Any, Any, None]]:
+        """Build the memory write for these messages.
+
+        With a custom_id, the write sends only the messages not yet persisted
+        for that document; the API appends them to the same document. Writes
+        run one at a time and the persisted position only advances once a
+        write succeeds, so a failed or dropped write is covered by the next one.
+
+        Returns:
+            The write to run, or None if there is nothing to store
+        """
+        user_message = get_last_user_message(messages)
+        if not user_message or not user_message.strip():
+            return None
+
+        if not self._options.custom_id:
+            return self._add_memory(user_message, None)
+
+        custom_id = f"conversation:{self._options.custom_id}"
+        return self._write_unsent_messages(custom_id, list(messages))
+
+    def _add_memory(
+        self, content: str, custom_id: Optional[str]
+    ) -> Coroutine[Any, Any, None]:
+        return add_memory_tool(
+            self._transport,
+            self._container_tag,
+            content,
+            custom_id,
+            self._logger,
+            profile_cache=self._options.profile_cache,
+            batch_writer=self._options.batch_writer,
+            query_cache=self._options.query_cache,
+        )
+
+    async def _write_unsent_messages(
+        self, custom_id: str, messages: list[ChatCompletionMessageParam]
+    ) -> None:
+        """Upload the messages not yet persisted for a document, then mark them sent."""
+        async with self._write_lock():
+            with self._persisted_lock:
+                unsent, persisted = self._find_unsent_messages(custom_id, messages)
+            if not unsent:
+                return
+            await self._add_memory(get_conversation_content(unsent), custom_id)
+            with self._persisted_lock:
+                self._persisted_messages[custom_id] = persisted
+
+    def _write_lock(self) -> asyncio.Lock:
+        """Return the lock that serializes memory writes on the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._persisted_lock:
+            lock = self._write_locks.get(loop)
+            if lock is None:
+                for stale in [k for k in self._write_locks if k.is_closed()]:
+                    del self._write_locks[stale]
+                lock = self._write_locks[loop] = asyncio.Lock()
+            return lock
+
+    def _find_unsent_messages(
+        self, custom_id: str, messages: list[ChatCompletionMessageParam]
+    ) -> tuple[list[ChatCompletionMessageParam], tuple[int, Optional[str]]]:
+        """Return the messages not yet persisted for a document.
+
+        Also returns the persisted position to record once they are stored.
+        """
+        sent_count, last_sent = self._persisted_messages.get(custom_id, (0, None))
+
+        # The caller may have trimmed or replaced the history; find the last
+        # persisted message again, or start over if it is gone.
+        if sent_count and (
+            sent_count > len(messages)
+            or _message_fingerprint(messages[sent_count - 1]) != last_sent
+        ):
+            fingerprints = [_message_fingerprint(message) for message in messages]
+            if last_sent in fingerprints:
+                sent_count = len(fingerprints) - fingerprints[::-1].index(last_sent)
+            else:
+                sent_count = 0
+
+        unsent = list(messages[sent_count:])
+        if not messages:
+            return unsent, (sent_count, last_sent)
+        return unsent, (len(messages), _message_fingerprint(messages[-1]))
+
+    def _should_search(self, messages: list[ChatCompletionMessageParam]) -> bool:
+        """Whether memories should be retrieved for these messages."""
+        if self._options.mode != "profile" and not get_last_user_message(messages):
+            self._logger.debug("No user message found, skipping memory search")
+            return False
 
         self._logger.info(
             "Starting memory search",
@@ -491,40 +833,148 @@ class SupermemoryOpenAIWrapper:
                 "mode": self._options.mode,
             },
         )
+        return True
+
+    async def _retrieve_memories(
+        self,
+        messages: list[ChatCompletionMessageParam],
+        timings: "CompletionTimings",
+        track_late: bool = True,
+    ) -> MemoryBlocks:
+        """Retrieve memories, honoring the retrieval_timeout_ms budget.
+
+        When the budget is exceeded, the last successfully retrieved memories are
+        returned instead and the search keeps running in the background so its
+        result is available to the next completion.
+        """
+        fetch = build_memory_blocks(
+            messages,
+            self._container_tag,
+            self._logger,
+            self._options.mode,
+            self._api_key,
+            transport=self._transport,
+            profile_cache=self._options.profile_cache,
+            query_cache=self._options.query_cache,
+            max_memory_tokens=self._options.max_memory_tokens,
+            timings=timings,
+            sort_profile=self._options.memory_placement == "cache_friendly",
+        )
 
-        # Use asyncio.run() for memory search and injection
+        if self._options.retrieval_timeout_ms is None:
+            memories = await fetch
+            self._last_memories = memories
+            return memories
+
+        task = asyncio.ensure_future(fetch)
         try:
-            enhanced_messages = asyncio.run(
-                add_system_prompt(
-                    messages,
-                    self._container_tag,
-                    self._logger,
-                    self._options.mode,
-                    self._get_api_key(),
-                )
+            memories = await asyncio.wait_for(
+                asyncio.shield(task), self._options.retrieval_timeout_ms / 1000
             )
-        except RuntimeError as e:
-            if "cannot be called from a running event loop" in str(e):
-                # We're in an async context, run in a separate thread
-                import concurrent.futures
-
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(
-                        asyncio.run,
-                        add_system_prompt(
-                            messages,
-                            self._container_tag,
-                            self._logger,
-                            self._options.mode,
-                            self._get_api_key(),
-                        ),
-                    )
-                    enhanced_messages = future.result()
-            else:
-                raise
+        except asyncio.TimeoutError:
+            timings.retrieval_timed_out = True
+            self._logger.warn(
+                "Memory retrieval exceeded budget, continuing with cached memories",
+                {
+                    "retrieval_timeout_ms": self._options.retrieval_timeout_ms,
+                    "has_cached_memories": bool(self._last_memories.text),
+                },
+            )
+            task.add_done_callback(self._store_late_memories)
+            if track_late:
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            return self._last_memories
+
+        self._last_memories = memories
+        return memories
+
+    def _inject_memories(
+        self, messages: list[ChatCompletionMessageParam], memories: MemoryBlocks
+    ) -> list[ChatCompletionMessageParam]:
+        if self._options.memory_placement == "cache_friendly":
+            return add_memories_for_prompt_cache(messages, memories, self._logger)
+        return add_memories_to_messages(messages, memories.text, self._logger)
+
+    def _store_late_memories(self, task: "asyncio.Future[MemoryBlocks]") -> None:
+        """Keep the result of a search that missed its budget for the next turn."""
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._logger.warn(
+                "Late memory retrieval failed",
+                {"error": str(task.exception())},
+            )
+            return
+        self._last_memories = task.result()
+
+    def _record_timings(self, timings: "CompletionTimings") -> None:
+        self.last_timings = timings
+        self._logger.debug(
+            "Completion timings",
+            {
+                "retrieval_ms": timings.retrieval_ms,
+                "llm_ms": timings.llm_ms,
+                "retrieval_timed_out": timings.retrieval_timed_out,
+            },
+        )
+        if self._options.on_timings is not None:
+            self._options.on_timings(timings)
+
+    def _get_background_loop(self) -> BackgroundEventLoop:
+        if self._background_loop is None:
+            self._background_loop = BackgroundEventLoop()
+        return self._background_loop
+
+    def _get_write_queue(self) -> BackgroundWriteQueue:
+        if self._write_queue is None:
+            self._write_queue = BackgroundWriteQueue(
+                self._get_background_loop(),
+                max_pending=self._options.sync_write_queue_size,
+                on_full=self._options.sync_write_on_full,
+            )
+        return self._write_queue
 
-        kwargs["messages"] = enhanced_messages
-        return original_create(**kwargs)
+    def _run_sync(self, coro: Any) -> Any:
+        """Run a coroutine on the persistent background loop and wait for it."""
+        return self._get_background_loop().run(coro)
+
+    def _handle_write_future(self, future: Any) -> None:
+        """Log the outcome of a queued sync-client memory write."""
+        if future.cancelled():
+            self._logger.debug("Memory storage task was cancelled")
+            return
+        if future.exception() is not None:
+            self._log_background_failure(future.exception())
+
+    def _log_background_failure(self, exception: Optional[BaseException]) -> None:
+        """Log a failed background memory write without failing the request."""
+        if exception is None:
+            return
+        if isinstance(exception, (SupermemoryNetworkError, SupermemoryAPIError)):
+            self._logger.warn(
+                "Background memory storage failed",
+                {"error": str(exception), "type": type(exception).__name__},
+            )
+        else:
+            self._logger.error(
+                "Unexpected error in background memory storage",
+                {"error": str(exception), "type": type(exception).__name__},
+            )
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for memory writes queued by a sync client to finish.
+
+        Args:
+            timeout: Maximum time to wait in seconds. None for no timeout.
+
+        Returns:
+            True if all queued writes finished within the timeout
+        """
+        if self._write_queue is None:
+            return True
+        return self._write_queue.flush(timeout)
 
     async def wait_for_background_tasks(self, timeout: Optional[float] = 10.0) -> None:
         """
@@ -582,18 +1032,22 @@ class SupermemoryOpenAIWrapper:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit - wait for background tasks."""
+        """Async context manager exit - wait for background tasks and close sessions."""
         try:
             await self.wait_for_background_tasks(timeout=5.0)
         except asyncio.TimeoutError:
             self._logger.warn("Some background memory tasks did not complete on exit")
+        finally:
+            if not self._transport_released:
+                self._transport_released = True
+                await self._client_pool.arelease_transport(self._transport)
 
     def __enter__(self):
         """Sync context manager entry."""
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Sync context manager exit - attempt to wait for background tasks."""
+        """Sync context manager exit - wait for background tasks and stop the loop."""
         if self._background_tasks:
             try:
                 # Try to wait for background tasks in sync context
@@ -614,6 +1068,23 @@ class SupermemoryOpenAIWrapper:
                 )
                 self.cancel_background_tasks()
 
+        if self._write_queue is not None:
+            if not self.flush(timeout=self._options.sync_write_flush_timeout):
+                cancelled = self._write_queue.cancel_pending()
+                self._logger.warn(
+                    "Some queued memory writes did not complete on exit",
+                    {"cancelled": cancelled},
+                )
+            self._write_queue = None
+
+        if self._background_loop is not None:
+            self._background_loop.stop(cleanup=self._transport.aclose_loop_session())
+            self._background_loop = None
+
+        if not self._transport_released:
+            self._transport_released = True
+            self._client_pool.release_transport(self._transport)
+
     def __getattr__(self, name: str) -> Any:
         """Delegate all other attributes to the wrapped client."""
         return getattr(self._client, name)
@@ -1,7 +1,10 @@
 """Supermemory tools for OpenAI function calling."""
 
+import asyncio
 import json
-from typing import Dict, List, Optional, TypedDict, Union
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, TypedDict, Union
 
 import supermemory
 from openai.types.chat import (
@@ -16,6 +19,8 @@ from supermemory.types import (
 )
 from supermemory.types.search_execute_response import Result
 
+from .cache import normalize_query
+from .client_pool import SupermemoryClientPool, get_client_pool
 from .exceptions import (
     SupermemoryConfigurationError,
     SupermemoryMemoryOperationError,
@@ -111,21 +116,31 @@ MEMORY_TOOL_SCHEMAS: Dict[str, ChatCompletionFunctionToolParam] = {
 class SupermemoryTools:
     """Create memory tool handlers for OpenAI function calling."""
 
-    def __init__(self, api_key: str, config: Optional[SupermemoryToolsConfig] = None):
+    def __init__(
+        self,
+        api_key: str,
+        config: Optional[SupermemoryToolsConfig] = None,
+        client_pool: Optional[SupermemoryClientPool] = None,
+    ):
         """Initialize SupermemoryTools.
 
         Args:
             api_key: Supermemory API key
             config: Optional configuration
+            client_pool: Pool the Supermemory client is taken from. Defaults to
+                the process-wide pool, so tools with the same API key and base
+                URL share connections. ``aclose`` releases the client.
         """
         config = config or {}
 
-        # Initialize Supermemory client
-        client_kwargs = {"api_key": api_key}
-        if config.get("base_url"):
-            client_kwargs["base_url"] = config["base_url"]
-
-        self.client = supermemory.AsyncSupermemory(**client_kwargs)
+        # Share a pooled Supermemory client
+        self._client_pool = (
+            client_pool if client_pool is not None else get_client_pool()
+        )
+        self.client: supermemory.AsyncSupermemory = self._client_pool.acquire(
+            api_key, config.get("base_url") or None
+        )
+        self._client_released = False
 
         # Set container tags
         if config.get("project_id"):
@@ -135,6 +150,12 @@ class SupermemoryTools:
         else:
             self.container_tags = ["sm_project_default"]
 
+    async def aclose(self) -> None:
+        """Release the shared Supermemory client."""
+        if not self._client_released:
+            self._client_released = True
+            await self._client_pool.release(self.client)
+
     def get_tool_definitions(self) -> List[ChatCompletionFunctionToolParam]:
         """Get OpenAI function definitions for all memory tools.
 
@@ -271,6 +292,235 @@ def get_memory_tool_definitions() -> List[ChatCompletionFunctionToolParam]:
     ]
 
 
+_SEARCH_ARGS = {"information_to_get", "include_full_docs", "limit"}
+
+
+def _search_key(args: Any) -> Optional[Tuple[str, bool]]:
+    """Return the coalescing key of ``search_memories`` arguments, if they are valid."""
+    if (
+        not isinstance(args, dict)
+        or not set(args) <= _SEARCH_ARGS
+        or not isinstance(args.get("information_to_get"), str)
+        or not isinstance(args.get("limit", 10), int)
+    ):
+        return None
+    query = normalize_query(args["information_to_get"])
+    return query, bool(args.get("include_full_docs", True))
+
+
+class _LoopTools:
+    """Cached tools and concurrency slots of one event loop."""
+
+    def __init__(self, max_concurrency: int):
+        self.tools: "OrderedDict[Tuple, SupermemoryTools]" = OrderedDict()
+        # Evicted tools, released once no execution may still be using them
+        self.retired: List[SupermemoryTools] = []
+        self.active = 0
+        self.slots = asyncio.Semaphore(max_concurrency)
+
+
+class MemoryToolExecutor:
+    """Executes memory tool calls with cached ``SupermemoryTools`` instances.
+
+    One ``SupermemoryTools`` is kept per API key and configuration and reused
+    across calls, at most ``max_concurrency`` tool calls run at once, and
+    ``aclose`` releases the cached clients.
+
+    Clients and semaphores are bound to the event loop that uses them, so the
+    cache and the concurrency limit are kept per running loop. State of loops
+    that have closed, such as earlier ``asyncio.run()`` calls, is dropped.
+
+    ``search_memories`` calls in one batch that ask the same question (after
+    normalizing case, punctuation and whitespace) with the same
+    ``include_full_docs`` share a single search. It uses the largest requested
+    ``limit``, and each call gets its own top ``limit`` results.
+
+    Example:
+        ```python
+        executor = MemoryToolExecutor(max_concurrency=4)
+        tool_calls = response.choices[0].message.tool_calls
+        results = await executor.execute(api_key, tool_calls)
+        await executor.aclose()
+        ```
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_cached_tools: int = 128,
+        client_pool: Optional[SupermemoryClientPool] = None,
+    ):
+        """Initialize the executor.
+
+        Args:
+            max_concurrency: Maximum tool calls executing at the same time
+                on one event loop
+            max_cached_tools: Maximum configurations whose tools are kept per
+                event loop; the least recently used is released first
+            client_pool: Pool the Supermemory clients are taken from
+        """
+        self.max_concurrency = max_concurrency
+        self.max_cached_tools = max_cached_tools
+        self._client_pool = client_pool
+        self._loops: Dict[Optional[asyncio.AbstractEventLoop], _LoopTools] = {}
+        # search_memories calls answered by another call's search
+        self.coalesced_searches = 0
+
+    def _loop_tools(self) -> _LoopTools:
+        try:
+            loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        state = self._loops.get(loop)
+        if state is None:
+            # A closed loop can no longer close its clients; the pool drops them
+            for stale in [k for k in self._loops if k is not None and k.is_closed()]:
+                del self._loops[stale]
+            state = self._loops[loop] = _LoopTools(self.max_concurrency)
+        return state
+
+    def tools_for(
+        self, api_key: str, config: Optional[SupermemoryToolsConfig] = None
+    ) -> SupermemoryTools:
+        """Return the cached tools for this API key and configuration."""
+        return self._tools_for(self._loop_tools(), api_key, config)
+
+    def _tools_for(
+        self,
+        state: _LoopTools,
+        api_key: str,
+        config: Optional[SupermemoryToolsConfig],
+    ) -> SupermemoryTools:
+        config = config or {}
+        key = (
+            api_key,
+            config.get("base_url") or None,
+            config.get("project_id"),
+            tuple(config.get("container_tags") or ()),
+        )
+        tools = state.tools.get(key)
+        if tools is None:
+            tools = SupermemoryTools(api_key, config, client_pool=self._client_pool)
+            state.tools[key] = tools
+            while len(state.tools) > self.max_cached_tools:
+                state.retired.append(state.tools.popitem(last=False)[1])
+        else:
+            state.tools.move_to_end(key)
+        return tools
+
+    async def execute(
+        self,
+        api_key: str,
+        tool_calls: List[ChatCompletionMessageToolCall],
+        config: Optional[SupermemoryToolsConfig] = None,
+    ) -> List[ChatCompletionToolMessageParam]:
+        """Execute tool calls from OpenAI function calling.
+
+        Args:
+            api_key: Supermemory API key
+            tool_calls: List of tool calls from OpenAI
+            config: Optional configuration
+
+        Returns:
+            List of tool message parameters, in the order of ``tool_calls``
+        """
+        state = self._loop_tools()
+        tools = self._tools_for(state, api_key, config)
+
+        # Group search calls by question, keeping the largest limit of each
+        search_args: Dict[int, Tuple[Dict[str, Any], Tuple[str, bool]]] = {}
+        search_limits: Dict[Tuple[str, bool], int] = {}
+        for i, tool_call in enumerate(tool_calls):
+            if tool_call.function.name != "search_memories":
+                continue
+            try:
+                args = json.loads(tool_call.function.arguments)
+            except ValueError:
+                continue
+            key = _search_key(args)
+            if key is None:
+                continue
+            search_args[i] = (args, key)
+            if key in search_limits:
+                self.coalesced_searches += 1
+            search_limits[key] = max(search_limits.get(key, 0), args.get("limit", 10))
+        searches: Dict[Tuple[str, bool], "asyncio.Future[MemorySearchResult]"] = {}
+
+        async def search(args: Dict[str, Any], key: Tuple[str, bool]) -> str:
+            shared = searches.get(key)
+            if shared is None:
+
+                async def run() -> MemorySearchResult:
+                    async with state.slots:
+                        return await tools.search_memories(
+                            information_to_get=args["information_to_get"],
+                            include_full_docs=key[1],
+                            limit=search_limits[key],
+                        )
+
+                shared = searches[key] = asyncio.ensure_future(run())
+            result = await asyncio.shield(shared)
+
+            if result.get("success"):
+                results = result.get("results") or []
+                results = results[: max(args.get("limit", 10), 0)]
+                result = MemorySearchResult(
+                    success=True, results=results, count=len(results)
+                )
+            return json.dumps(result)
+
+        async def execute_single_call(
+            i: int, tool_call: ChatCompletionMessageToolCall
+        ) -> ChatCompletionToolMessageParam:
+            if i in search_args:
+                result = await search(*search_args[i])
+            else:
+                async with state.slots:
+                    result = await tools.execute_tool_call(tool_call)
+            return ChatCompletionToolMessageParam(
+                tool_call_id=tool_call.id,
+                role="tool",
+                content=result,
+            )
+
+        state.active += 1
+        try:
+            return await asyncio.gather(
+                *[
+                    execute_single_call(i, tool_call)
+                    for i, tool_call in enumerate(tool_calls)
+                ]
+            )
+        finally:
+            state.active -= 1
+            if not state.active and state.retired:
+                retired, state.retired = state.retired, []
+                for old in retired:
+                    await old.aclose()
+
+    async def aclose(self) -> None:
+        """Release the clients of all cached tools."""
+        states = list(self._loops.values())
+        self._loops.clear()
+        for state in states:
+            for old in state.retired + list(state.tools.values()):
+                await old.aclose()
+
+
+_default_executor: Optional[MemoryToolExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> MemoryToolExecutor:
+    """Return the executor used by ``execute_memory_tool_calls``."""
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = MemoryToolExecutor()
+        return _default_executor
+
+
 async def execute_memory_tool_calls(
     api_key: str,
     tool_calls: List[ChatCompletionMessageToolCall],
@@ -278,6 +528,9 @@ async def execute_memory_tool_calls(
 ) -> List[ChatCompletionToolMessageParam]:
     """Execute tool calls from OpenAI function calling.
 
+    Tools are reused across calls through the shared executor returned by
+    ``get_tool_executor``.
+
     Args:
         api_key: Supermemory API key
         tool_calls: List of tool calls from OpenAI
@@ -286,26 +539,7 @@ async def execute_memory_tool_calls(
     Returns:
         List of tool message parameters
     """
-    tools = SupermemoryTools(api_key, config)
-
-    async def execute_single_call(
-        tool_call: ChatCompletionMessageToolCall,
-    ) -> ChatCompletionToolMessageParam:
-        result = await tools.execute_tool_call(tool_call)
-        return ChatCompletionToolMessageParam(
-            tool_call_id=tool_call.id,
-            role="tool",
-            content=result,
-        )
-
-    # Execute all tool calls concurrently
-    import asyncio
-
-    results = await asyncio.gather(
-        *[execute_single_call(tool_call) for tool_call in tool_calls]
-    )
-
-    return results
+    return await get_tool_executor().execute(api_key, tool_calls, config)
 
 
 # Individual tool creators for more granular control
@@ -332,6 +566,10 @@ class SearchMemoriesTool:
             limit=limit,
         )
 
+    async def aclose(self) -> None:
+        """Release the shared Supermemory client."""
+        await self.tools.aclose()
+
 
 class AddMemoryTool:
     """Individual add memory tool."""
@@ -347,6 +585,10 @@ class AddMemoryTool:
         """Execute add memory."""
         return await self.tools.add_memory(memory=memory)
 
+    async def aclose(self) -> None:
+        """Release the shared Supermemory client."""
+        await self.tools.aclose()
+
 
 def create_search_memories_tool(
     api_key: str, config: Optional[SupermemoryToolsConfig] = None
@@ -0,0 +1,330 @@
+"""Pooled HTTP transport for Supermemory API calls made by the OpenAI middleware."""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from typing import Any, Callable, Optional
+
+from .exceptions import SupermemoryAPIError, SupermemoryTimeoutError
+
+DEFAULT_BASE_URL = "https://api.supermemory.ai"
+
+
+class SupermemoryHTTPTransport:
+    """Configured client for Supermemory API calls over keep-alive HTTP sessions.
+
+    aiohttp sessions are bound to the event loop that created them, so one
+    session is created lazily per event loop and closed when that loop shuts
+    down, as at the end of ``asyncio.run()``. When aiohttp is not installed, a
+    single pooled ``requests.Session`` is used instead, and its blocking calls
+    run on a bounded thread pool so they never stall the event loop.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: float = 30.0,
+        max_connections: int = 100,
+        max_connections_per_host: int = 10,
+    ):
+        """Initialize the transport.
+
+        Args:
+            api_key: Supermemory API key sent with every request
+            base_url: Supermemory API base URL
+            timeout: Total timeout per request in seconds
+            max_connections: Total connection limit per pooled session
+            max_connections_per_host: Connection limit per host per pooled session,
+                also used as the worker count for blocking ``requests`` calls
+        """
+        self.api_key: Optional[str] = api_key
+        self.base_url: str = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.timeout: float = timeout
+        self.max_connections: int = max_connections
+        self.max_connections_per_host: int = max_connections_per_host
+        self._aiohttp_sessions: dict[asyncio.AbstractEventLoop, Any] = {}
+        self._session_closers: dict[asyncio.AbstractEventLoop, Any] = {}
+        self._requests_session: Optional[Any] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def get_aiohttp_session(self) -> Any:
+        """Return the keep-alive aiohttp session for the running event loop.
+
+        Returns:
+            aiohttp.ClientSession bound to the current loop
+
+        Raises:
+            ImportError: If aiohttp is not installed
+        """
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._aiohttp_sessions.get(loop)
+            if session is None or session.closed:
+                # Loops that have been closed can no longer close their sessions;
+                # just drop the references so the loops can be garbage collected.
+                for stale_loop in [
+                    stale for stale in self._aiohttp_sessions if stale.is_closed()
+                ]:
+                    del self._aiohttp_sessions[stale_loop]
+                    self._session_closers.pop(stale_loop, None)
+
+                connector = aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    limit_per_host=self.max_connections_per_host,
+                )
+                session = aiohttp.ClientSession(connector=connector)
+                self._aiohttp_sessions[loop] = session
+                self._session_closers[loop] = self._start_closer(loop, session)
+        return session
+
+    def _start_closer(self, loop: asyncio.AbstractEventLoop, session: Any) -> Any:
+        """Tie ``session`` to the lifetime of ``loop``.
+
+        The closer is an async generator that a task on ``loop`` iterates to its
+        first ``yield``. The loop tracks generators iterated on it, and
+        ``asyncio.run()`` and ``asyncio.Runner`` close them with
+        ``loop.shutdown_asyncgens()`` before closing the loop, which runs the
+        ``finally`` block below. ``aclose()`` and ``close()`` close it explicitly.
+        """
+
+        async def closer() -> Any:
+            try:
+                yield
+            finally:
+                with self._lock:
+                    if self._aiohttp_sessions.get(loop) is session:
+                        del self._aiohttp_sessions[loop]
+                if not session.closed:
+                    await session.close()
+
+        generator = closer()
+
+        async def start() -> None:
+            try:
+                await generator.asend(None)
+            except StopAsyncIteration:
+                pass  # Closed explicitly before the task got to run
+
+        def restart_if_cancelled(task: "asyncio.Task[None]") -> None:
+            # A loop shutting down cancels the task if it has not run yet; a task
+            # created now still runs before the loop finalizes its generators.
+            if task.cancelled() and not loop.is_closed():
+                loop.create_task(start())
+
+        loop.create_task(start()).add_done_callback(restart_if_cancelled)
+        return generator
+
+    def get_requests_session(self) -> Any:
+        """Return the pooled requests session used when aiohttp is unavailable."""
+        with self._lock:
+            if self._requests_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.max_connections_per_host,
+                    pool_maxsize=self.max_connections,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._requests_session = session
+            return self._requests_session
+
+    async def post(
+        self,
+        path: str,
+        payload: dict[str, Any],
+        api_key: Optional[str] = None,
+        error_message: str = "Supermemory request failed",
+    ) -> dict[str, Any]:
+        """POST a JSON payload to the Supermemory API and return the decoded response.
+
+        Raises:
+            SupermemoryAPIError: If the API responds with an error status or with
+                a body that is not a JSON object
+            SupermemoryTimeoutError: If the request exceeds the transport timeout
+        """
+        url = f"{self.base_url}{path}"
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key or self.api_key}",
+        }
+
+        aiohttp = _import_aiohttp()
+        if aiohttp is not None:
+            try:
+                async with self.get_aiohttp_session().post(
+                    url,
+                    headers=headers,
+                    json=payload,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                ) as response:
+                    if not response.ok:
+                        raise SupermemoryAPIError(
+                            error_message,
+                            status_code=response.status,
+                            response_text=await response.text(),
+                        )
+                    return _json_object(await response.json(), error_message)
+            except asyncio.TimeoutError as e:
+                raise SupermemoryTimeoutError(f"{error_message}: timed out", e)
+
+        # requests is blocking, so the call runs on the bounded worker pool
+        import requests
+
+        try:
+            response = await self.run_blocking(
+                self.get_requests_session().post,
+                url,
+                headers=headers,
+                json=payload,
+                timeout=self.timeout,
+            )
+        except requests.Timeout as e:
+            raise SupermemoryTimeoutError(f"{error_message}: timed out", e)
+
+        if not response.ok:
+            raise SupermemoryAPIError(
+                error_message,
+                status_code=response.status_code,
+                response_text=response.text,
+            )
+        return _json_object(response.json(), error_message)
+
+    async def add_memory(
+        self,
+        content: str,
+        container_tags: list[str],
+        custom_id: Optional[str] = None,
+        metadata: Optional[dict[str, Any]] = None,
+    ) -> dict[str, Any]:
+        """Add a document to Supermemory.
+
+        Returns:
+            The decoded response, including the document ``id`` and ``status``
+        """
+        return await self.post(
+            "/v3/documents",
+            _document_payload(
+                {
+                    "content": content,
+                    "container_tags": container_tags,
+                    "custom_id": custom_id,
+                    "metadata": metadata,
+                }
+            ),
+            error_message="Supermemory memory add failed",
+        )
+
+    async def add_documents(self, documents: list[dict[str, Any]]) -> dict[str, Any]:
+        """Add several documents to Supermemory in one batch request.
+
+        Args:
+            documents: Documents with ``content`` and optional ``container_tags``,
+                ``custom_id`` and ``metadata`` keys
+
+        Returns:
+            The decoded response, with one entry per document in ``results``
+        """
+        return await self.post(
+            "/v3/documents/batch",
+            {"documents": [_document_payload(document) for document in documents]},
+            error_message="Supermemory batch add failed",
+        )
+
+    async def run_blocking(
+        self, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Any:
+        """Run a blocking call on the transport's bounded thread pool."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, self.max_connections_per_host),
+                    thread_name_prefix="supermemory-http",
+                )
+            executor = self._executor
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def aclose_loop_session(self) -> None:
+        """Close the aiohttp session bound to the running event loop, if any."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._aiohttp_sessions.pop(loop, None)
+            closer = self._session_closers.pop(loop, None)
+        if closer is not None:
+            await closer.aclose()
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def aclose(self) -> None:
+        """Close the session of the running loop and the requests session."""
+        await self.aclose_loop_session()
+        self._close_requests_session()
+
+    def close(self) -> None:
+        """Close every session that can still be closed from synchronous code."""
+        with self._lock:
+            sessions = list(self._aiohttp_sessions.items())
+            closers = dict(self._session_closers)
+            self._aiohttp_sessions.clear()
+            self._session_closers.clear()
+
+        for loop, session in sessions:
+            if loop.is_closed() or loop.is_running():
+                continue
+            closer = closers.get(loop)
+            if closer is not None:
+                loop.run_until_complete(closer.aclose())
+            if not session.closed:
+                loop.run_until_complete(session.close())
+
+        self._close_requests_session()
+
+    def _close_requests_session(self) -> None:
+        with self._lock:
+            session = self._requests_session
+            executor = self._executor
+            self._requests_session = None
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        if session is not None:
+            session.close()
+
+
+def _import_aiohttp() -> Optional[ModuleType]:
+    try:
+        import aiohttp
+    except ImportError:
+        return None
+    return aiohttp
+
+
+def _json_object(body: Any, error_message: str) -> dict[str, Any]:
+    if not isinstance(body, dict):
+        raise SupermemoryAPIError(
+            f"{error_message}: expected a JSON object, got {type(body).__name__}"
+        )
+    return body
+
+
+def _document_payload(document: dict[str, Any]) -> dict[str, Any]:
+    payload: dict[str, Any] = {"content": document["content"]}
+    if document.get("container_tags"):
+        payload["containerTags"] = document["container_tags"]
+    if document.get("custom_id") is not None:
+        payload["customId"] = document["custom_id"]
+    if document.get("metadata"):
+        payload["metadata"] = document["metadata"]
+    return payload
@@ -1,7 +1,7 @@
 """Utility functions for Supermemory OpenAI middleware."""
 
 import json
-from typing import Optional, Any, Protocol
+from typing import Optional, Any, Callable, Protocol
 
 from openai.types.chat import ChatCompletionMessageParam
 
@@ -253,6 +253,79 @@ def deduplicate_memories(
     )
 
 
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text, at roughly four characters per token."""
+    return (len(text) + 3) // 4
+
+
+def _search_score(item: Any) -> float:
+    for key in ("similarity", "score"):
+        value = item.get(key) if isinstance(item, dict) else getattr(item, key, None)
+        if isinstance(value, (int, float)):
+            return float(value)
+    return 0.0
+
+
+def rank_search_results(search_results: list[Any]) -> list[Any]:
+    """Sort search results by descending similarity score, keeping API order on ties."""
+    return sorted(search_results, key=_search_score, reverse=True)
+
+
+def limit_memories_to_token_budget(
+    memories: DeduplicatedMemories,
+    max_tokens: int,
+    render: Optional[Callable[[DeduplicatedMemories], str]] = None,
+) -> tuple[DeduplicatedMemories, int, int]:
+    """
+    Keeps the highest-priority memories that fit in an estimated token budget.
+
+    Memories are taken in priority order (static, dynamic, then search results
+    in their given order) until one no longer fits; it and every memory after
+    it are dropped, so the same input always gives the same output.
+
+    Without ``render`` only the memory lines are counted. With ``render``, the
+    budget applies to the text it produces from the kept memories, so section
+    headers and any prompt wrapper around them count as well. ``render`` is
+    only called when a section gets its first memory; every later memory is
+    assumed to add one ``- memory`` line to its section.
+
+    Returns:
+        The kept memories, and the estimated tokens kept and dropped
+    """
+    kept: dict[str, list[str]] = {"static": [], "dynamic": [], "search_results": []}
+    kept_tokens = 0
+    dropped_tokens = 0
+    full = False
+    # Length of the text rendered from the kept memories
+    rendered = 0
+
+    for section in ("static", "dynamic", "search_results"):
+        for memory in getattr(memories, section):
+            tokens = estimate_tokens(f"- {memory}\n")
+            if not full:
+                kept[section].append(memory)
+                if render is None:
+                    total = kept_tokens + tokens
+                else:
+                    # A section's first memory also adds its header
+                    length = (
+                        len(render(DeduplicatedMemories(**kept)))
+                        if len(kept[section]) == 1
+                        else rendered + len(f"\n- {memory}")
+                    )
+                    total = (length + 3) // 4  # as estimate_tokens
+                if total <= max_tokens:
+                    kept_tokens = total
+                    if render is not None:
+                        rendered = length
+                    continue
+                kept[section].pop()
+                full = True
+            dropped_tokens += tokens
+
+    return DeduplicatedMemories(**kept), kept_tokens, dropped_tokens
+
+
 def convert_profile_to_markdown(data: dict[str, Any]) -> str:
     """
     Convert profile data to markdown based on profile.static and profile.dynamic properties.
@@ -15,6 +15,7 @@ try:
     from supermemory_openai import (
         with_supermemory,
         OpenAIMiddlewareOptions,
+        ProfileCache,
         SupermemoryOpenAIWrapper,
     )
 except ImportError:
@@ -23,6 +24,7 @@ except ImportError:
     from supermemory_openai import (
         with_supermemory,
         OpenAIMiddlewareOptions,
+        ProfileCache,
         SupermemoryOpenAIWrapper,
     )
 
@@ -31,6 +33,23 @@ from openai.types.chat import ChatCompletion, ChatCompletionMessage
 from openai.types import CompletionUsage
 
 
+@pytest.fixture(autouse=True)
+def close_wrappers():
+    """Tear down every wrapper a test creates, closing its pooled sessions."""
+    wrappers = []
+    original_init = SupermemoryOpenAIWrapper.__init__
+
+    def tracking_init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        wrappers.append(self)
+
+    with patch.object(SupermemoryOpenAIWrapper, "__init__", tracking_init):
+        yield
+
+    for wrapper in wrappers:
+        wrapper.__exit__(None, None, None)
+
+
 @pytest.fixture
 def mock_openai_client():
     """Create a mock OpenAI client."""
@@ -794,4 +813,1053 @@ class TestBackgroundTaskManagement:
                             messages=[{"role": "user", "content": "Hello"}]
                         )
 
-                    # Should complete without error
\ No newline at end of file
+                    # Should complete without error
+
+class TestConnectionPooling:
+    """Test pooled HTTP sessions used for profile searches."""
+
+    @pytest.mark.asyncio
+    async def test_aiohttp_session_reused_within_loop(self):
+        """Test that one keep-alive session is shared by calls on the same loop."""
+        pytest.importorskip("aiohttp")
+        from supermemory_openai.transport import SupermemoryHTTPTransport
+
+        transport = SupermemoryHTTPTransport(max_connections=5, max_connections_per_host=2)
+        first = transport.get_aiohttp_session()
+        second = transport.get_aiohttp_session()
+
+        assert first is second
+        assert first.connector.limit == 5
+        assert first.connector.limit_per_host == 2
+
+        await transport.aclose()
+        assert first.closed
+
+    def test_aiohttp_session_per_event_loop(self):
+        """Test that each event loop gets its own session."""
+        pytest.importorskip("aiohttp")
+        from supermemory_openai.transport import SupermemoryHTTPTransport
+
+        transport = SupermemoryHTTPTransport()
+
+        async def get_session():
+            return transport.get_aiohttp_session()
+
+        loop_a = asyncio.new_event_loop()
+        loop_b = asyncio.new_event_loop()
+        try:
+            session_a = loop_a.run_until_complete(get_session())
+            session_b = loop_b.run_until_complete(get_session())
+            assert session_a is not session_b
+
+            transport.close()
+            assert session_a.closed
+            assert session_b.closed
+        finally:
+            loop_a.close()
+            loop_b.close()
+
+    def test_aiohttp_session_closed_with_its_loop(self):
+        """Test that a loop's session is closed when asyncio.run() shuts the loop down."""
+        pytest.importorskip("aiohttp")
+        from supermemory_openai.transport import SupermemoryHTTPTransport
+
+        transport = SupermemoryHTTPTransport()
+
+        async def get_session():
+            return transport.get_aiohttp_session()
+
+        first = asyncio.run(get_session())
+        second = asyncio.run(get_session())
+
+        assert first is not second
+        assert first.closed
+        assert second.closed
+        assert transport._aiohttp_sessions == {}
+
+    @pytest.mark.asyncio
+    async def test_profile_search_uses_pooled_requests_session(self):
+        """Test that the requests fallback reuses one pooled session."""
+        import sys
+        from supermemory_openai.middleware import supermemory_profile_search
+        from supermemory_openai.transport import SupermemoryHTTPTransport
+
+        transport = SupermemoryHTTPTransport()
+        session = transport.get_requests_session()
+        response = Mock(ok=True)
+        response.json.return_value = {"profile": {"static": ["Likes tea"]}}
+
+        with patch.dict(sys.modules, {"aiohttp": None}):
+            with patch.object(session, "post", return_value=response) as mock_post:
+                await supermemory_profile_search("user-123", "", "test-key", transport=transport)
+                result = await supermemory_profile_search(
+                    "user-123", "", "test-key", transport=transport
+                )
+
+        assert mock_post.call_count == 2
+        assert transport.get_requests_session() is session
+        assert result.profile == {"static": ["Likes tea"]}
+        transport.close()
+
+    @pytest.mark.asyncio
+    async def test_requests_fallback_does_not_block_event_loop(self):
+        """Test that concurrent requests-fallback searches overlap instead of serializing."""
+        import sys
+        import time
+        from supermemory_openai.middleware import supermemory_profile_search
+        from supermemory_openai.transport import SupermemoryHTTPTransport
+
+        transport = SupermemoryHTTPTransport(max_connections_per_host=4)
+        session = transport.get_requests_session()
+
+        def slow_post(*args, **kwargs):
+            time.sleep(0.2)
+            response = Mock(ok=True)
+            response.json.return_value = {"profile": {}, "searchResults": {}}
+            return response
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        with patch.dict(sys.modules, {"aiohttp": None}):
+            with patch.object(session, "post", side_effect=slow_post):
+                start = time.monotonic()
+                await asyncio.gather(
+                    *[
+                        supermemory_profile_search(
+                            "user-123", f"query {i}", "test-key", transport=transport
+                        )
+                        for i in range(4)
+                    ],
+                    ticker(),
+                )
+                elapsed = time.monotonic() - start
+
+        # Four 200ms calls run side by side, and the loop kept ticking meanwhile
+        assert elapsed < 0.6
+        assert ticks == 10
+        transport.close()
+
+
+class TestSyncBackgroundLoop:
+    """Test the persistent background loop used by sync clients."""
+
+    def test_sync_calls_share_one_event_loop(self, mock_openai_client, mock_openai_response):
+        """Test that sync completions reuse a single long-lived loop."""
+        original_create = Mock(return_value=mock_openai_response)
+        mock_openai_client.chat.completions.create = original_create
+        seen_loops = []
+
+        async def recording_search(*args, **kwargs):
+            seen_loops.append(asyncio.get_running_loop())
+            result = Mock()
+            result.profile = {"static": ["Likes tea"], "dynamic": []}
+            result.search_results = {"results": []}
+            return result
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch(
+                "supermemory_openai.middleware.supermemory_profile_search",
+                side_effect=recording_search,
+            ):
+                with with_supermemory(
+                    mock_openai_client,
+                    OpenAIMiddlewareOptions(
+                        container_tag="user-123", custom_id="test-conv", add_memory="never"
+                    ),
+                ) as wrapped_client:
+                    for _ in range(3):
+                        wrapped_client.chat.completions.create(
+                            model="gpt-4",
+                            messages=[{"role": "user", "content": "Hello"}],
+                        )
+
+                    assert len(seen_loops) == 3
+                    assert seen_loops[0] is seen_loops[1] is seen_loops[2]
+                    assert not seen_loops[0].is_closed()
+
+                # Exiting the context manager stops the loop
+                assert seen_loops[0].is_closed()
+                assert wrapped_client._background_loop is None
+
+        sent_messages = original_create.call_args[1]["messages"]
+        assert "Likes tea" in sent_messages[0]["content"]
+
+    def test_sync_memory_write_does_not_block_completion(
+        self, mock_openai_client, mock_openai_response
+    ):
+        """Test that sync completions hand memory writes to the background queue."""
+        import time
+
+        original_create = Mock(return_value=mock_openai_response)
+        mock_openai_client.chat.completions.create = original_create
+        write_finished = []
+
+        async def slow_add_memory(*args, **kwargs):
+            await asyncio.sleep(0.3)
+            write_finished.append(True)
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                with patch(
+                    "supermemory_openai.middleware.add_memory_tool",
+                    side_effect=slow_add_memory,
+                ):
+                    mock_search.return_value = Mock()
+                    mock_search.return_value.profile = {"static": [], "dynamic": []}
+                    mock_search.return_value.search_results = {"results": []}
+
+                    with with_supermemory(
+                        mock_openai_client,
+                        OpenAIMiddlewareOptions(container_tag="user-123", custom_id="test-conv"),
+                    ) as wrapped_client:
+                        start = time.monotonic()
+                        wrapped_client.chat.completions.create(
+                            model="gpt-4",
+                            messages=[{"role": "user", "content": "Hello"}],
+                        )
+                        assert time.monotonic() - start < 0.25
+                        assert not write_finished
+
+                        assert wrapped_client.flush(timeout=5.0)
+                        assert write_finished == [True]
+
+    def test_sync_write_queue_drops_when_full(
+        self, mock_openai_client, mock_openai_response
+    ):
+        """Test that the drop policy discards writes once the queue is full."""
+        original_create = Mock(return_value=mock_openai_response)
+        mock_openai_client.chat.completions.create = original_create
+        calls = []
+
+        async def slow_add_memory(*args, **kwargs):
+            calls.append(args[2])
+            await asyncio.sleep(0.2)
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                with patch(
+                    "supermemory_openai.middleware.add_memory_tool",
+                    side_effect=slow_add_memory,
+                ):
+                    mock_search.return_value = Mock()
+                    mock_search.return_value.profile = {"static": [], "dynamic": []}
+                    mock_search.return_value.search_results = {"results": []}
+
+                    with with_supermemory(
+                        mock_openai_client,
+                        OpenAIMiddlewareOptions(
+                            container_tag="user-123",
+                            custom_id="test-conv",
+                            sync_write_queue_size=1,
+                            sync_write_on_full="drop",
+                        ),
+                    ) as wrapped_client:
+                        for text in ("first", "second"):
+                            wrapped_client.chat.completions.create(
+                                model="gpt-4",
+                                messages=[{"role": "user", "content": text}],
+                            )
+
+                        assert wrapped_client.flush(timeout=5.0)
+                        assert wrapped_client._write_queue.dropped_count == 1
+
+        assert len(calls) == 1
+        assert original_create.call_count == 2
+
+
+class TestRetrievalBudget:
+    """Test the retrieval latency budget and per-call timings."""
+
+    @pytest.mark.asyncio
+    async def test_slow_retrieval_falls_back_to_cached_memories(
+        self, mock_async_openai_client, mock_openai_response
+    ):
+        """Test that a search missing its budget doesn't delay the completion."""
+        original_create = AsyncMock(return_value=mock_openai_response)
+        mock_async_openai_client.chat.completions.create = original_create
+        recorded = []
+
+        async def slow_search(*args, **kwargs):
+            await asyncio.sleep(0.2)
+            result = Mock()
+            result.profile = {"static": ["Prefers Python"], "dynamic": []}
+            result.search_results = {"results": []}
+            return result
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch(
+                "supermemory_openai.middleware.supermemory_profile_search",
+                side_effect=slow_search,
+            ):
+                wrapped_client = with_supermemory(
+                    mock_async_openai_client,
+                    OpenAIMiddlewareOptions(
+                        container_tag="user-123",
+                        custom_id="test-conv",
+                        add_memory="never",
+                        retrieval_timeout_ms=20,
+                        on_timings=recorded.append,
+                    ),
+                )
+                messages = [{"role": "user", "content": "Hello"}]
+
+                # First turn: budget missed and nothing cached yet
+                await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+                assert original_create.call_args[1]["messages"] == messages
+                assert recorded[0].retrieval_timed_out
+                assert recorded[0].retrieval_ms < 150
+                assert recorded[0].llm_ms is not None
+
+                # The late result warms the cache for the next turn
+                await wrapped_client.wait_for_background_tasks()
+                await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+                sent = original_create.call_args[1]["messages"]
+                assert "Prefers Python" in sent[0]["content"]
+                assert wrapped_client.last_timings is recorded[1]
+
+                await wrapped_client.wait_for_background_tasks()
+
+    @pytest.mark.asyncio
+    async def test_timings_recorded_without_budget(
+        self, mock_async_openai_client, mock_openai_response, mock_supermemory_response
+    ):
+        """Test that timings are recorded when retrieval completes normally."""
+        original_create = AsyncMock(return_value=mock_openai_response)
+        mock_async_openai_client.chat.completions.create = original_create
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                mock_search.return_value = Mock()
+                mock_search.return_value.profile = mock_supermemory_response["profile"]
+                mock_search.return_value.search_results = mock_supermemory_response["searchResults"]
+
+                wrapped_client = with_supermemory(
+                    mock_async_openai_client,
+                    OpenAIMiddlewareOptions(
+                        container_tag="user-123", custom_id="test-conv", add_memory="never"
+                    ),
+                )
+                await wrapped_client.chat.completions.create(
+                    model="gpt-4", messages=[{"role": "user", "content": "Hello"}]
+                )
+
+                timings = wrapped_client.last_timings
+                assert timings.retrieval_ms is not None
+                assert timings.llm_ms is not None
+                assert not timings.retrieval_timed_out
+
+
+class TestProfileCache:
+    """Test the TTL + LRU profile cache."""
+
+    def test_ttl_expiry_and_counters(self):
+        """Test that entries expire after the TTL and hits/misses are counted."""
+        cache = ProfileCache(ttl=60)
+        assert cache.get("user-1") is None
+        cache.set("user-1", "profile")
+        assert cache.get("user-1") == "profile"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        with patch("supermemory_openai.cache.time.monotonic", return_value=1e12):
+            assert cache.get("user-1") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = ProfileCache(max_entries=2)
+        cache.set("user-1", "a")
+        cache.set("user-2", "b")
+        cache.get("user-1")
+        cache.set("user-3", "c")
+
+        assert cache.get("user-2") is None
+        assert cache.get("user-1") == "a"
+        assert cache.get("user-3") == "c"
+
+    def test_invalidate_discards_racing_fetch(self):
+        """Test that a fetch started before a write is not stored after it."""
+        cache = ProfileCache()
+        version = cache.version("user-1")
+        cache.invalidate("user-1")
+        cache.set("user-1", "stale", version=version)
+        assert cache.get("user-1") is None
+
+    @pytest.mark.asyncio
+    async def test_profile_fetched_once_until_write(
+        self, mock_async_openai_client, mock_openai_response
+    ):
+        """Test that profile mode reuses the cached profile until a memory is written."""
+        from supermemory_openai.middleware import add_memory_tool
+
+        mock_async_openai_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
+        cache = ProfileCache()
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                mock_search.return_value = Mock()
+                mock_search.return_value.profile = {"static": ["Likes tea"], "dynamic": []}
+                mock_search.return_value.search_results = {"results": []}
+
+                wrapped_client = with_supermemory(
+                    mock_async_openai_client,
+                    OpenAIMiddlewareOptions(
+                        container_tag="user-123",
+                        custom_id="test-conv",
+                        add_memory="never",
+                        profile_cache=cache,
+                    ),
+                )
+                messages = [{"role": "user", "content": "Hello"}]
+
+                await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+                await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+                assert mock_search.call_count == 1
+                assert (cache.hits, cache.misses) == (1, 1)
+
+                supermemory_client = Mock()
+                supermemory_client.memories.add = AsyncMock(return_value=Mock(id="mem-1"))
+                await add_memory_tool(
+                    supermemory_client,
+                    "user-123",
+                    "I switched to coffee",
+                    None,
+                    wrapped_client._logger,
+                    profile_cache=cache,
+                )
+
+                await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+                assert mock_search.call_count == 2
+
+
+class TestQueryResultCache:
+    """Test the query result cache for mode="query"/"full"."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_and_rephrased_queries_reuse_results(
+        self, mock_async_openai_client, mock_openai_response
+    ):
+        """Test that close-enough queries skip the search."""
+        from supermemory_openai import QueryResultCache
+
+        mock_async_openai_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
+
+        def embed(text):
+            return [float("language" in text), float("weather" in text), 0.1]
+
+        cache = QueryResultCache(embedder=embed)
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                mock_search.return_value = Mock()
+                mock_search.return_value.profile = {"static": [], "dynamic": []}
+                mock_search.return_value.search_results = {"results": [{"memory": "Likes Rust"}]}
+
+                wrapped_client = with_supermemory(
+                    mock_async_openai_client,
+                    OpenAIMiddlewareOptions(
+                        container_tag="user-123",
+                        custom_id="test-conv",
+                        mode="query",
+                        add_memory="never",
+                        query_cache=cache,
+                    ),
+                )
+
+                for question in [
+                    "What's my favorite language?",
+                    "what's my favorite language",
+                    "Which language do I like best?",
+                    "How is the weather?",
+                ]:
+                    await wrapped_client.chat.completions.create(
+                        model="gpt-4", messages=[{"role": "user", "content": question}]
+                    )
+
+                assert mock_search.call_count == 2
+                assert (cache.hits, cache.semantic_hits) == (2, 1)
+
+    def test_invalidate_discards_racing_search(self):
+        """Test that a search started before a write is not stored after it."""
+        from supermemory_openai import QueryResultCache
+
+        cache = QueryResultCache()
+        cache.set("user-1", "favorite language", "old")
+        version = cache.version("user-1")
+        cache.invalidate("user-1")
+        cache.set("user-1", "favorite language", "stale", version=version)
+        assert cache.get("user-1", "favorite language") is None
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_cached_searches(
+        self, mock_async_openai_client, mock_openai_response
+    ):
+        """Test that a stored conversation turn is not answered from stale results."""
+        from supermemory_openai import QueryResultCache
+
+        mock_async_openai_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
+        cache = QueryResultCache()
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch(
+                "supermemory_openai.middleware.supermemory_profile_search"
+            ) as mock_search:
+                mock_search.return_value = Mock()
+                mock_search.return_value.profile = {
+                    "static": ["Likes tea"],
+                    "dynamic": [],
+                }
+                mock_search.return_value.search_results = {"results": []}
+
+                wrapped_client = with_supermemory(
+                    mock_async_openai_client,
+                    OpenAIMiddlewareOptions(
+                        container_tag="user-123",
+                        custom_id="test-conv",
+                        mode="full",
+                        add_memory="always",
+                        query_cache=cache,
+                    ),
+                )
+                messages = [{"role": "user", "content": "I switched to coffee"}]
+                search_counts = []
+
+                with patch.object(
+                    wrapped_client._transport,
+                    "add_memory",
+                    AsyncMock(return_value={"id": "mem-1"}),
+                ):
+                    for _ in range(3):
+                        await wrapped_client.chat.completions.create(
+                            model="gpt-4", messages=messages
+                        )
+                        await wrapped_client.wait_for_background_tasks()
+                        search_counts.append(mock_search.call_count)
+
+                assert search_counts == [1, 2, 2]
+
+
+class TestTransportConfiguration:
+    """Test that credentials and endpoint settings are resolved once."""
+
+    def test_api_key_from_options(self, mock_openai_client):
+        """Test that an explicit api_key does not need the environment."""
+        with patch.dict(os.environ, {}, clear=True):
+            wrapped_client = with_supermemory(
+                mock_openai_client,
+                OpenAIMiddlewareOptions(
+                    container_tag="user-123",
+                    custom_id="test-conv",
+                    api_key="explicit-key",
+                    base_url="https://memory.example.com/",
+                    timeout=5.0,
+                ),
+            )
+
+        transport = wrapped_client._transport
+        assert transport.api_key == "explicit-key"
+        assert transport.base_url == "https://memory.example.com"
+        assert transport.timeout == 5.0
+
+    @pytest.mark.asyncio
+    async def test_search_and_add_share_transport(self):
+        """Test that profile search and memory add go through the same configured transport."""
+        import sys
+        from supermemory_openai.middleware import add_memory_tool, supermemory_profile_search
+        from supermemory_openai.transport import SupermemoryHTTPTransport
+        from supermemory_openai.utils import create_logger
+
+        transport = SupermemoryHTTPTransport(
+            api_key="test-key", base_url="https://memory.example.com", timeout=5.0
+        )
+        session = transport.get_requests_session()
+        response = Mock(ok=True)
+        response.json.return_value = {"id": "doc-1", "status": "queued"}
+
+        with patch.dict(sys.modules, {"aiohttp": None}):
+            with patch.object(session, "post", return_value=response) as mock_post:
+                await supermemory_profile_search("user-123", "", "test-key", transport=transport)
+                await add_memory_tool(
+                    transport, "user-123", "User: hi", "conversation:1", create_logger(False)
+                )
+
+        search_call, add_call = mock_post.call_args_list
+        assert search_call[0][0] == "https://memory.example.com/v4/profile"
+        assert add_call[0][0] == "https://memory.example.com/v3/documents"
+        assert add_call[1]["json"] == {
+            "content": "User: hi",
+            "containerTags": ["user-123"],
+            "customId": "conversation:1",
+        }
+        assert add_call[1]["headers"]["Authorization"] == "Bearer test-key"
+        assert add_call[1]["timeout"] == 5.0
+        transport.close()
+
+    @pytest.mark.asyncio
+    async def test_wrappers_share_pooled_transport(self, mock_async_openai_client):
+        """Test that wrappers with the same settings share one transport from the pool."""
+        from supermemory_openai import SupermemoryClientPool
+
+        pool = SupermemoryClientPool()
+
+        def wrap(custom_id, timeout=30.0):
+            return with_supermemory(
+                mock_async_openai_client,
+                OpenAIMiddlewareOptions(
+                    container_tag="user-123",
+                    custom_id=custom_id,
+                    api_key="test-key",
+                    timeout=timeout,
+                    client_pool=pool,
+                ),
+            )
+
+        first, second, other = wrap("conv-1"), wrap("conv-2"), wrap("conv-3", 5.0)
+        assert first._transport is second._transport
+        assert other._transport is not first._transport
+
+        transport = first._transport
+        session = transport.get_aiohttp_session()
+        await first.__aexit__(None, None, None)
+        await first.__aexit__(None, None, None)
+        assert not session.closed
+        await second.__aexit__(None, None, None)
+        assert session.closed
+        await other.__aexit__(None, None, None)
+        assert pool._transports == {}
+
+
+class TestIncrementalMemoryWrites:
+    """Test that only new messages are uploaded for a conversation."""
+
+    @pytest.mark.asyncio
+    async def test_only_delta_is_uploaded(self, mock_async_openai_client, mock_openai_response):
+        """Test that each turn uploads only the messages added since the last write."""
+        mock_async_openai_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                with patch(
+                    "supermemory_openai.middleware.add_memory_tool", new_callable=AsyncMock
+                ) as mock_add_memory:
+                    mock_search.return_value = Mock()
+                    mock_search.return_value.profile = {"static": [], "dynamic": []}
+                    mock_search.return_value.search_results = {"results": []}
+
+                    wrapped_client = with_supermemory(
+                        mock_async_openai_client,
+                        OpenAIMiddlewareOptions(container_tag="user-123", custom_id="conv-1"),
+                    )
+
+                    messages = [{"role": "user", "content": "Hi, I'm Ada"}]
+                    await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+
+                    messages = messages + [
+                        {"role": "assistant", "content": "Hello Ada!"},
+                        {"role": "user", "content": "I like Rust"},
+                    ]
+                    await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+
+                    # Retrying the same request stores nothing new
+                    await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+
+                    # A trimmed history still resumes after the last stored message
+                    messages = messages[1:] + [{"role": "user", "content": "And Python"}]
+                    await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+                    await wrapped_client.wait_for_background_tasks()
+
+        contents = [call[0][2] for call in mock_add_memory.call_args_list]
+        assert contents == [
+            "User: Hi, I'm Ada",
+            "Assistant: Hello Ada!\n\nUser: I like Rust",
+            "User: And Python",
+        ]
+        assert {call[0][3] for call in mock_add_memory.call_args_list} == {"conversation:conv-1"}
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_retried_on_next_call(
+        self, mock_async_openai_client, mock_openai_response
+    ):
+        """Test that messages of a failed write are uploaded again with the next turn."""
+        from supermemory_openai import SupermemoryNetworkError
+
+        mock_async_openai_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
+        contents = []
+
+        async def flaky_add_memory(*args, **kwargs):
+            contents.append(args[2])
+            if len(contents) == 1:
+                raise SupermemoryNetworkError("connection reset")
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                with patch(
+                    "supermemory_openai.middleware.add_memory_tool",
+                    side_effect=flaky_add_memory,
+                ):
+                    mock_search.return_value = Mock()
+                    mock_search.return_value.profile = {"static": [], "dynamic": []}
+                    mock_search.return_value.search_results = {"results": []}
+
+                    wrapped_client = with_supermemory(
+                        mock_async_openai_client,
+                        OpenAIMiddlewareOptions(container_tag="user-123", custom_id="conv-1"),
+                    )
+
+                    messages = [{"role": "user", "content": "Hi, I'm Ada"}]
+                    await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+                    await wrapped_client.wait_for_background_tasks()
+
+                    messages = messages + [
+                        {"role": "assistant", "content": "Hello Ada!"},
+                        {"role": "user", "content": "I like Rust"},
+                    ]
+                    await wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+                    await wrapped_client.wait_for_background_tasks()
+
+        assert contents == [
+            "User: Hi, I'm Ada",
+            "User: Hi, I'm Ada\n\nAssistant: Hello Ada!\n\nUser: I like Rust",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_never_upload_a_message_twice(
+        self, mock_async_openai_client, mock_openai_response
+    ):
+        """Test that a failed write overlapping a later one does not resend its delta."""
+        from supermemory_openai import SupermemoryNetworkError
+
+        mock_async_openai_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
+        release = asyncio.Event()
+        contents = []
+
+        async def add_memory(*args, **kwargs):
+            contents.append(args[2])
+            if len(contents) == 1:
+                await release.wait()
+                raise SupermemoryNetworkError("connection reset")
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch(
+                "supermemory_openai.middleware.supermemory_profile_search"
+            ) as mock_search:
+                with patch(
+                    "supermemory_openai.middleware.add_memory_tool",
+                    side_effect=add_memory,
+                ):
+                    mock_search.return_value = Mock()
+                    mock_search.return_value.profile = {"static": [], "dynamic": []}
+                    mock_search.return_value.search_results = {"results": []}
+
+                    wrapped_client = with_supermemory(
+                        mock_async_openai_client,
+                        OpenAIMiddlewareOptions(
+                            container_tag="user-123", custom_id="conv-1"
+                        ),
+                    )
+
+                    messages = [{"role": "user", "content": "first"}]
+                    await wrapped_client.chat.completions.create(
+                        model="gpt-4", messages=messages
+                    )
+                    messages = messages + [{"role": "user", "content": "second"}]
+                    await wrapped_client.chat.completions.create(
+                        model="gpt-4", messages=messages
+                    )
+                    await asyncio.sleep(0)
+
+                    release.set()
+                    await wrapped_client.wait_for_background_tasks()
+
+                    messages = messages + [{"role": "user", "content": "third"}]
+                    await wrapped_client.chat.completions.create(
+                        model="gpt-4", messages=messages
+                    )
+                    await wrapped_client.wait_for_background_tasks()
+
+        assert contents == ["User: first", "User: first\n\nUser: second", "User: third"]
+
+    def test_dropped_sync_write_is_retried_on_next_call(
+        self, mock_openai_client, mock_openai_response
+    ):
+        """Test that a write dropped by a full queue is uploaded with the next turn."""
+        mock_openai_client.chat.completions.create = Mock(return_value=mock_openai_response)
+        release = asyncio.Event()
+        contents = []
+
+        async def add_memory(*args, **kwargs):
+            contents.append(args[2])
+            if len(contents) == 1:
+                await release.wait()
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                with patch(
+                    "supermemory_openai.middleware.add_memory_tool", side_effect=add_memory
+                ):
+                    mock_search.return_value = Mock()
+                    mock_search.return_value.profile = {"static": [], "dynamic": []}
+                    mock_search.return_value.search_results = {"results": []}
+
+                    with with_supermemory(
+                        mock_openai_client,
+                        OpenAIMiddlewareOptions(
+                            container_tag="user-123",
+                            custom_id="conv-1",
+                            sync_write_queue_size=1,
+                            sync_write_on_full="drop",
+                        ),
+                    ) as wrapped_client:
+                        messages = [{"role": "user", "content": "first"}]
+                        wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+
+                        # The queue is busy with the first write, so this one is dropped
+                        messages = messages + [{"role": "user", "content": "second"}]
+                        wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+                        assert wrapped_client._write_queue.dropped_count == 1
+
+                        wrapped_client._background_loop.loop.call_soon_threadsafe(release.set)
+                        assert wrapped_client.flush(timeout=5.0)
+
+                        messages = messages + [{"role": "user", "content": "third"}]
+                        wrapped_client.chat.completions.create(model="gpt-4", messages=messages)
+                        assert wrapped_client.flush(timeout=5.0)
+
+        assert contents == ["User: first", "User: second\n\nUser: third"]
+
+
+class TestBatchedWrites:
+    """Test batched memory uploads through a shared writer."""
+
+    @pytest.mark.asyncio
+    async def test_writes_from_many_wrappers_share_one_batch(
+        self, mock_async_openai_client, mock_openai_response
+    ):
+        """Test that concurrent conversations are uploaded with one batch request."""
+        from supermemory_openai import BatchWriter, SupermemoryHTTPTransport
+
+        mock_async_openai_client.chat.completions.create = AsyncMock(
+            return_value=mock_openai_response
+        )
+        transport = SupermemoryHTTPTransport(api_key="test-key")
+        writer = BatchWriter.for_transport(transport, flush_interval=0.01)
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                with patch.object(
+                    transport,
+                    "post",
+                    new_callable=AsyncMock,
+                    return_value={"results": [{"id": "a", "status": "queued"}] * 3},
+                ) as mock_post:
+                    mock_search.return_value = Mock()
+                    mock_search.return_value.profile = {"static": [], "dynamic": []}
+                    mock_search.return_value.search_results = {"results": []}
+
+                    wrappers = [
+                        with_supermemory(
+                            mock_async_openai_client,
+                            OpenAIMiddlewareOptions(
+                                container_tag=f"user-{i}",
+                                custom_id=f"conv-{i}",
+                                batch_writer=writer,
+                            ),
+                        )
+                        for i in range(3)
+                    ]
+                    for wrapper in wrappers:
+                        await wrapper.chat.completions.create(
+                            model="gpt-4", messages=[{"role": "user", "content": "Hi"}]
+                        )
+                    for wrapper in wrappers:
+                        await wrapper.wait_for_background_tasks()
+                    await writer.aclose()
+
+        mock_post.assert_called_once()
+        path, payload = mock_post.call_args[0]
+        assert path == "/v3/documents/batch"
+        assert sorted(doc["customId"] for doc in payload["documents"]) == [
+            "conversation:conv-0",
+            "conversation:conv-1",
+            "conversation:conv-2",
+        ]
+        assert all(
+            doc["containerTags"] == [f"user-{doc['customId'][-1]}"] for doc in payload["documents"]
+        )
+
+
+class TestMemoryTokenBudget:
+    """Test the max_memory_tokens cap on injected memories."""
+
+    def test_truncation_keeps_priority_prefix(self):
+        """Test that memories are kept in priority order until the budget is full."""
+        from supermemory_openai import (
+            DeduplicatedMemories,
+            estimate_tokens,
+            limit_memories_to_token_budget,
+            rank_search_results,
+        )
+
+        memories = DeduplicatedMemories(
+            static=["Prefers Python"],
+            dynamic=["Planning a trip to Lisbon"],
+            search_results=["Booked a flight", "Likes window seats"],
+        )
+        budget = estimate_tokens("- Prefers Python\n") + estimate_tokens(
+            "- Planning a trip to Lisbon\n"
+        )
+
+        kept, kept_tokens, dropped_tokens = limit_memories_to_token_budget(memories, budget)
+
+        assert kept.static == ["Prefers Python"]
+        assert kept.dynamic == ["Planning a trip to Lisbon"]
+        assert kept.search_results == []
+        assert kept_tokens == budget
+        assert dropped_tokens > 0
+        assert rank_search_results(
+            [{"memory": "a", "similarity": 0.2}, {"memory": "b", "similarity": 0.9}, {"memory": "c"}]
+        ) == [{"memory": "b", "similarity": 0.9}, {"memory": "a", "similarity": 0.2}, {"memory": "c"}]
+
+    def test_render_budget_renders_once_per_section(self):
+        """Test that a large budget check renders each section header only once."""
+        from supermemory_openai import (
+            DeduplicatedMemories,
+            estimate_tokens,
+            limit_memories_to_token_budget,
+        )
+        from supermemory_openai.middleware import render_memory_blocks
+
+        memories = DeduplicatedMemories(
+            static=[f"Static fact {i}" for i in range(500)],
+            dynamic=[f"Dynamic fact {i}" for i in range(500)],
+            search_results=[f"Search result {i}" for i in range(500)],
+        )
+        calls = []
+
+        def render(kept):
+            calls.append(kept)
+            return render_memory_blocks(kept, "full").text
+
+        kept, kept_tokens, _ = limit_memories_to_token_budget(memories, 6000, render)
+
+        assert len(calls) == 3
+        assert 0 < len(kept.search_results) < 500
+        assert kept_tokens == estimate_tokens(render_memory_blocks(kept, "full").text)
+        assert kept_tokens <= 6000
+
+    @pytest.mark.asyncio
+    async def test_budget_limits_injected_memories(
+        self, mock_async_openai_client, mock_openai_response
+    ):
+        """Test that the budget drops the least relevant search results first."""
+        from supermemory_openai import estimate_tokens
+
+        original_create = AsyncMock(return_value=mock_openai_response)
+        mock_async_openai_client.chat.completions.create = original_create
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                mock_search.return_value = Mock()
+                mock_search.return_value.profile = {"static": ["Prefers Python"], "dynamic": []}
+                mock_search.return_value.search_results = {
+                    "results": [
+                        {"memory": "Mentioned the weather once", "similarity": 0.3},
+                        {"memory": "Favorite language is Rust", "similarity": 0.95},
+                    ]
+                }
+
+                wrapped_client = with_supermemory(
+                    mock_async_openai_client,
+                    OpenAIMiddlewareOptions(
+                        container_tag="user-123",
+                        custom_id="test-conv",
+                        mode="full",
+                        add_memory="never",
+                        max_memory_tokens=30,
+                    ),
+                )
+                await wrapped_client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[{"role": "user", "content": "What's my favorite language?"}],
+                )
+
+                system_prompt = original_create.call_args.kwargs["messages"][0]["content"]
+                # Section headers count against the budget, not just memory lines
+                assert estimate_tokens(system_prompt) <= 30
+                assert "Prefers Python" in system_prompt
+                assert "Favorite language is Rust" in system_prompt
+                assert "weather" not in system_prompt
+
+                timings = wrapped_client.last_timings
+                assert timings.memory_tokens > 0
+                assert timings.memory_tokens_dropped > 0
+
+
+class TestCacheFriendlyPlacement:
+    """Test memory placement that keeps the system prompt prefix stable."""
+
+    @pytest.mark.asyncio
+    async def test_system_prompt_untouched_and_memories_split(
+        self, mock_async_openai_client, mock_openai_response
+    ):
+        """Test that the static profile is stable and volatile memories go late."""
+        original_create = AsyncMock(return_value=mock_openai_response)
+        mock_async_openai_client.chat.completions.create = original_create
+
+        with patch.dict(os.environ, {"SUPERMEMORY_API_KEY": "test-key"}):
+            with patch("supermemory_openai.middleware.supermemory_profile_search") as mock_search:
+                mock_search.return_value = Mock()
+                mock_search.return_value.search_results = {"results": [{"memory": "Likes Rust"}]}
+
+                wrapped_client = with_supermemory(
+                    mock_async_openai_client,
+                    OpenAIMiddlewareOptions(
+                        container_tag="user-123",
+                        custom_id="test-conv",
+                        mode="full",
+                        add_memory="never",
+                        memory_placement="cache_friendly",
+                    ),
+                )
+
+                sent = []
+                for static in (["Lives in Berlin", "Prefers Python"], ["Prefers Python", "Lives in Berlin"]):
+                    mock_search.return_value.profile = {"static": static, "dynamic": ["Planning a trip"]}
+                    await wrapped_client.chat.completions.create(
+                        model="gpt-4",
+                        messages=[
+                            {"role": "system", "content": "You are helpful."},
+                            {"role": "user", "content": "Hi"},
+                            {"role": "assistant", "content": "Hello!"},
+                            {"role": "user", "content": "What should I learn?"},
+                        ],
+                    )
+                    sent.append(original_create.call_args.kwargs["messages"])
+
+                first = sent[0]
+                assert first[0] == {"role": "system", "content": "You are helpful."}
+                assert first[1]["role"] == "system"
+                assert "Prefers Python" in first[1]["content"]
+                assert "Planning a trip" not in first[1]["content"]
+                assert [m["role"] for m in first[2:]] == ["user", "assistant", "system", "user"]
+                assert "Planning a trip" in first[4]["content"]
+                assert "Likes Rust" in first[4]["content"]
+                # Reordered static facts render to identical bytes
+                assert sent[1][:4] == first[:4]
@@ -1,5 +1,6 @@
 """Tests for tools module."""
 
+import asyncio
 import os
 from dotenv import load_dotenv
 import pytest
@@ -390,3 +391,173 @@ class TestOpenAIIntegration:
 
             content = json.loads(result["content"])
             assert "success" in content
+
+
+class TestClientPool:
+    """Test sharing of pooled Supermemory clients."""
+
+    @pytest.mark.asyncio
+    async def test_tools_share_client_until_last_release(self):
+        """Tools with the same key share one client, closed after the last release."""
+        from supermemory_openai.client_pool import SupermemoryClientPool
+
+        pool = SupermemoryClientPool(http2=False)
+        tools = SupermemoryTools("pool-key", client_pool=pool)
+        other = SupermemoryTools("pool-key", {"project_id": "other"}, client_pool=pool)
+
+        assert tools.client is other.client
+        assert len(pool) == 1
+
+        http_client = pool._clients[("pool-key", None, asyncio.get_running_loop())][1]
+        await tools.aclose()
+        await tools.aclose()
+        assert not http_client.is_closed
+        await other.aclose()
+        assert http_client.is_closed
+        assert len(pool) == 0
+
+
+class TestMemoryToolExecutor:
+    """Test the cached, bounded tool executor."""
+
+    @pytest.mark.asyncio
+    async def test_reuses_tools_and_bounds_concurrency(self):
+        """Tools are cached per configuration and calls run at most max_concurrency at once."""
+        import asyncio
+        from unittest.mock import patch
+
+        from supermemory_openai import MemoryToolExecutor
+        from supermemory_openai.client_pool import SupermemoryClientPool
+
+        running = 0
+        peak = 0
+
+        async def fake_execute(self, tool_call):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return json.dumps({"success": True, "id": tool_call.id})
+
+        pool = SupermemoryClientPool(http2=False)
+        executor = MemoryToolExecutor(max_concurrency=2, client_pool=pool)
+        tool_calls = [
+            ChatCompletionMessageToolCall(
+                id=f"call_{i}",
+                type="function",
+                function={
+                    "name": "add_memory",
+                    "arguments": json.dumps({"memory": "x"}),
+                },
+            )
+            for i in range(5)
+        ]
+
+        with patch.object(SupermemoryTools, "execute_tool_call", fake_execute):
+            results = await executor.execute(
+                "exec-key", tool_calls, {"project_id": "p"}
+            )
+            await executor.execute("exec-key", tool_calls[:1], {"project_id": "p"})
+
+        assert [r["tool_call_id"] for r in results] == [f"call_{i}" for i in range(5)]
+        assert peak == 2
+        assert executor.tools_for(
+            "exec-key", {"project_id": "p"}
+        ) is executor.tools_for("exec-key", {"project_id": "p"})
+        assert executor.tools_for(
+            "exec-key", {"project_id": "q"}
+        ) is not executor.tools_for("exec-key", {"project_id": "p"})
+
+        await executor.aclose()
+        assert len(pool) == 0
+
+    @pytest.mark.asyncio
+    async def test_coalesces_duplicate_searches(self):
+        """Searches for the same question share one request, sliced to each limit."""
+        from unittest.mock import patch
+
+        from supermemory_openai import MemoryToolExecutor
+        from supermemory_openai.client_pool import SupermemoryClientPool
+
+        requests = []
+
+        async def fake_search(
+            self, information_to_get, include_full_docs=True, limit=10
+        ):
+            requests.append((information_to_get, include_full_docs, limit))
+            results = [{"memory": f"m{i}"} for i in range(limit)]
+            return {"success": True, "results": results, "count": len(results)}
+
+        def search_call(call_id, **args):
+            return ChatCompletionMessageToolCall(
+                id=call_id,
+                type="function",
+                function={"name": "search_memories", "arguments": json.dumps(args)},
+            )
+
+        executor = MemoryToolExecutor(client_pool=SupermemoryClientPool(http2=False))
+        tool_calls = [
+            search_call("a", information_to_get="User's favorite food?", limit=3),
+            search_call("b", information_to_get="user's favorite  food", limit=5),
+            search_call(
+                "c", information_to_get="user's favorite food", include_full_docs=False
+            ),
+            search_call("d", information_to_get="Where does the user live?"),
+        ]
+
+        with patch.object(SupermemoryTools, "search_memories", fake_search):
+            results = await executor.execute("coalesce-key", tool_calls)
+        await executor.aclose()
+
+        assert sorted(requests) == [
+            ("User's favorite food?", True, 5),
+            ("Where does the user live?", True, 10),
+            ("user's favorite food", False, 10),
+        ]
+        counts = [json.loads(r["content"])["count"] for r in results]
+        assert counts == [3, 5, 10, 10]
+        assert executor.coalesced_searches == 1
+
+    def test_executor_survives_several_event_loops(self):
+        """One executor serves calls from successive asyncio.run() loops."""
+        from unittest.mock import patch
+
+        from supermemory_openai import MemoryToolExecutor
+        from supermemory_openai.client_pool import SupermemoryClientPool
+
+        async def fake_search(
+            self, information_to_get, include_full_docs=True, limit=10
+        ):
+            await asyncio.sleep(0)
+            return {"success": True, "results": [], "count": 0}
+
+        pool = SupermemoryClientPool(http2=False)
+        executor = MemoryToolExecutor(max_concurrency=4, client_pool=pool)
+        tool_calls = [
+            ChatCompletionMessageToolCall(
+                id=f"call_{i}",
+                type="function",
+                function={
+                    "name": "search_memories",
+                    "arguments": json.dumps({"information_to_get": f"question {i}"}),
+                },
+            )
+            for i in range(20)
+        ]
+
+        clients = []
+
+        async def run_batch():
+            results = await executor.execute("loop-key", tool_calls)
+            clients.append(executor.tools_for("loop-key").client)
+            return results
+
+        with patch.object(SupermemoryTools, "search_memories", fake_search):
+            for _ in range(3):
+                assert len(asyncio.run(run_batch())) == 20
+
+        # Each loop got its own client; those of closed loops were dropped
+        assert len({id(client) for client in clients}) == 3
+        assert len(executor._loops) == 1
+        assert len(pool) == 1
@@ -0,0 +1,52 @@
+"""Micro-benchmark: per-turn cost of rendering the injected memory block.
+
+Compares ``format_memories_to_text`` with a reused ``MemoryRenderer`` for
+profiles of 10, 100 and 1000 memories.
+
+Run with:
+    python benchmarks/render_memories.py
+"""
+
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from supermemory_pipecat.utils import MemoryRenderer, format_memories_to_text
+
+
+def build_memories(count: int) -> dict:
+    now = datetime.now(timezone.utc)
+    per_section = max(1, count // 3)
+    return {
+        "static": [f"Static fact {i}" for i in range(per_section)],
+        "dynamic": [f"Recent context {i}" for i in range(per_section)],
+        "search_results": [
+            {
+                "memory": f"Search memory {i}",
+                "updatedAt": (now - timedelta(hours=i % 200)).isoformat(),
+            }
+            for i in range(count - 2 * per_section)
+        ],
+    }
+
+
+def main() -> None:
+    print(f"{'memories':>8}  {'format_memories_to_text':>24}  {'MemoryRenderer':>15}  speedup")
+    for count in (10, 100, 1000):
+        memories = build_memories(count)
+        renderer = MemoryRenderer()
+        renderer.render(memories)
+
+        number = max(10, 20_000 // count)
+        baseline = timeit.timeit(lambda: format_memories_to_text(memories), number=number)
+        cached = timeit.timeit(lambda: renderer.render(memories), number=number)
+
+        baseline_us = baseline / number * 1e6
+        cached_us = cached / number * 1e6
+        print(
+            f"{count:>8}  {baseline_us:>21.1f} us  {cached_us:>12.1f} us  "
+            f"{baseline_us / cached_us:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,9 @@ Example:
     ```
 """
 
+from .batching import BatchWriter
+from .cache import QueryResultCache, normalize_query
+from .client_pool import SupermemoryClientPool, get_client_pool
 from .exceptions import (
     APIError,
     ConfigurationError,
@@ -33,11 +36,15 @@ from .exceptions import (
     NetworkError,
     SupermemoryPipecatError,
 )
-from .service import SupermemoryPipecatService
+from .service import SupermemoryPipecatService, SupermemoryPrefetchProcessor
 from .utils import (
+    MemoryRenderer,
     deduplicate_memories,
+    estimate_tokens,
     format_memories_to_text,
+    format_transcript,
     get_last_user_message,
+    limit_memories_to_token_budget,
 )
 
 __version__ = "0.1.1"
@@ -45,6 +52,14 @@ __version__ = "0.1.1"
 __all__ = [
     # Main service
     "SupermemoryPipecatService",
+    "SupermemoryPrefetchProcessor",
+    # Caching
+    "QueryResultCache",
+    # Batching
+    "BatchWriter",
+    # Connections
+    "SupermemoryClientPool",
+    "get_client_pool",
     # Exceptions
     "SupermemoryPipecatError",
     "ConfigurationError",
@@ -54,6 +69,11 @@ __all__ = [
     "NetworkError",
     # Utilities
     "get_last_user_message",
+    "MemoryRenderer",
     "deduplicate_memories",
+    "estimate_tokens",
+    "limit_memories_to_token_budget",
     "format_memories_to_text",
+    "format_transcript",
+    "normalize_query",
 ]
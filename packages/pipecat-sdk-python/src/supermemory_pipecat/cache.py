@@ -0,0 +1,173 @@
+"""Local caching of Supermemory search results for Pipecat pipelines."""
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+_NON_WORD_PATTERN = re.compile(r"[^\w\s]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+_Key = Tuple[str, str, Hashable]
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups: lowercase, no punctuation, single spaces."""
+    query = _NON_WORD_PATTERN.sub(" ", query.lower())
+    return _WHITESPACE_PATTERN.sub(" ", query).strip()
+
+
+def _cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class QueryResultCache:
+    """TTL + LRU cache of search results keyed by (container_tag, normalized query).
+
+    Repeated questions are served locally. When an ``embedder`` is given, a
+    miss on the exact key falls back to the most similar cached query for the
+    same container tag, so rephrased questions can reuse earlier results.
+    Results are also keyed by the search ``settings`` they were fetched with,
+    so agents sharing a cache with different limits never see each other's.
+
+    Example:
+        ```python
+        cache = QueryResultCache(ttl=300, embedder=my_local_model.embed)
+        ```
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_entries: int = 1000,
+        embedder: Optional[Callable[[str], Sequence[float]]] = None,
+        similarity_threshold: float = 0.9,
+    ):
+        """Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry stays valid after it was stored.
+            max_entries: Maximum number of cached queries across all container tags.
+            embedder: Optional local, synchronous function mapping text to a vector.
+                It runs on every lookup, so it should be fast.
+            similarity_threshold: Minimum cosine similarity for a semantic hit.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        # (container_tag, normalized query, settings) -> (stored_at, value, embedding)
+        self._entries: "OrderedDict[_Key, Tuple[float, Any, Optional[List[float]]]]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[_Key]] = {}
+        self._last_embedding: Optional[Tuple[str, List[float]]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, container_tag: str, query: str, settings: Hashable = None) -> Optional[Any]:
+        """Return cached results for a query, or None on a miss.
+
+        Args:
+            container_tag: Container tag the query was searched in.
+            query: The search query.
+            settings: Search settings the results depend on, e.g. ``(limit, threshold)``.
+        """
+        key = (container_tag, normalize_query(query), settings)
+        now = time.monotonic()
+
+        with self._lock:
+            value = self._get_fresh(key, now)
+            if value is not None:
+                self.hits += 1
+                return value
+
+            if self.embedder is None:
+                self.misses += 1
+                return None
+
+        embedding = self._embed(key[1])
+
+        with self._lock:
+            best_key, best_score = None, self.similarity_threshold
+            for candidate in list(self._keys_by_tag.get(container_tag, ())):
+                entry = self._entries.get(candidate)
+                if candidate[2] != settings or entry is None or entry[2] is None:
+                    continue
+                if now - entry[0] > self.ttl:
+                    self._remove(candidate)
+                    continue
+                score = _cosine_similarity(embedding, entry[2])
+                if score >= best_score:
+                    best_key, best_score = candidate, score
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            self.semantic_hits += 1
+            return self._entries[best_key][1]
+
+    def set(self, container_tag: str, query: str, value: Any, settings: Hashable = None) -> None:
+        """Store the results of a query fetched with the given search settings."""
+        key = (container_tag, normalize_query(query), settings)
+        embedding = self._embed(key[1]) if self.embedder is not None else None
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value, embedding)
+            self._entries.move_to_end(key)
+            self._keys_by_tag.setdefault(container_tag, set()).add(key)
+            while len(self._entries) > max(1, self.max_entries):
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, container_tag: str) -> None:
+        """Drop every cached query for a container tag, e.g. after a write."""
+        with self._lock:
+            for key in list(self._keys_by_tag.get(container_tag, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Drop every cached query and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+            self._last_embedding = None
+            self.hits = self.semantic_hits = self.misses = 0
+
+    def _get_fresh(self, key: _Key, now: float) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[0] > self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _remove(self, key: _Key) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_tag.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[key[0]]
+
+    def _embed(self, normalized_query: str) -> List[float]:
+        # get() and set() embed the same query back to back on a miss
+        last = self._last_embedding
+        if last is not None and last[0] == normalized_query:
+            return last[1]
+        embedding = list(self.embedder(normalized_query))  # type: ignore[misc]
+        self._last_embedding = (normalized_query, embedding)
+        return embedding
@@ -6,22 +6,39 @@ historical information.
 """
 
 import asyncio
-import json
 import os
 import re
-from typing import Any, Dict, List, Literal, Optional
+import time
+from typing import Any, Dict, List, Literal, Optional, Set, Tuple
 
 from loguru import logger
-from pydantic import BaseModel, Field
-
-from pipecat.frames.frames import Frame, InputAudioRawFrame, LLMContextFrame, LLMMessagesFrame
-from pipecat.processors.aggregators.llm_context import LLMContext
+from pipecat.frames.frames import (
+    CancelFrame,
+    EndFrame,
+    Frame,
+    InputAudioRawFrame,
+    InterimTranscriptionFrame,
+    LLMContextFrame,
+    LLMMessagesFrame,
+    MetricsFrame,
+    TranscriptionFrame,
+)
+from pipecat.metrics.metrics import ProcessingMetricsData
 from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContextFrame
 from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
 from pydantic import BaseModel, Field
 
+from .batching import BatchWriter
+from .cache import QueryResultCache, normalize_query
+from .client_pool import SupermemoryClientPool, get_client_pool
 from .exceptions import ConfigurationError, MemoryRetrievalError
-from .utils import deduplicate_memories, format_memories_to_text, get_last_user_message
+from .utils import (
+    MemoryRenderer,
+    deduplicate_memories,
+    estimate_tokens,
+    format_transcript,
+    limit_memories_to_token_budget,
+)
 
 try:
     import supermemory
@@ -32,6 +49,95 @@ except ImportError:
 MEMORY_TAG_START = "<user_memories>"
 MEMORY_TAG_END = "</user_memories>"
 MEMORY_TAG_PATTERN = re.compile(r"<user_memories>.*?</user_memories>", re.DOTALL)
+PROFILE_TAG_START = "<user_profile>"
+PROFILE_TAG_END = "</user_profile>"
+
+
+def _is_memory_message(msg: Any) -> bool:
+    return (
+        isinstance(msg, dict)
+        and msg.get("role") == "user"
+        and MEMORY_TAG_START in str(msg.get("content", ""))
+    )
+
+
+class _MessageIndex:
+    """Incremental index over a conversation's message list.
+
+    Positions are kept across frames so each frame only scans the messages
+    appended since the previous one. If the list no longer extends the indexed
+    one (a new conversation, a truncated context), it is re-indexed from scratch.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.scanned = 0
+        self.tail: Any = None
+        self.last_user: Optional[int] = None
+        self.memory: Optional[int] = None
+        self.storable = 0
+
+    def update(self, messages: List[Any]) -> None:
+        """Index the messages appended since the last update."""
+        if self.scanned and (
+            len(messages) < self.scanned
+            or not (
+                messages[self.scanned - 1] is self.tail or messages[self.scanned - 1] == self.tail
+            )
+            or (self.memory is not None and not _is_memory_message(messages[self.memory]))
+        ):
+            self.reset()
+
+        for i in range(self.scanned, len(messages)):
+            msg = messages[i]
+            if not isinstance(msg, dict):
+                continue
+            role = msg.get("role")
+            if _is_memory_message(msg):
+                self.memory = i
+            elif role == "user":
+                self.last_user = i
+                self.storable += 1
+            elif role == "assistant":
+                self.storable += 1
+
+        self.scanned = len(messages)
+        self.tail = messages[-1] if messages else None
+
+    def last_user_message(self, messages: List[Any]) -> Optional[str]:
+        if self.last_user is None:
+            return None
+        return messages[self.last_user]["content"]
+
+    def remove_memory_message(self, messages: List[Any]) -> None:
+        if self.memory is None:
+            return
+        messages.pop(self.memory)
+        if self.last_user is not None and self.last_user > self.memory:
+            self.last_user -= 1
+        self.memory = None
+        self.scanned -= 1
+        self.tail = messages[self.scanned - 1] if self.scanned else None
+
+    def unsent_messages(self, messages: List[Any], sent_count: int) -> List[Dict[str, Any]]:
+        """Return the user/assistant messages after the first ``sent_count``."""
+        remaining = self.storable - sent_count
+        unsent: List[Dict[str, Any]] = []
+        for i in range(self.scanned - 1, -1, -1):
+            if remaining <= 0:
+                break
+            msg = messages[i]
+            if (
+                isinstance(msg, dict)
+                and msg.get("role") in ("user", "assistant")
+                and not _is_memory_message(msg)
+            ):
+                unsent.append(msg)
+                remaining -= 1
+        unsent.reverse()
+        return unsent
 
 
 class SupermemoryPipecatService(FrameProcessor):
@@ -59,14 +165,44 @@ class SupermemoryPipecatService(FrameProcessor):
             search_threshold: Minimum similarity threshold (0.0-1.0).
             system_prompt: Prefix text for memory context.
             mode: Memory retrieval mode - "profile", "query", or "full".
-            inject_mode: How to inject memories - "auto", "system", or "user".
+            inject_mode: How to inject memories - "auto", "system", "user", or
+                "cache_friendly". "cache_friendly" leaves the system prompt
+                untouched: the static profile goes in its own system message
+                after it, and the rest in a user message at the end.
+            prefetch: Start memory retrieval from transcription frames, before
+                the context frame arrives. Off by default; it only takes effect
+                with the processor from ``create_prefetch_processor`` in the
+                pipeline.
+            prefetch_stable_ms: How long an interim transcription must stay
+                unchanged before it is used for a speculative prefetch.
+            retrieval_timeout_ms: Maximum time a context frame waits for memory
+                retrieval. Past it, the last retrieved memories are injected and
+                the retrieval finishes in the background for the next turn.
+                None waits for the retrieval however long it takes.
+            store_debounce_ms: How long new messages are collected before they
+                are stored, so the frames of one turn become a single write.
+            max_in_flight_writes: Maximum concurrent store requests. While all
+                are busy, new messages keep buffering into the next write.
+            drain_timeout_ms: How long an EndFrame or CancelFrame waits for
+                pending writes before they are cancelled.
+            max_memory_tokens: Estimated token cap for the injected memory text,
+                including the system prompt, section headers and memory tags.
+                Static facts are kept first, then dynamic facts, then search
+                results by descending similarity. None injects everything.
         """
 
         search_limit: int = Field(default=10, ge=1)
         search_threshold: float = Field(default=0.1, ge=0.0, le=1.0)
         system_prompt: str = Field(default="Based on previous conversations, I recall:\n\n")
         mode: Literal["profile", "query", "full"] = Field(default="full")
-        inject_mode: Literal["auto", "system", "user"] = Field(default="auto")
+        inject_mode: Literal["auto", "system", "user", "cache_friendly"] = Field(default="auto")
+        prefetch: bool = Field(default=False)
+        prefetch_stable_ms: int = Field(default=300, ge=0)
+        retrieval_timeout_ms: Optional[int] = Field(default=2000, ge=1)
+        store_debounce_ms: int = Field(default=1000, ge=0)
+        max_in_flight_writes: int = Field(default=4, ge=1)
+        drain_timeout_ms: int = Field(default=5000, ge=0)
+        max_memory_tokens: Optional[int] = Field(default=None, ge=1)
 
     def __init__(
         self,
@@ -76,6 +212,9 @@ class SupermemoryPipecatService(FrameProcessor):
         session_id: Optional[str] = None,
         params: Optional[InputParams] = None,
         base_url: Optional[str] = None,
+        query_cache: Optional[QueryResultCache] = None,
+        batch_writer: Optional[BatchWriter] = None,
+        client_pool: Optional[SupermemoryClientPool] = None,
     ):
         """Initialize the Supermemory Pipecat service.
 
@@ -85,6 +224,13 @@ class SupermemoryPipecatService(FrameProcessor):
             session_id: Session/conversation ID for grouping memories.
             params: Configuration parameters for memory retrieval.
             base_url: Optional custom base URL for Supermemory API.
+            query_cache: Optional local cache of search results, so repeated or
+                rephrased questions skip the API round-trip.
+            batch_writer: Optional batch writer; stored messages are buffered and
+                uploaded together with other writes instead of one request each.
+            client_pool: Pool the API client is taken from. Defaults to the
+                process-wide pool, so services with the same API key and base
+                URL share connections.
 
         Raises:
             ConfigurationError: If API key is missing or user_id not provided.
@@ -104,20 +250,206 @@ class SupermemoryPipecatService(FrameProcessor):
         self.container_tag = user_id
         self.session_id = session_id
         self.params = params or SupermemoryPipecatService.InputParams()
+        self.query_cache = query_cache
+        self.batch_writer = batch_writer
 
+        self._client_pool = client_pool if client_pool is not None else get_client_pool()
         self._supermemory_client = None
         if supermemory is not None:
             try:
-                self._supermemory_client = supermemory.AsyncSupermemory(
-                    api_key=self.api_key,
-                    base_url=base_url,
-                )
+                self._supermemory_client = self._client_pool.acquire(self.api_key, base_url)
             except Exception as e:
                 logger.warning(f"Failed to initialize Supermemory client: {e}")
 
         self._messages_sent_count: int = 0
         self._last_query: Optional[str] = None
         self._audio_frames_detected: bool = False
+        self._message_index = _MessageIndex()
+        self._renderer = MemoryRenderer()
+        # Renders candidate memory sets while applying max_memory_tokens, so the
+        # trial renders do not evict the cached sections of the injected text
+        self._budget_renderer = MemoryRenderer()
+        # Estimated tokens of injected memories, and of memories cut by the budget
+        self.memory_tokens_injected: int = 0
+        self.memory_tokens_dropped: int = 0
+
+        # Messages waiting for the next coalesced write, and the tasks storing them
+        self._pending_store: List[Dict[str, Any]] = []
+        self._store_flush_task: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._write_slots = asyncio.Semaphore(self.params.max_in_flight_writes)
+        self._writes_in_flight: int = 0
+
+        # Speculative retrieval started from transcriptions of the current turn
+        self._transcript_parts: List[str] = []
+        self._prefetch_task: Optional[asyncio.Task] = None
+        self._prefetch_query: Optional[str] = None
+        self._prefetch_started_at: float = 0.0
+        self._prefetch_finished_at: Optional[float] = None
+        self._interim_timer: Optional[asyncio.TimerHandle] = None
+        self.prefetch_hits: int = 0
+        self.prefetch_misses: int = 0
+        self.last_prefetch_saved_ms: float = 0.0
+        self.total_prefetch_saved_ms: float = 0.0
+        # Saved latency of a prefetch hit, reported by the next processed frame
+        self._unreported_prefetch_saved_ms: Optional[float] = None
+
+        # Last successful retrieval, injected when a retrieval misses the deadline
+        self._last_memories_data: Optional[Dict[str, Any]] = None
+        self._background_retrievals: Set[asyncio.Task] = set()
+        self.retrieval_timeouts: int = 0
+
+    def create_prefetch_processor(self) -> "SupermemoryPrefetchProcessor":
+        """Create a processor that starts memory retrieval from transcriptions.
+
+        The user context aggregator consumes transcription frames, so place this
+        processor between the STT service and the aggregator.
+        """
+        return SupermemoryPrefetchProcessor(self)
+
+    def _handle_transcription(self, frame: Frame) -> None:
+        """Start a speculative retrieval once the user's utterance is stable."""
+        if not self.params.prefetch or not getattr(frame, "text", "").strip():
+            return
+
+        if self._interim_timer is not None:
+            self._interim_timer.cancel()
+            self._interim_timer = None
+
+        if isinstance(frame, TranscriptionFrame):
+            self._transcript_parts.append(frame.text.strip())
+            self._start_prefetch(" ".join(self._transcript_parts))
+        elif isinstance(frame, InterimTranscriptionFrame):
+            # Interim results change while the user speaks; only prefetch once
+            # the text has stopped changing for prefetch_stable_ms.
+            candidate = " ".join(self._transcript_parts + [frame.text.strip()])
+            self._interim_timer = asyncio.get_running_loop().call_later(
+                self.params.prefetch_stable_ms / 1000, self._start_prefetch, candidate
+            )
+
+    def _start_prefetch(self, query: str) -> None:
+        self._interim_timer = None
+        if self._prefetch_task is not None and normalize_query(
+            self._prefetch_query or ""
+        ) == normalize_query(query):
+            return
+
+        self._cancel_prefetch()
+        self._prefetch_query = query
+        self._prefetch_started_at = time.perf_counter()
+        self._prefetch_finished_at = None
+        self._prefetch_task = asyncio.ensure_future(self._retrieve_memories(query))
+        self._prefetch_task.add_done_callback(self._on_prefetch_done)
+
+    def _on_prefetch_done(self, task: asyncio.Task) -> None:
+        if task is self._prefetch_task:
+            self._prefetch_finished_at = time.perf_counter()
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Memory prefetch failed: {task.exception()}")
+
+    def _cancel_prefetch(self) -> None:
+        if self._interim_timer is not None:
+            self._interim_timer.cancel()
+            self._interim_timer = None
+        if self._prefetch_task is not None and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+        self._prefetch_task = None
+        self._prefetch_query = None
+
+    async def _take_prefetched_memories(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the prefetched memories for this query, or None if there are none.
+
+        A prefetch for a different query is cancelled. The portion of the
+        retrieval that ran before the context frame arrived is recorded as the
+        latency saved.
+        """
+        task, prefetch_query = self._prefetch_task, self._prefetch_query
+        arrived_at = time.perf_counter()
+        finished_at = self._prefetch_finished_at
+        self._transcript_parts = []
+        self._prefetch_task = None
+        self._prefetch_query = None
+        if self._interim_timer is not None:
+            self._interim_timer.cancel()
+            self._interim_timer = None
+
+        if task is None:
+            return None
+
+        if normalize_query(prefetch_query or "") != normalize_query(query):
+            task.cancel()
+            self.prefetch_misses += 1
+            return None
+
+        try:
+            memories_data = await task
+        except (MemoryRetrievalError, asyncio.CancelledError):
+            self.prefetch_misses += 1
+            return None
+
+        saved_ms = (min(arrived_at, finished_at or arrived_at) - self._prefetch_started_at) * 1000
+        self.prefetch_hits += 1
+        self.last_prefetch_saved_ms = saved_ms
+        self.total_prefetch_saved_ms += saved_ms
+        self._unreported_prefetch_saved_ms = saved_ms
+        logger.debug(f"Memory prefetch hit, saved {saved_ms:.0f}ms of retrieval latency")
+        return memories_data
+
+    async def _report_prefetch_saved(self) -> None:
+        """Push the latency saved by the last prefetch hit as a MetricsFrame.
+
+        Called from ``process_frame`` only, since the prefetch itself may finish
+        on a background task after the retrieval deadline.
+        """
+        saved_ms, self._unreported_prefetch_saved_ms = self._unreported_prefetch_saved_ms, None
+        if saved_ms is None or not self.metrics_enabled:
+            return
+        await self.push_frame(
+            MetricsFrame(
+                data=[
+                    ProcessingMetricsData(
+                        processor=f"{self.name}:memory_prefetch_saved",
+                        value=saved_ms / 1000,
+                    )
+                ]
+            )
+        )
+
+    async def _retrieve_within_deadline(self, query: str) -> Optional[Dict[str, Any]]:
+        """Retrieve memories, waiting no longer than ``retrieval_timeout_ms`` if set.
+
+        On timeout the retrieval keeps running in the background so the next
+        turn sees its result, and the last retrieved memories are returned
+        instead (None if nothing was retrieved yet).
+
+        Raises:
+            MemoryRetrievalError: If retrieval fails before the deadline.
+        """
+        task = asyncio.ensure_future(self._retrieve_prefetched_or_fresh(query))
+        task.add_done_callback(self._remember_memories)
+        timeout_ms = self.params.retrieval_timeout_ms
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(task), None if timeout_ms is None else timeout_ms / 1000
+            )
+        except asyncio.TimeoutError:
+            self.retrieval_timeouts += 1
+            self._background_retrievals.add(task)
+            task.add_done_callback(self._background_retrievals.discard)
+            logger.warning(
+                f"Memory retrieval exceeded {timeout_ms}ms, " "using last known memories"
+            )
+            return self._last_memories_data
+
+    async def _retrieve_prefetched_or_fresh(self, query: str) -> Dict[str, Any]:
+        memories_data = await self._take_prefetched_memories(query)
+        if memories_data is None:
+            memories_data = await self._retrieve_memories(query)
+        return memories_data
+
+    def _remember_memories(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is None:
+            self._last_memories_data = task.result()
 
     async def _retrieve_memories(self, query: str) -> Dict[str, Any]:
         """Retrieve relevant memories from Supermemory.
@@ -136,6 +468,13 @@ class SupermemoryPipecatService(FrameProcessor):
                 "Supermemory client not initialized. Install with: pip install supermemory"
             )
 
+        use_cache = self.query_cache is not None and self.params.mode != "profile" and query
+        settings = (self.params.search_limit, self.params.search_threshold)
+        if use_cache:
+            cached = self.query_cache.get(self.container_tag, query, settings)
+            if cached is not None:
+                return cached
+
         try:
             kwargs: Dict[str, Any] = {"container_tag": self.container_tag}
 
@@ -153,50 +492,125 @@ class SupermemoryPipecatService(FrameProcessor):
             if search_results_response and search_results_response.results:
                 search_results = search_results_response.results
 
-            return {
+            memories_data = {
                 "profile": {
                     "static": profile.static if profile is not None else [],
                     "dynamic": profile.dynamic if profile is not None else [],
                 },
                 "search_results": search_results,
             }
+            if use_cache:
+                self.query_cache.set(self.container_tag, query, memories_data, settings)
+            return memories_data
 
         except Exception as e:
             logger.error(f"Error retrieving memories: {e}")
             raise MemoryRetrievalError("Failed to retrieve memories", e)
 
+    def _create_task(self, coro: Any) -> asyncio.Task:
+        """Start a background task and keep a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _queue_messages_for_storage(self, messages: List[Dict[str, Any]]) -> None:
+        """Buffer messages and store everything buffered in one write per window."""
+        self._pending_store.extend(messages)
+        if self._store_flush_task is None:
+            self._store_flush_task = self._create_task(self._flush_pending_store())
+
+    @property
+    def in_flight_writes(self) -> int:
+        """Number of store requests currently in flight."""
+        return self._writes_in_flight
+
+    async def _flush_pending_store(self) -> None:
+        if self.params.store_debounce_ms > 0:
+            await asyncio.sleep(self.params.store_debounce_ms / 1000)
+        await self._write_pending_store()
+
+    async def _write_pending_store(self) -> None:
+        async with self._write_slots:
+            # Messages that arrived while waiting for a slot join this write
+            if self._store_flush_task is asyncio.current_task():
+                self._store_flush_task = None
+            messages, self._pending_store = self._pending_store, []
+            if not messages:
+                return
+
+            self._writes_in_flight += 1
+            try:
+                await self._store_messages(messages)
+            finally:
+                self._writes_in_flight -= 1
+
+    async def _drain_pending_writes(self) -> None:
+        """Write buffered messages now and wait for in-flight writes to finish.
+
+        Writes still running after ``drain_timeout_ms`` are cancelled.
+        """
+        if self._store_flush_task is not None:
+            # Still waiting to take the buffer, so it is safe to cancel
+            self._store_flush_task.cancel()
+            self._store_flush_task = None
+        if self._pending_store:
+            self._create_task(self._write_pending_store())
+        if not self._tasks:
+            return
+
+        _, pending = await asyncio.wait(
+            set(self._tasks), timeout=self.params.drain_timeout_ms / 1000
+        )
+        if pending:
+            logger.warning(
+                f"Cancelling {len(pending)} memory writes still pending after "
+                f"{self.params.drain_timeout_ms}ms"
+            )
+            for task in pending:
+                task.cancel()
+
     async def _store_messages(self, messages: List[Dict[str, Any]]) -> None:
-        """Store messages in Supermemory (non-blocking, fire-and-forget)."""
+        """Store messages in Supermemory as compact transcript lines."""
         if self._supermemory_client is None or not messages:
             return
 
+        content = format_transcript(messages)
+        if not content:
+            return
+
         try:
             add_params: Dict[str, Any] = {
-                "content": json.dumps(messages),
+                "content": content,
                 "container_tags": [self.container_tag],
                 "metadata": {"platform": "pipecat"},
             }
             if self.session_id:
                 add_params["custom_id"] = self.session_id
 
-            await self._supermemory_client.memories.add(**add_params)
+            if self.batch_writer is not None:
+                await self.batch_writer.submit(add_params)
+            else:
+                await self._supermemory_client.memories.add(**add_params)
+            if self.query_cache is not None:
+                self.query_cache.invalidate(self.container_tag)
 
         except Exception as e:
             logger.error(f"Error storing messages: {e}")
 
     def _enhance_context_with_memories(
         self,
-        context: LLMContext,
+        messages: List[Any],
         query: str,
         memories_data: Dict[str, Any],
     ) -> None:
-        """Enhance LLM context with retrieved memories.
+        """Enhance the LLM context messages with retrieved memories, in place.
 
         Uses XML tags <user_memories>...</user_memories> to wrap memories,
         allowing replacement on each turn instead of accumulation.
 
         Args:
-            context: The LLM context to enhance.
+            messages: The live message list of the LLM context.
             query: The query used for retrieval.
             memories_data: Memory data from Supermemory API.
         """
@@ -224,29 +638,42 @@ class SupermemoryPipecatService(FrameProcessor):
         include_profile = self.params.mode in ("profile", "full")
         include_search = self.params.mode in ("query", "full")
 
-        memory_text = format_memories_to_text(
-            deduplicated,
-            system_prompt=self.params.system_prompt,
-            include_static=include_profile,
-            include_dynamic=include_profile,
-            include_search=include_search,
+        if self.params.max_memory_tokens is not None:
+            deduplicated, _, dropped_tokens = limit_memories_to_token_budget(
+                deduplicated,
+                self.params.max_memory_tokens,
+                include_profile=include_profile,
+                include_search=include_search,
+                render=lambda kept: "".join(
+                    self._render_memory_blocks(
+                        kept, include_profile, include_search, self._budget_renderer
+                    )
+                ),
+                search_line=self._budget_renderer.search_line,
+            )
+            self.memory_tokens_dropped += dropped_tokens
+
+        stable, tagged_memory = self._render_memory_blocks(
+            deduplicated, include_profile, include_search
         )
 
-        if not memory_text:
+        if self.params.inject_mode == "cache_friendly":
+            self._inject_cache_friendly(messages, stable, tagged_memory)
             return
 
-        tagged_memory = f"{MEMORY_TAG_START}\n{memory_text}\n{MEMORY_TAG_END}"
+        if not tagged_memory:
+            return
+
+        self.memory_tokens_injected += estimate_tokens(tagged_memory)
 
         inject_to_system = self.params.inject_mode == "system" or (
             self.params.inject_mode == "auto" and self._audio_frames_detected
         )
 
-        messages = context.get_messages()
-
         if inject_to_system:
             system_idx = None
             for i, msg in enumerate(messages):
-                if msg.get("role") == "system":
+                if isinstance(msg, dict) and msg.get("role") == "system":
                     system_idx = i
                     break
 
@@ -260,20 +687,115 @@ class SupermemoryPipecatService(FrameProcessor):
                     messages[system_idx]["content"] = f"{existing_content}\n\n{tagged_memory}"
             else:
                 messages.insert(0, {"role": "system", "content": tagged_memory})
+                self._message_index.reset()
+                self._message_index.update(messages)
         else:
-            # Remove previous memory message if exists
-            for i in range(len(messages) - 1, -1, -1):
-                msg = messages[i]
-                if msg.get("role") == "user" and MEMORY_TAG_START in msg.get("content", ""):
-                    messages.pop(i)
-                    break
+            # Replace the previous memory message, if any
+            self._message_index.remove_memory_message(messages)
+            messages.append({"role": "user", "content": tagged_memory})
+            self._message_index.update(messages)
+
+    def _render_memory_blocks(
+        self,
+        memories: Dict[str, Any],
+        include_profile: bool,
+        include_search: bool,
+        renderer: Optional[MemoryRenderer] = None,
+    ) -> Tuple[str, str]:
+        """Render the tagged memory text to inject.
+
+        Returns the stable and the volatile block. With the ``cache_friendly``
+        inject mode the sorted static profile is the stable block; otherwise the
+        stable block is empty and every memory is in the volatile one.
+        """
+        renderer = renderer or self._renderer
+
+        def tagged(text: str, start: str, end: str) -> str:
+            return f"{start}\n{text}\n{end}" if text else ""
+
+        if self.params.inject_mode != "cache_friendly":
+            text = renderer.render(
+                memories,
+                system_prompt=self.params.system_prompt,
+                include_static=include_profile,
+                include_dynamic=include_profile,
+                include_search=include_search,
+            )
+            return "", tagged(text, MEMORY_TAG_START, MEMORY_TAG_END)
 
-            context.add_message({"role": "user", "content": tagged_memory})
+        stable_text = renderer.render(
+            {"static": sorted(memories["static"]), "dynamic": [], "search_results": []},
+            system_prompt=self.params.system_prompt,
+            include_static=include_profile,
+        )
+        volatile_text = renderer.render(
+            {
+                "static": [],
+                "dynamic": sorted(memories["dynamic"]),
+                "search_results": memories["search_results"],
+            },
+            # The prompt prefix leads the stable block; repeat it only without one
+            system_prompt="" if stable_text else self.params.system_prompt,
+            include_dynamic=include_profile,
+            include_search=include_search,
+        )
+        return (
+            tagged(stable_text, PROFILE_TAG_START, PROFILE_TAG_END),
+            tagged(volatile_text, MEMORY_TAG_START, MEMORY_TAG_END),
+        )
+
+    def _inject_cache_friendly(self, messages: List[Any], stable: str, volatile: str) -> None:
+        """Inject memories without changing the prompt prefix more than needed.
+
+        The stable block (the sorted static profile) goes in a system message
+        right after the leading system messages, and is only rewritten when it
+        changes, so the LLM provider's prompt cache stays valid. The volatile
+        block (dynamic profile and search results) replaces the memory message
+        at the end of the context.
+        """
+        profile_idx = None
+        leading_system = 0
+        while leading_system < len(messages):
+            msg = messages[leading_system]
+            if not isinstance(msg, dict) or msg.get("role") != "system":
+                break
+            if str(msg.get("content", "")).startswith(PROFILE_TAG_START):
+                profile_idx = leading_system
+            leading_system += 1
+
+        if stable:
+            if profile_idx is None:
+                messages.insert(leading_system, {"role": "system", "content": stable})
+                self._message_index.reset()
+            elif messages[profile_idx]["content"] != stable:
+                messages[profile_idx]["content"] = stable
+            self.memory_tokens_injected += estimate_tokens(stable)
+        elif profile_idx is not None:
+            messages.pop(profile_idx)
+            self._message_index.reset()
+        self._message_index.update(messages)
+
+        self._message_index.remove_memory_message(messages)
+        if volatile:
+            messages.append({"role": "user", "content": volatile})
+            self._message_index.update(messages)
+            self.memory_tokens_injected += estimate_tokens(volatile)
 
     async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
         """Process frames, intercept context frames for memory integration."""
         await super().process_frame(frame, direction)
 
+        if isinstance(frame, (TranscriptionFrame, InterimTranscriptionFrame)):
+            self._handle_transcription(frame)
+            await self.push_frame(frame, direction)
+            return
+
+        if isinstance(frame, (EndFrame, CancelFrame)):
+            self._cancel_prefetch()
+            await self._drain_pending_writes()
+            await self.push_frame(frame, direction)
+            return
+
         # Auto-detect speech-to-speech mode via audio frames
         if isinstance(frame, InputAudioRawFrame):
             if not self._audio_frames_detected:
@@ -281,43 +803,38 @@ class SupermemoryPipecatService(FrameProcessor):
             await self.push_frame(frame, direction)
             return
 
-        context = None
-        messages = None
+        context_messages = None
 
         if isinstance(frame, (LLMContextFrame, OpenAILLMContextFrame)):
-            context = frame.context
+            context_messages = frame.context.get_messages()
         elif isinstance(frame, LLMMessagesFrame):
-            messages = frame.messages
-            context = LLMContext(messages)
+            context_messages = frame.messages
 
-        if context:
+        if context_messages is not None:
             try:
-                context_messages = context.get_messages()
-                latest_user_message = get_last_user_message(context_messages)
+                index = self._message_index
+                index.update(context_messages)
+                latest_user_message = index.last_user_message(context_messages)
 
                 if latest_user_message:
                     try:
-                        memories_data = await self._retrieve_memories(latest_user_message)
-                        self._enhance_context_with_memories(
-                            context, latest_user_message, memories_data
-                        )
+                        memories_data = await self._retrieve_within_deadline(latest_user_message)
+                        await self._report_prefetch_saved()
+                        if memories_data is not None:
+                            self._enhance_context_with_memories(
+                                context_messages, latest_user_message, memories_data
+                            )
                     except MemoryRetrievalError as e:
                         logger.warning(f"Memory retrieval failed: {e}")
 
                 # Store unsent messages (user and assistant only)
-                storable_messages = [
-                    msg for msg in context_messages if msg["role"] in ("user", "assistant")
-                ]
-                unsent_messages = storable_messages[self._messages_sent_count :]
+                unsent_messages = index.unsent_messages(context_messages, self._messages_sent_count)
 
                 if unsent_messages:
-                    asyncio.create_task(self._store_messages(unsent_messages))
-                    self._messages_sent_count = len(storable_messages)
+                    self._queue_messages_for_storage(unsent_messages)
+                    self._messages_sent_count = index.storable
 
-                if messages is not None:
-                    await self.push_frame(LLMMessagesFrame(context.get_messages()))
-                else:
-                    await self.push_frame(frame)
+                await self.push_frame(frame)
 
             except Exception as e:
                 logger.error(f"Error processing frame: {e}")
@@ -325,8 +842,62 @@ class SupermemoryPipecatService(FrameProcessor):
         else:
             await self.push_frame(frame, direction)
 
+    async def cleanup(self) -> None:
+        """Release the shared API client when the pipeline shuts down."""
+        await super().cleanup()
+        if self._supermemory_client is not None:
+            client, self._supermemory_client = self._supermemory_client, None
+            await self._client_pool.release(client)
+
     def reset_memory_tracking(self) -> None:
         """Reset memory tracking state for a new conversation."""
         self._messages_sent_count = 0
+        self._message_index.reset()
         self._last_query = None
         self._audio_frames_detected = False
+        self._transcript_parts = []
+        self._cancel_prefetch()
+        self._last_memories_data = None
+        for task in self._background_retrievals:
+            task.cancel()
+        self._background_retrievals.clear()
+
+
+class SupermemoryPrefetchProcessor(FrameProcessor):
+    """Pass-through processor that feeds transcriptions to a memory service.
+
+    Place it between the STT service and the user context aggregator so the
+    memory service can start retrieval while the user is still finishing their
+    turn.
+
+    Example:
+        ```python
+        pipeline = Pipeline([
+            transport.input(),
+            stt,
+            memory.create_prefetch_processor(),
+            user_context,
+            memory,
+            llm,
+            transport.output(),
+        ])
+        ```
+    """
+
+    def __init__(self, service: SupermemoryPipecatService):
+        """Initialize the processor.
+
+        Args:
+            service: The memory service that retrieves and injects memories.
+        """
+        super().__init__()
+        self._service = service
+
+    async def process_frame(self, frame: Frame, direction: FrameDirection) -> None:
+        """Forward every frame, notifying the service of transcriptions."""
+        await super().process_frame(frame, direction)
+
+        if isinstance(frame, (TranscriptionFrame, InterimTranscriptionFrame)):
+            self._service._handle_transcription(frame)
+
+        await self.push_frame(frame, direction)
@@ -1,7 +1,8 @@
 """Utility functions for Supermemory Pipecat integration."""
 
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Union
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 
 def get_last_user_message(messages: List[Dict[str, str]]) -> str | None:
@@ -12,6 +13,37 @@ def get_last_user_message(messages: List[Dict[str, str]]) -> str | None:
     return None
 
 
+@lru_cache(maxsize=4096)
+def _parse_timestamp(iso_timestamp: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(iso_timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _relative_time(dt: datetime, now: datetime) -> Tuple[str, Optional[datetime]]:
+    """Return the relative time label for ``dt`` and when it stops being valid.
+
+    The expiry is None for labels that never change.
+    """
+    minutes = (now - dt).total_seconds() / 60
+    if minutes < 30:
+        return "just now", dt + timedelta(minutes=30)
+    if minutes < 60:
+        return f"{int(minutes)}mins ago", dt + timedelta(minutes=int(minutes) + 1)
+
+    hours = minutes / 60
+    if hours < 24:
+        return f"{int(hours)} hrs ago", dt + timedelta(hours=int(hours) + 1)
+
+    days = hours / 24
+    if days < 7:
+        return f"{int(days)}d ago", dt + timedelta(days=int(days) + 1)
+    if dt.year == now.year:
+        return f"{dt.day} {dt.strftime('%b')}", datetime(now.year + 1, 1, 1, tzinfo=timezone.utc)
+    return f"{dt.day} {dt.strftime('%b')}, {dt.year}", None
+
+
 def format_relative_time(iso_timestamp: str) -> str:
     """Convert ISO timestamp to relative time string.
 
@@ -24,27 +56,10 @@ def format_relative_time(iso_timestamp: str) -> str:
     - [X Jul, 2023] - different year
     """
     try:
-        dt = datetime.fromisoformat(iso_timestamp.replace("Z", "+00:00"))
-        now = datetime.now(timezone.utc)
-        diff = now - dt
-
-        seconds = diff.total_seconds()
-        minutes = seconds / 60
-        hours = seconds / 3600
-        days = seconds / 86400
-
-        if minutes < 30:
-            return "just now"
-        elif minutes < 60:
-            return f"{int(minutes)}mins ago"
-        elif hours < 24:
-            return f"{int(hours)} hrs ago"
-        elif days < 7:
-            return f"{int(days)}d ago"
-        elif dt.year == now.year:
-            return f"{dt.day} {dt.strftime('%b')}"
-        else:
-            return f"{dt.day} {dt.strftime('%b')}, {dt.year}"
+        dt = _parse_timestamp(iso_timestamp)
+        if dt is None:
+            return ""
+        return _relative_time(dt, datetime.now(timezone.utc))[0]
     except Exception:
         return ""
 
@@ -131,4 +146,226 @@ def format_memories_to_text(
     if not sections:
         return ""
 
-    return f"{system_prompt}\n" + "\n\n".join(sections)
+    body = "\n\n".join(sections)
+    return f"{system_prompt}\n{body}" if system_prompt else body
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text, at roughly four characters per token."""
+    return (len(text) + 3) // 4
+
+
+def _search_score(item: Any) -> float:
+    value = item.get("similarity", item.get("score")) if isinstance(item, dict) else None
+    return float(value) if isinstance(value, (int, float)) else 0.0
+
+
+def limit_memories_to_token_budget(
+    memories: Dict[str, Union[List[str], List[Dict[str, Any]]]],
+    max_tokens: int,
+    include_profile: bool = True,
+    include_search: bool = True,
+    render: Optional[Callable[[Dict[str, Any]], str]] = None,
+    search_line: Optional[Callable[[Any], str]] = None,
+) -> Tuple[Dict[str, Union[List[str], List[Dict[str, Any]]]], int, int]:
+    """Keep the highest-priority memories that fit in an estimated token budget.
+
+    Memories are taken in priority order: static, dynamic, then search results
+    by descending similarity. Once one no longer fits, it and every memory after
+    it are dropped, so the same input always gives the same output. Kept search
+    results stay in their original order.
+
+    Without ``render`` only the memory lines are counted. With ``render``, the
+    budget applies to the text it produces from the kept memories, so section
+    headers, the system prompt and memory tags count as well. ``render`` is
+    only called when a section gets its first memory; every later memory adds
+    one line to its section, ``- memory`` or, for search results, the line
+    ``search_line`` renders.
+
+    Returns:
+        The kept memories, and the estimated tokens kept and dropped.
+    """
+    static = memories["static"] if include_profile else []
+    dynamic = memories["dynamic"] if include_profile else []
+    search_results = memories["search_results"] if include_search else []
+
+    candidates: List[Tuple[str, int, str]] = [("static", i, m) for i, m in enumerate(static)]
+    candidates += [("dynamic", i, m) for i, m in enumerate(dynamic)]
+    ranked = sorted(
+        range(len(search_results)), key=lambda i: _search_score(search_results[i]), reverse=True
+    )
+    candidates += [
+        (
+            "search_results",
+            i,
+            (
+                search_results[i].get("memory", "")
+                if isinstance(search_results[i], dict)
+                else str(search_results[i])
+            ),
+        )
+        for i in ranked
+    ]
+
+    kept: Dict[str, Set[int]] = {"static": set(), "dynamic": set(), "search_results": set()}
+
+    def limited() -> Dict[str, Union[List[str], List[Dict[str, Any]]]]:
+        return {
+            "static": [m for i, m in enumerate(static) if i in kept["static"]],
+            "dynamic": [m for i, m in enumerate(dynamic) if i in kept["dynamic"]],
+            "search_results": [
+                r for i, r in enumerate(search_results) if i in kept["search_results"]
+            ],
+        }
+
+    kept_tokens = 0
+    dropped_tokens = 0
+    full = False
+    # Length of the text rendered from the kept memories
+    rendered = 0
+    for section, index, text in candidates:
+        tokens = estimate_tokens(f"- {text}\n")
+        if not full:
+            kept[section].add(index)
+            if render is None:
+                total = kept_tokens + tokens
+            else:
+                if len(kept[section]) == 1:
+                    # A section's first memory also adds its header
+                    length = len(render(limited()))
+                elif section == "search_results" and search_line is not None:
+                    length = rendered + 1 + len(search_line(search_results[index]))
+                else:
+                    length = rendered + len(f"\n- {text}")
+                total = (length + 3) // 4  # as estimate_tokens
+            if total <= max_tokens:
+                kept_tokens = total
+                if render is not None:
+                    rendered = length
+                continue
+            kept[section].discard(index)
+            full = True
+        dropped_tokens += tokens
+
+    return limited(), kept_tokens, dropped_tokens
+
+
+class MemoryRenderer:
+    """Renders memory blocks for injection, reusing work across turns.
+
+    Produces the same text as ``format_memories_to_text``. Profile sections are
+    re-rendered only when the profile changes, and each search result line is
+    kept until its relative time moves to a new bucket (e.g. from "2 hrs ago"
+    to "3 hrs ago").
+    """
+
+    def __init__(self, max_cached_lines: int = 4096):
+        """Initialize the renderer.
+
+        Args:
+            max_cached_lines: Maximum number of search result lines kept.
+        """
+        self.max_cached_lines = max_cached_lines
+        self._sections: Dict[str, Tuple[List[str], str]] = {}
+        self._lines: Dict[Tuple[str, str], Tuple[str, Optional[datetime]]] = {}
+
+    def render(
+        self,
+        memories: Dict[str, Union[List[str], List[Dict[str, Any]]]],
+        system_prompt: str = "Based on previous conversations, I recall:\n\n",
+        include_static: bool = True,
+        include_dynamic: bool = True,
+        include_search: bool = True,
+    ) -> str:
+        """Format deduplicated memories into a text string for injection."""
+        sections = []
+
+        static = memories["static"]
+        dynamic = memories["dynamic"]
+        search_results = memories["search_results"]
+
+        if include_static and static:
+            sections.append(self._profile_section("## User Profile (Persistent)", static))
+
+        if include_dynamic and dynamic:
+            sections.append(self._profile_section("## Recent Context", dynamic))
+
+        if include_search and search_results:
+            now = datetime.now(timezone.utc)
+            lines = "\n".join(self._search_line(item, now) for item in search_results)
+            sections.append(f"## Relevant Memories\n\n{lines}")
+
+        if not sections:
+            return ""
+
+        body = "\n\n".join(sections)
+        return f"{system_prompt}\n{body}" if system_prompt else body
+
+    def search_line(self, item: Any) -> str:
+        """Render one search result as its line of the injected text."""
+        return self._search_line(item, datetime.now(timezone.utc))
+
+    def _profile_section(self, header: str, items: List[str]) -> str:
+        cached = self._sections.get(header)
+        if cached is not None and cached[0] == items:
+            return cached[1]
+
+        text = f"{header}\n\n" + "\n".join(f"- {item}" for item in items)
+        self._sections[header] = (list(items), text)
+        return text
+
+    def _search_line(self, item: Any, now: datetime) -> str:
+        if not isinstance(item, dict):
+            return f"- {item}"
+
+        memory = item.get("memory", "")
+        updated_at = item.get("updatedAt", "")
+        if not updated_at:
+            return f"- {memory}"
+
+        key = (memory, updated_at)
+        cached = self._lines.get(key)
+        if cached is not None and (cached[1] is None or now < cached[1]):
+            return cached[0]
+
+        try:
+            dt = _parse_timestamp(updated_at)
+            label, valid_until = _relative_time(dt, now) if dt is not None else ("", None)
+        except Exception:
+            label, valid_until = "", None
+
+        line = f"- [{label}] {memory}" if label else f"- {memory}"
+        if len(self._lines) >= self.max_cached_lines:
+            self._lines.clear()
+        self._lines[key] = (line, valid_until)
+        return line
+
+
+def _message_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        # Multimodal content: keep the text parts only
+        return " ".join(
+            part.get("text", "")
+            for part in content
+            if isinstance(part, dict) and part.get("type") == "text"
+        )
+    return ""
+
+
+def format_transcript(messages: List[Dict[str, Any]]) -> str:
+    """Format user/assistant messages as compact transcript lines for storage.
+
+    Only the role and text are kept, one ``User: ...`` / ``Assistant: ...`` line
+    per message. Tool calls, metadata and non-text content are dropped.
+    """
+    lines = []
+    for msg in messages:
+        role = msg.get("role")
+        if role not in ("user", "assistant"):
+            continue
+        text = " ".join(_message_text(msg.get("content")).split())
+        if text:
+            lines.append(f"{'User' if role == 'user' else 'Assistant'}: {text}")
+    return "\n".join(lines)
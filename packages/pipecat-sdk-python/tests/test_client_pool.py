@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import types
+import unittest
+from unittest.mock import patch
+
+from tests.test_empty_profile import _install_test_stubs
+
+_install_test_stubs()
+
+from supermemory_pipecat.client_pool import SupermemoryClientPool
+from supermemory_pipecat.service import SupermemoryPipecatService
+
+
+class _FakeHttpClient:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.is_closed = False
+
+    async def aclose(self) -> None:
+        self.is_closed = True
+
+
+class _FakeClient:
+    def __init__(self, *, api_key, base_url, http_client):
+        self.base_url = base_url
+        self.http_client = http_client
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def _fake_supermemory() -> types.ModuleType:
+    module = types.ModuleType("supermemory")
+    module.AsyncSupermemory = _FakeClient
+    module.DefaultAsyncHttpxClient = _FakeHttpClient
+    return module
+
+
+class TestClientPool(unittest.IsolatedAsyncioTestCase):
+    async def test_clients_are_shared_and_closed_after_last_release(self) -> None:
+        pool = SupermemoryClientPool(max_connections=10, http2=False)
+
+        with patch.dict(sys.modules, {"supermemory": _fake_supermemory()}):
+            first = pool.acquire("key-1")
+            second = pool.acquire("key-1")
+            other = pool.acquire("key-1", base_url="https://example.com")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(first.http_client.kwargs["limits"].max_connections, 10)
+        self.assertEqual(len(pool), 2)
+
+        await pool.release(first)
+        self.assertFalse(first.closed)
+        await pool.release(second)
+        self.assertTrue(first.closed)
+        self.assertTrue(first.http_client.is_closed)
+        self.assertEqual(len(pool), 1)
+
+    async def test_services_share_a_client_until_cleanup(self) -> None:
+        pool = SupermemoryClientPool(http2=False)
+        fake = _fake_supermemory()
+
+        with (
+            patch.dict(sys.modules, {"supermemory": fake}),
+            patch("supermemory_pipecat.service.supermemory", fake),
+        ):
+            services = [
+                SupermemoryPipecatService(api_key="mock_key", user_id=f"user-{i}", client_pool=pool)
+                for i in range(3)
+            ]
+        client = services[0]._supermemory_client
+
+        self.assertTrue(all(s._supermemory_client is client for s in services))
+        for service in services:
+            await service.cleanup()
+        self.assertTrue(client.closed)
+        self.assertEqual(len(pool), 0)
+
+
+class TestClientPoolLoops(unittest.TestCase):
+    def test_each_loop_gets_its_own_client(self) -> None:
+        pool = SupermemoryClientPool(http2=False)
+
+        async def acquire():
+            return pool.acquire("key-1")
+
+        with patch.dict(sys.modules, {"supermemory": _fake_supermemory()}):
+            first = asyncio.run(acquire())
+            second = asyncio.run(acquire())
+
+        self.assertIsNot(first, second)
+        # The first loop is closed, so its client was dropped instead of reused
+        self.assertEqual(len(pool), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
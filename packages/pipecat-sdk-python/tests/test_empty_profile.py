@@ -12,6 +12,9 @@ def _install_test_stubs() -> None:
         loguru_module = types.ModuleType("loguru")
 
         class _Logger:
+            def debug(self, *_args, **_kwargs):
+                return None
+
             def warning(self, *_args, **_kwargs):
                 return None
 
@@ -45,6 +48,12 @@ def _install_test_stubs() -> None:
         class Frame:  # pragma: no cover - import stub
             pass
 
+        class CancelFrame:  # pragma: no cover - import stub
+            pass
+
+        class EndFrame:  # pragma: no cover - import stub
+            pass
+
         class InputAudioRawFrame:  # pragma: no cover - import stub
             pass
 
@@ -54,10 +63,31 @@ def _install_test_stubs() -> None:
         class LLMMessagesFrame:  # pragma: no cover - import stub
             pass
 
+        class InterimTranscriptionFrame:  # pragma: no cover - import stub
+            pass
+
+        class MetricsFrame:  # pragma: no cover - import stub
+            pass
+
+        class TranscriptionFrame:  # pragma: no cover - import stub
+            pass
+
+        frames_module.CancelFrame = CancelFrame
+        frames_module.EndFrame = EndFrame
         frames_module.Frame = Frame
         frames_module.InputAudioRawFrame = InputAudioRawFrame
+        frames_module.InterimTranscriptionFrame = InterimTranscriptionFrame
         frames_module.LLMContextFrame = LLMContextFrame
         frames_module.LLMMessagesFrame = LLMMessagesFrame
+        frames_module.MetricsFrame = MetricsFrame
+        frames_module.TranscriptionFrame = TranscriptionFrame
+
+        metrics_module = types.ModuleType("pipecat.metrics.metrics")
+
+        class ProcessingMetricsData:  # pragma: no cover - import stub
+            pass
+
+        metrics_module.ProcessingMetricsData = ProcessingMetricsData
 
         llm_context_module = types.ModuleType("pipecat.processors.aggregators.llm_context")
 
@@ -81,13 +111,19 @@ def _install_test_stubs() -> None:
             pass
 
         class FrameProcessor:
+            metrics_enabled = False
+
             def __init__(self, *args, **kwargs):
                 return None
 
+            async def cleanup(self):
+                return None
+
         frame_processor_module.FrameDirection = FrameDirection
         frame_processor_module.FrameProcessor = FrameProcessor
 
         sys.modules["pipecat.frames.frames"] = frames_module
+        sys.modules["pipecat.metrics.metrics"] = metrics_module
         sys.modules["pipecat.processors.aggregators.llm_context"] = llm_context_module
         sys.modules[
             "pipecat.processors.aggregators.openai_llm_context"
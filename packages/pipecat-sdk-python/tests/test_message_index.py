@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import unittest
+
+from tests.test_empty_profile import _install_test_stubs
+
+_install_test_stubs()
+
+from supermemory_pipecat.service import SupermemoryPipecatService, _MessageIndex
+from supermemory_pipecat.utils import estimate_tokens
+
+
+def _memories(text: str) -> dict:
+    return {"profile": {"static": [text], "dynamic": []}, "search_results": []}
+
+
+class TestMessageIndex(unittest.TestCase):
+    def test_tracks_positions_incrementally(self) -> None:
+        index = _MessageIndex()
+        messages = [
+            {"role": "system", "content": "Be helpful."},
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello!"},
+        ]
+        index.update(messages)
+
+        self.assertEqual(index.last_user_message(messages), "Hi")
+        self.assertEqual(index.storable, 2)
+        self.assertEqual(index.unsent_messages(messages, 0), messages[1:])
+
+        messages.append({"role": "user", "content": "What's new?"})
+        index.update(messages)
+
+        self.assertEqual(index.scanned, 4)
+        self.assertEqual(index.last_user_message(messages), "What's new?")
+        self.assertEqual(index.unsent_messages(messages, 2), [messages[3]])
+
+    def test_reindexes_when_history_is_replaced(self) -> None:
+        index = _MessageIndex()
+        index.update([{"role": "user", "content": "a"}, {"role": "user", "content": "b"}])
+
+        messages = [{"role": "user", "content": "fresh"}]
+        index.update(messages)
+
+        self.assertEqual(index.storable, 1)
+        self.assertEqual(index.last_user_message(messages), "fresh")
+
+
+class TestIncrementalInjection(unittest.TestCase):
+    def test_memory_message_is_replaced_and_not_stored(self) -> None:
+        service = SupermemoryPipecatService(
+            api_key="mock_key",
+            user_id="user-1",
+            params=SupermemoryPipecatService.InputParams(inject_mode="user"),
+        )
+        index = service._message_index
+        messages = [{"role": "user", "content": "Hi"}]
+
+        index.update(messages)
+        service._enhance_context_with_memories(messages, "Hi", _memories("Likes tea"))
+        messages += [
+            {"role": "assistant", "content": "Hello!"},
+            {"role": "user", "content": "Recommend a drink"},
+        ]
+        index.update(messages)
+        service._enhance_context_with_memories(
+            messages, "Recommend a drink", _memories("Likes coffee")
+        )
+
+        memory_messages = [m for m in messages if "<user_memories>" in m["content"]]
+        self.assertEqual(len(memory_messages), 1)
+        self.assertIn("Likes coffee", memory_messages[0]["content"])
+        self.assertIs(messages[-1], memory_messages[0])
+        self.assertEqual(index.last_user_message(messages), "Recommend a drink")
+        self.assertEqual(
+            [m["content"] for m in index.unsent_messages(messages, 0)],
+            ["Hi", "Hello!", "Recommend a drink"],
+        )
+
+    def test_cache_friendly_keeps_prompt_prefix_stable(self) -> None:
+        service = SupermemoryPipecatService(
+            api_key="mock_key",
+            user_id="user-1",
+            params=SupermemoryPipecatService.InputParams(inject_mode="cache_friendly"),
+        )
+        index = service._message_index
+        memories = {
+            "profile": {"static": ["Likes tea", "Lives in Oslo"], "dynamic": ["Planning a trip"]},
+            "search_results": [],
+        }
+        messages = [
+            {"role": "system", "content": "Be helpful."},
+            {"role": "user", "content": "Hi"},
+        ]
+
+        index.update(messages)
+        service._enhance_context_with_memories(messages, "Hi", memories)
+
+        self.assertEqual(messages[0], {"role": "system", "content": "Be helpful."})
+        self.assertTrue(messages[1]["content"].startswith("<user_profile>"))
+        self.assertIn("Likes tea", messages[1]["content"])
+        self.assertNotIn("Planning a trip", messages[1]["content"])
+        self.assertIn("Planning a trip", messages[-1]["content"])
+        prompt = service.params.system_prompt
+        self.assertIn(prompt, messages[1]["content"])
+        self.assertNotIn(prompt.strip(), messages[-1]["content"])
+        profile_message = messages[1]
+
+        messages += [
+            {"role": "assistant", "content": "Hello!"},
+            {"role": "user", "content": "Any plans?"},
+        ]
+        index.update(messages)
+        memories["profile"]["static"].reverse()
+        service._enhance_context_with_memories(messages, "Any plans?", memories)
+
+        self.assertIs(messages[1], profile_message)
+        self.assertEqual(sum("<user_memories>" in m["content"] for m in messages), 1)
+        self.assertEqual(index.last_user_message(messages), "Any plans?")
+        self.assertEqual(
+            [m["content"] for m in index.unsent_messages(messages, 0)],
+            ["Hi", "Hello!", "Any plans?"],
+        )
+
+    def test_token_budget_covers_injected_text(self) -> None:
+        memories = {
+            "profile": {
+                "static": ["Likes tea", "Lives in Oslo", "Works as a nurse"],
+                "dynamic": ["Planning a trip to Rome"],
+            },
+            "search_results": [
+                {"memory": "Asked about train tickets", "similarity": 0.9},
+                {"memory": "Prefers window seats", "similarity": 0.5},
+            ],
+        }
+        budget = 60
+
+        for inject_mode in ("user", "cache_friendly"):
+            service = SupermemoryPipecatService(
+                api_key="mock_key",
+                user_id="user-1",
+                params=SupermemoryPipecatService.InputParams(
+                    inject_mode=inject_mode, max_memory_tokens=budget
+                ),
+            )
+            messages = [
+                {"role": "system", "content": "Be helpful."},
+                {"role": "user", "content": "Hi"},
+            ]
+            service._message_index.update(messages)
+            service._enhance_context_with_memories(messages, "Hi", memories)
+
+            injected = "".join(
+                m["content"] for m in messages if m["content"] not in ("Be helpful.", "Hi")
+            )
+            self.assertIn("Likes tea", injected)
+            self.assertNotIn("Prefers window seats", injected)
+            self.assertLessEqual(estimate_tokens(injected), budget)
+            self.assertEqual(service.memory_tokens_injected, estimate_tokens(injected))
+            self.assertGreater(service.memory_tokens_dropped, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from tests.test_empty_profile import _install_test_stubs
+
+_install_test_stubs()
+
+from supermemory_pipecat.service import SupermemoryPipecatService
+
+
+def _profile_response(memory: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        profile=SimpleNamespace(static=[memory], dynamic=[]),
+        search_results=None,
+    )
+
+
+class TestSpeculativePrefetch(unittest.IsolatedAsyncioTestCase):
+    def _service(self, delay: float = 0.0) -> SupermemoryPipecatService:
+        service = SupermemoryPipecatService(api_key="mock_key", user_id="user-1")
+
+        async def profile(**kwargs):
+            await asyncio.sleep(delay)
+            return _profile_response(f"answer for {kwargs.get('q')}")
+
+        service._supermemory_client = SimpleNamespace(profile=AsyncMock(side_effect=profile))
+        return service
+
+    async def test_matching_prefetch_is_reused(self) -> None:
+        service = self._service(delay=0.05)
+
+        service._start_prefetch("What's my favorite language?")
+        await asyncio.sleep(0.1)
+        result = await service._take_prefetched_memories("what's my favorite language")
+
+        self.assertEqual(result["profile"]["static"], ["answer for What's my favorite language?"])
+        self.assertEqual(service._supermemory_client.profile.await_count, 1)
+        self.assertEqual((service.prefetch_hits, service.prefetch_misses), (1, 0))
+        self.assertGreater(service.last_prefetch_saved_ms, 0)
+
+    async def test_restarting_with_same_query_keeps_task(self) -> None:
+        service = self._service(delay=0.05)
+
+        service._start_prefetch("Hello there")
+        task = service._prefetch_task
+        service._start_prefetch("hello there!")
+
+        self.assertIs(service._prefetch_task, task)
+        await service._take_prefetched_memories("Hello there")
+        self.assertEqual(service._supermemory_client.profile.await_count, 1)
+
+    async def test_stale_prefetch_is_cancelled(self) -> None:
+        service = self._service(delay=1.0)
+
+        service._start_prefetch("Book a table")
+        task = service._prefetch_task
+        result = await service._take_prefetched_memories("Book a table for two tomorrow")
+        await asyncio.sleep(0)
+
+        self.assertIsNone(result)
+        self.assertTrue(task.cancelled())
+        self.assertEqual((service.prefetch_hits, service.prefetch_misses), (0, 1))
+
+    async def test_saved_latency_is_reported_by_frame_processing(self) -> None:
+        service = self._service()
+        service.metrics_enabled = True
+        service.name = "memory"
+        service.push_frame = AsyncMock()
+
+        service._start_prefetch("Hello there")
+        await asyncio.sleep(0.01)
+        await service._take_prefetched_memories("Hello there")
+        service.push_frame.assert_not_awaited()
+
+        with (
+            patch("supermemory_pipecat.service.MetricsFrame", SimpleNamespace),
+            patch("supermemory_pipecat.service.ProcessingMetricsData", SimpleNamespace),
+        ):
+            await service._report_prefetch_saved()
+            await service._report_prefetch_saved()
+
+        service.push_frame.assert_awaited_once()
+        frame = service.push_frame.await_args.args[0]
+        self.assertEqual(frame.data[0].processor, "memory:memory_prefetch_saved")
+        self.assertEqual(frame.data[0].value, service.last_prefetch_saved_ms / 1000)
+
+    def test_prefetch_is_off_by_default(self) -> None:
+        self.assertFalse(SupermemoryPipecatService.InputParams().prefetch)
+
+    async def test_no_prefetch_returns_none(self) -> None:
+        service = self._service()
+
+        self.assertIsNone(await service._take_prefetched_memories("Hello"))
+        self.assertEqual(service.prefetch_misses, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from supermemory_pipecat.utils import (
+    MemoryRenderer,
+    _relative_time,
+    estimate_tokens,
+    format_memories_to_text,
+    limit_memories_to_token_budget,
+)
+
+
+def _memories(now: datetime) -> dict:
+    return {
+        "static": ["Prefers Python", "Lives in Berlin"],
+        "dynamic": ["Planning a trip"],
+        "search_results": [
+            {"memory": "Booked a flight", "updatedAt": (now - timedelta(hours=3)).isoformat()},
+            {"memory": "Likes tea", "updatedAt": "2021-03-04T10:00:00Z"},
+            {"memory": "Undated"},
+            {"memory": "Bad date", "updatedAt": "not-a-date"},
+            "plain string",
+        ],
+    }
+
+
+class TestMemoryRenderer(unittest.TestCase):
+    def test_matches_format_memories_to_text(self) -> None:
+        memories = _memories(datetime.now(timezone.utc))
+        renderer = MemoryRenderer()
+
+        for kwargs in (
+            {},
+            {"include_search": False},
+            {"include_static": False, "include_dynamic": False},
+            {"system_prompt": "Memories:"},
+            {"system_prompt": ""},
+        ):
+            expected = format_memories_to_text(memories, **kwargs)
+            self.assertEqual(renderer.render(memories, **kwargs), expected)
+            self.assertEqual(renderer.render(memories, **kwargs), expected)
+
+    def test_profile_section_rerenders_on_change(self) -> None:
+        renderer = MemoryRenderer()
+        memories = {"static": ["A"], "dynamic": [], "search_results": []}
+
+        first = renderer.render(memories)
+        memories["static"] = ["A", "B"]
+
+        self.assertNotEqual(renderer.render(memories), first)
+        self.assertIn("- B", renderer.render(memories))
+
+    def test_relative_time_expiry_matches_bucket(self) -> None:
+        now = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+        cases = [
+            (now - timedelta(minutes=10), "just now"),
+            (now - timedelta(minutes=45, seconds=20), "45mins ago"),
+            (now - timedelta(hours=5, minutes=10), "5 hrs ago"),
+            (now - timedelta(days=3, hours=2), "3d ago"),
+            (datetime(2026, 2, 14, tzinfo=timezone.utc), "14 Feb"),
+        ]
+        for dt, label in cases:
+            text, valid_until = _relative_time(dt, now)
+            self.assertEqual(text, label)
+            self.assertNotEqual(_relative_time(dt, valid_until)[0], label)
+            self.assertEqual(
+                _relative_time(dt, valid_until - timedelta(seconds=1))[0], label
+            )
+
+        self.assertEqual(
+            _relative_time(datetime(2021, 3, 4, tzinfo=timezone.utc), now),
+            ("4 Mar, 2021", None),
+        )
+
+
+class TestMemoryTokenBudget(unittest.TestCase):
+    def test_keeps_most_relevant_search_results_in_original_order(self) -> None:
+        memories = {
+            "static": ["Prefers Python"],
+            "dynamic": [],
+            "search_results": [
+                {"memory": "Asked about rain", "similarity": 0.2},
+                {"memory": "Likes Rust", "similarity": 0.9},
+                {"memory": "Uses Neovim", "similarity": 0.7},
+            ],
+        }
+        budget = sum(
+            estimate_tokens(f"- {text}\n") for text in ("Prefers Python", "Likes Rust", "Uses Neovim")
+        )
+
+        kept, kept_tokens, dropped_tokens = limit_memories_to_token_budget(memories, budget)
+
+        self.assertEqual(kept["static"], ["Prefers Python"])
+        self.assertEqual([r["memory"] for r in kept["search_results"]], ["Likes Rust", "Uses Neovim"])
+        self.assertEqual(kept_tokens, budget)
+        self.assertEqual(dropped_tokens, estimate_tokens("- Asked about rain\n"))
+
+    def test_render_budget_renders_once_per_section(self) -> None:
+        now = datetime.now(timezone.utc)
+        memories = {
+            "static": [f"Static fact {i}" for i in range(500)],
+            "dynamic": [f"Dynamic fact {i}" for i in range(500)],
+            "search_results": [
+                {
+                    "memory": f"Search result {i}",
+                    "similarity": i / 500,
+                    "updatedAt": (now - timedelta(hours=i % 48)).isoformat(),
+                }
+                for i in range(500)
+            ],
+        }
+        renderer = MemoryRenderer()
+        calls = []
+
+        def render(kept: dict) -> str:
+            calls.append(kept)
+            return renderer.render(kept)
+
+        kept, kept_tokens, _ = limit_memories_to_token_budget(
+            memories, 6000, render=render, search_line=renderer.search_line
+        )
+
+        self.assertEqual(len(calls), 3)
+        self.assertTrue(0 < len(kept["search_results"]) < 500)
+        self.assertEqual(kept_tokens, estimate_tokens(renderer.render(kept)))
+        self.assertLessEqual(kept_tokens, 6000)
+
+    def test_excluded_sections_do_not_use_budget(self) -> None:
+        memories = {
+            "static": ["A long static fact that would fill the budget"],
+            "dynamic": [],
+            "search_results": [{"memory": "Likes Rust"}],
+        }
+
+        kept, _, dropped_tokens = limit_memories_to_token_budget(
+            memories, 5, include_profile=False
+        )
+
+        self.assertEqual(kept["static"], [])
+        self.assertEqual(kept["search_results"], [{"memory": "Likes Rust"}])
+        self.assertEqual(dropped_tokens, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from tests.test_empty_profile import _install_test_stubs
+
+_install_test_stubs()
+
+from supermemory_pipecat.service import SupermemoryPipecatService
+
+
+class TestRetrievalDeadline(unittest.IsolatedAsyncioTestCase):
+    def _service(
+        self, delays: list[float], timeout_ms: int | None = 50
+    ) -> SupermemoryPipecatService:
+        service = SupermemoryPipecatService(
+            api_key="mock_key",
+            user_id="user-1",
+            params=SupermemoryPipecatService.InputParams(retrieval_timeout_ms=timeout_ms),
+        )
+        calls = iter(delays)
+
+        async def profile(**kwargs):
+            await asyncio.sleep(next(calls))
+            return SimpleNamespace(
+                profile=SimpleNamespace(static=[f"about {kwargs.get('q')}"], dynamic=[]),
+                search_results=None,
+            )
+
+        service._supermemory_client = SimpleNamespace(profile=AsyncMock(side_effect=profile))
+        return service
+
+    async def test_returns_within_deadline(self) -> None:
+        service = self._service([0.0])
+
+        result = await service._retrieve_within_deadline("first")
+
+        self.assertEqual(result["profile"]["static"], ["about first"])
+        self.assertEqual(service.retrieval_timeouts, 0)
+
+    async def test_timeout_serves_stale_memories_and_revalidates(self) -> None:
+        service = self._service([0.0, 0.2])
+        await service._retrieve_within_deadline("first")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await service._retrieve_within_deadline("second")
+
+        self.assertLess(loop.time() - started, 0.15)
+        self.assertEqual(result["profile"]["static"], ["about first"])
+        self.assertEqual(service.retrieval_timeouts, 1)
+
+        await asyncio.gather(*service._background_retrievals)
+        self.assertEqual(service._last_memories_data["profile"]["static"], ["about second"])
+
+    async def test_no_deadline_waits_for_retrieval(self) -> None:
+        service = self._service([0.1], timeout_ms=None)
+
+        result = await service._retrieve_within_deadline("first")
+
+        self.assertEqual(result["profile"]["static"], ["about first"])
+        self.assertEqual(service.retrieval_timeouts, 0)
+
+    async def test_timeout_without_previous_memories_returns_none(self) -> None:
+        service = self._service([0.2])
+
+        self.assertIsNone(await service._retrieve_within_deadline("first"))
+        service.reset_memory_tracking()
+        self.assertEqual(service._background_retrievals, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
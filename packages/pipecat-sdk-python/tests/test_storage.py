@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from tests.test_empty_profile import _install_test_stubs
+
+_install_test_stubs()
+
+from supermemory_pipecat.cache import QueryResultCache
+from supermemory_pipecat.service import SupermemoryPipecatService
+from supermemory_pipecat.utils import format_transcript
+
+
+class TestFormatTranscript(unittest.TestCase):
+    def test_keeps_only_role_and_text(self) -> None:
+        transcript = format_transcript(
+            [
+                {"role": "system", "content": "Be brief."},
+                {"role": "user", "content": "Book a table\nfor two"},
+                {
+                    "role": "assistant",
+                    "content": "",
+                    "tool_calls": [{"id": "call_1", "function": {"name": "book"}}],
+                },
+                {"role": "tool", "content": '{"ok": true}', "tool_call_id": "call_1"},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": "Here is the menu"},
+                        {"type": "image_url", "image_url": {"url": "data:..."}},
+                    ],
+                },
+                {"role": "assistant", "content": "Done."},
+            ]
+        )
+
+        self.assertEqual(
+            transcript,
+            "User: Book a table for two\nUser: Here is the menu\nAssistant: Done.",
+        )
+
+
+class TestCoalescedStorage(unittest.IsolatedAsyncioTestCase):
+    async def test_frames_within_window_become_one_write(self) -> None:
+        service = SupermemoryPipecatService(
+            api_key="mock_key",
+            user_id="user-1",
+            session_id="session-1",
+            params=SupermemoryPipecatService.InputParams(store_debounce_ms=20),
+        )
+        add = AsyncMock()
+        service._supermemory_client = SimpleNamespace(memories=SimpleNamespace(add=add))
+
+        service._queue_messages_for_storage([{"role": "user", "content": "Hi"}])
+        service._queue_messages_for_storage([{"role": "assistant", "content": "Hello!"}])
+        self.assertEqual(len(service._tasks), 1)
+
+        await asyncio.gather(*service._tasks)
+
+        add.assert_awaited_once()
+        self.assertEqual(add.await_args.kwargs["content"], "User: Hi\nAssistant: Hello!")
+        self.assertEqual(add.await_args.kwargs["custom_id"], "session-1")
+        self.assertEqual(service._tasks, set())
+
+    async def test_write_invalidates_cached_searches(self) -> None:
+        cache = QueryResultCache()
+        service = SupermemoryPipecatService(
+            api_key="mock_key",
+            user_id="user-1",
+            query_cache=cache,
+        )
+        service._supermemory_client = SimpleNamespace(memories=SimpleNamespace(add=AsyncMock()))
+        cache.set("user-1", "favorite drink", {"search_results": ["Tea"]})
+
+        await service._store_messages([{"role": "user", "content": "I switched to coffee"}])
+
+        self.assertEqual(len(cache), 0)
+
+
+class TestWriteDrain(unittest.IsolatedAsyncioTestCase):
+    def _service(self, delay: float, **params) -> SupermemoryPipecatService:
+        service = SupermemoryPipecatService(
+            api_key="mock_key",
+            user_id="user-1",
+            params=SupermemoryPipecatService.InputParams(**params),
+        )
+        self.contents: list[str] = []
+
+        async def add(**kwargs):
+            await asyncio.sleep(delay)
+            self.contents.append(kwargs["content"])
+
+        service._supermemory_client = SimpleNamespace(memories=SimpleNamespace(add=add))
+        return service
+
+    async def test_drain_writes_buffered_messages_immediately(self) -> None:
+        service = self._service(0.0, store_debounce_ms=60_000)
+
+        service._queue_messages_for_storage([{"role": "user", "content": "Bye"}])
+        await asyncio.wait_for(service._drain_pending_writes(), 1)
+
+        self.assertEqual(self.contents, ["User: Bye"])
+        self.assertEqual(service._tasks, set())
+
+    async def test_drain_cancels_writes_past_deadline(self) -> None:
+        service = self._service(10.0, store_debounce_ms=0, drain_timeout_ms=20)
+
+        service._queue_messages_for_storage([{"role": "user", "content": "Hi"}])
+        await asyncio.sleep(0)
+        self.assertEqual(service.in_flight_writes, 1)
+
+        await asyncio.wait_for(service._drain_pending_writes(), 1)
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.contents, [])
+        self.assertEqual(service.in_flight_writes, 0)
+
+    async def test_in_flight_writes_are_bounded(self) -> None:
+        service = self._service(0.05, store_debounce_ms=0, max_in_flight_writes=1)
+
+        service._queue_messages_for_storage([{"role": "user", "content": "One"}])
+        await asyncio.sleep(0)
+        service._queue_messages_for_storage([{"role": "user", "content": "Two"}])
+        await asyncio.sleep(0)
+        service._queue_messages_for_storage([{"role": "assistant", "content": "Three"}])
+        await asyncio.sleep(0)
+
+        self.assertEqual(service.in_flight_writes, 1)
+        await service._drain_pending_writes()
+        self.assertEqual(self.contents, ["User: One", "User: Two\nAssistant: Three"])
+
+
+if __name__ == "__main__":
+    unittest.main()